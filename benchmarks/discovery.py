@@ -0,0 +1,319 @@
+'''
+Benchmark serial port enumeration and discovery.
+
+Measures latency percentiles and peak memory (see :mod:`tracemalloc`) of:
+
+ - :func:`serial_device._comports` (cold, i.e., after
+   :func:`serial_device.invalidate_comports`, and cached);
+ - :func:`serial_device.comports` with and without ``check_available``;
+ - :func:`serial_device.get_serial_ports`; and
+ - :meth:`serial_device.SerialDevice.get_port`, with the device found on the
+   *last* port tested (i.e., worst case) and the port cache disabled.
+
+Ports are either:
+
+ - ``synthetic``: :func:`serial.tools.list_ports.comports` (and the Linux
+   ``sysfs`` backend) are monkeypatched to list ports that do not exist; or
+ - ``pty``: same as ``synthetic``, but each listed port is the slave end of a
+   real pseudo-terminal pair, so availability checks and connection tests
+   actually open a device.
+
+Examples
+--------
+
+Default port counts (1, 10, 100, 500) for both kinds of ports::
+
+    python benchmarks/discovery.py
+
+Save results to compare against a later run::
+
+    python benchmarks/discovery.py --kind pty -n 1 -n 50 --json before.json
+
+.. versionadded:: 0.11
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import serial
+import serial.tools.list_ports
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+import serial_device as sd
+from serial_device import sysfs
+from serial_device.ports import PortInfo
+
+
+PORT_COUNTS = (1, 10, 100, 500)
+PERCENTILES = (50, 90, 99)
+
+
+def _list_port_info(port, i):
+    from serial.tools.list_ports_common import ListPortInfo
+
+    try:
+        info = ListPortInfo(port, skip_link_detection=True)
+    except TypeError:
+        info = ListPortInfo(port)
+    info.description = 'Synthetic %d' % i
+    info.vid, info.pid = 0x0403, 0x6001
+    info.serial_number = 'SYN%06d' % i
+    info.location = '1-%d' % i
+    info.hwid = info.usb_info()
+    return info
+
+
+@contextlib.contextmanager
+def synthetic_ports(ports):
+    '''
+    Monkeypatch enumeration backends to list the specified ports.
+
+    Parameters
+    ----------
+    ports : list(str)
+        Port names.
+    '''
+    infos = [_list_port_info(port_i, i) for i, port_i in enumerate(ports)]
+    records = [PortInfo(info_i.device, info_i.description, info_i.hwid,
+                        '0403', '6001', info_i.serial_number, info_i.location,
+                        None, None, None) for info_i in infos]
+    originals = (serial.tools.list_ports.comports, sysfs.available,
+                 sysfs.list_ports)
+    serial.tools.list_ports.comports = lambda *args, **kwargs: list(infos)
+    sysfs.available = lambda: True
+    sysfs.list_ports = lambda families=sysfs.FAMILIES: list(records)
+    sd.invalidate_comports()
+    try:
+        yield
+    finally:
+        (serial.tools.list_ports.comports, sysfs.available,
+         sysfs.list_ports) = originals
+        sd.invalidate_comports()
+
+
+@contextlib.contextmanager
+def pty_ports(count):
+    '''
+    Open pseudo-terminal pairs.
+
+    Parameters
+    ----------
+    count : int
+        Number of pairs.
+
+    Yields
+    ------
+    list(str)
+        Name of slave end of each pair.
+    '''
+    fds = []
+    try:
+        for i in range(count):
+            master, slave = os.openpty()
+            fds.extend([master, slave])
+        yield [os.ttyname(slave_i) for slave_i in fds[1::2]]
+    finally:
+        for fd_i in fds:
+            os.close(fd_i)
+
+
+def raise_fd_limit():
+    '''
+    Returns
+    -------
+    int
+        Soft limit on open file descriptors, after raising it to the hard
+        limit (if possible).
+    '''
+    try:
+        import resource
+    except ImportError:
+        return 512
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+class BenchmarkDevice(sd.SerialDevice):
+    '''
+    Device found on :attr:`target` port.  If :attr:`open_port` is ``True``,
+    each connection test opens the port.
+    '''
+    max_concurrency = 8
+    target = None
+    open_port = False
+
+    def test_connection(self, port, baud_rate):
+        if self.open_port:
+            with serial.Serial(port, baud_rate, timeout=0):
+                pass
+        return port == self.target
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile.
+    index = max(0, int(round(p / 100. * len(sorted_values) + .5)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def measure(func, repeat, max_time_s, setup=None):
+    '''
+    Parameters
+    ----------
+    func : callable
+        Function to benchmark.
+    repeat : int
+        Maximum number of timed calls.
+    max_time_s : float
+        Stop timing once this much time has passed (after at least one call).
+    setup : callable, optional
+        Function to call (untimed) before each call of :data:`func`.
+
+    Returns
+    -------
+    dict
+        Number of calls, latency percentiles (in milliseconds), and peak
+        memory allocated during one (separate) call (in KiB).
+    '''
+    # Untimed call, e.g., to import modules on first use.
+    if setup is not None:
+        setup()
+    func()
+
+    durations = []
+    gc.collect()
+    start = time.perf_counter()
+    while len(durations) < repeat:
+        if setup is not None:
+            setup()
+        start_i = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_i)
+        if time.perf_counter() - start > max_time_s:
+            break
+    durations.sort()
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {'calls': len(durations),
+              'max_ms': durations[-1] * 1e3,
+              'peak_kib': peak / 1024.}
+    for p in PERCENTILES:
+        result['p%d_ms' % p] = percentile(durations, p) * 1e3
+    return result
+
+
+def run_cases(kind, ports, repeat, max_time_s, max_concurrency):
+    '''
+    Yields
+    ------
+    tuple
+        ``(case name, result)`` for each benchmark case.
+    '''
+    BenchmarkDevice.target = ports[-1]
+    BenchmarkDevice.open_port = kind == 'pty'
+    device = BenchmarkDevice()
+
+    cases = [('_comports (cold)', sd._comports, sd.invalidate_comports),
+             ('_comports (cached)', sd._comports, None),
+             ('comports(check_available=False)',
+              lambda: sd.comports(check_available=False), None),
+             ('comports(check_available=True)',
+              lambda: sd.comports(check_available=True), None),
+             ('get_serial_ports', lambda: list(sd.get_serial_ports()), None),
+             ('SerialDevice.get_port',
+              lambda: device.get_port(9600, use_cache=False,
+                                      max_concurrency=max_concurrency),
+              None)]
+    for name_i, func_i, setup_i in cases:
+        yield name_i, measure(func_i, repeat, max_time_s, setup=setup_i)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0]
+                                     .strip())
+    parser.add_argument('-k', '--kind', choices=('synthetic', 'pty'),
+                        action='append', help='Kind of ports (default: '
+                        'both).')
+    parser.add_argument('-n', '--ports', type=int, action='append',
+                        help='Number of ports (default: %s).' %
+                        ', '.join(map(str, PORT_COUNTS)))
+    parser.add_argument('-r', '--repeat', type=int, default=50,
+                        help='Maximum number of timed calls per case '
+                        '(default: %(default)s).')
+    parser.add_argument('-t', '--max-time', type=float, default=2.,
+                        help='Maximum time (in seconds) to spend timing each '
+                        'case (default: %(default)s).')
+    parser.add_argument('-c', '--max-concurrency', type=int, default=8,
+                        help='Ports tested concurrently by `get_port` '
+                        '(default: %(default)s).')
+    parser.add_argument('--json', help='Write results to JSON file.')
+    args = parser.parse_args(argv)
+
+    kinds = args.kind or ['synthetic', 'pty']
+    port_counts = args.ports or PORT_COUNTS
+    if 'pty' in kinds and not hasattr(os, 'openpty'):
+        print('Pseudo-terminals are not supported; skipping `pty` ports.',
+              file=sys.stderr)
+        kinds.remove('pty')
+    # Each pty pair takes two descriptors, and each concurrent probe one more.
+    fd_limit = raise_fd_limit()
+    max_pty_count = max(1, (fd_limit - 64 - sd.MAX_WORKERS -
+                            args.max_concurrency) // 2)
+
+    columns = (['p%d_ms' % p for p in PERCENTILES] +
+               ['max_ms', 'peak_kib', 'calls'])
+    header = '%-32s' % 'case' + ''.join('%11s' % c for c in columns)
+    results = []
+    for kind_i in kinds:
+        for count_j in port_counts:
+            if kind_i == 'pty' and count_j > max_pty_count:
+                print('Skipping %d pty ports (open file limit: %d).' %
+                      (count_j, fd_limit), file=sys.stderr)
+                continue
+            if kind_i == 'pty':
+                ports_context = pty_ports(count_j)
+            else:
+                ports_context = contextlib.nullcontext(['/dev/ttySYN%d' % i
+                                                        for i in
+                                                        range(count_j)])
+            with ports_context as ports_j, synthetic_ports(ports_j):
+                print('\n%s ports: %d' % (kind_i, count_j))
+                print(header)
+                for name_k, result_k in run_cases(kind_i, ports_j,
+                                                  args.repeat, args.max_time,
+                                                  args.max_concurrency):
+                    print('%-32s' % name_k +
+                          ''.join(('%11d' if c == 'calls' else '%11.3f') %
+                                  result_k[c] for c in columns))
+                    result_k.update(kind=kind_i, ports=count_j, case=name_k)
+                    results.append(result_k)
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
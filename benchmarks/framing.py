@@ -0,0 +1,184 @@
+'''
+Benchmark framing protocols in :mod:`serial_device.framing` against naive
+implementations (i.e., appending each chunk to a :class:`bytes` object and
+looping over each byte in Python).
+
+A stream of encoded frames is split into chunks (as if read from a port) and
+passed to ``data_received``; no serial port is needed.
+
+Examples
+--------
+
+::
+
+    python benchmarks/framing.py --frames 20000 --frame-size 64 --chunk 256
+
+.. versionadded:: 0.11
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from serial_device.framing import (COBSProtocol, FixedLengthProtocol,
+                                   FramedProtocol, LengthPrefixedProtocol,
+                                   LineProtocol, SLIPProtocol, cobs_encode,
+                                   slip_encode)
+
+HEADER = struct.Struct('<I')
+
+
+class NaiveProtocol(object):
+    def __init__(self):
+        self.buffer = b''
+        self.frames = []
+
+
+class NaiveLine(NaiveProtocol):
+    def data_received(self, data):
+        for byte in data:
+            if byte == 0x0a:
+                self.frames.append(self.buffer.rstrip(b'\r'))
+                self.buffer = b''
+            else:
+                self.buffer += bytes([byte])
+
+
+class NaiveFixedLength(NaiveProtocol):
+    def __init__(self, frame_size):
+        super(NaiveFixedLength, self).__init__()
+        self.frame_size = frame_size
+
+    def data_received(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.frame_size:
+            self.frames.append(self.buffer[:self.frame_size])
+            self.buffer = self.buffer[self.frame_size:]
+
+
+class NaiveLengthPrefixed(NaiveProtocol):
+    def data_received(self, data):
+        self.buffer += data
+        while len(self.buffer) >= HEADER.size:
+            length, = HEADER.unpack(self.buffer[:HEADER.size])
+            if len(self.buffer) < HEADER.size + length:
+                break
+            self.frames.append(self.buffer[HEADER.size:HEADER.size + length])
+            self.buffer = self.buffer[HEADER.size + length:]
+
+
+class NaiveCOBS(NaiveProtocol):
+    def data_received(self, data):
+        for byte in data:
+            if byte:
+                self.buffer += bytes([byte])
+                continue
+            if self.buffer:
+                output = b''
+                index = 0
+                while index < len(self.buffer):
+                    code = self.buffer[index]
+                    index += 1
+                    for i in range(code - 1):
+                        output += bytes([self.buffer[index]])
+                        index += 1
+                    if code < 0xff and index < len(self.buffer):
+                        output += b'\0'
+                self.frames.append(output)
+            self.buffer = b''
+
+
+class NaiveSLIP(NaiveProtocol):
+    def __init__(self):
+        super(NaiveSLIP, self).__init__()
+        self.escaped = False
+
+    def data_received(self, data):
+        for byte in data:
+            if self.escaped:
+                self.buffer += b'\xc0' if byte == 0xdc else b'\xdb'
+                self.escaped = False
+            elif byte == 0xdb:
+                self.escaped = True
+            elif byte == 0xc0:
+                if self.buffer:
+                    self.frames.append(self.buffer)
+                self.buffer = b''
+            else:
+                self.buffer += bytes([byte])
+
+
+def run(protocol, stream, chunk_size):
+    '''
+    Returns
+    -------
+    tuple(float, list)
+        Duration (in seconds) and received frames.
+    '''
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream),
+                                                      chunk_size)]
+    if isinstance(protocol, FramedProtocol):
+        # Deliver frames to a list (like naive implementations).
+        frames = []
+        protocol.frame_callback = frames.append
+        protocol.frames = None
+    else:
+        frames = protocol.frames
+    start = time.perf_counter()
+    for chunk_i in chunks:
+        protocol.data_received(chunk_i)
+    return time.perf_counter() - start, frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0]
+                                     .strip())
+    parser.add_argument('-n', '--frames', type=int, default=20000,
+                        help='Number of frames (default: %(default)s).')
+    parser.add_argument('-s', '--frame-size', type=int, default=64,
+                        help='Bytes per frame (default: %(default)s).')
+    parser.add_argument('-c', '--chunk', type=int, default=256,
+                        help='Bytes per read (default: %(default)s).')
+    args = parser.parse_args(argv)
+
+    payloads = [os.urandom(args.frame_size) for i in range(args.frames)]
+    # Printable payloads (without line endings) for line protocols.
+    lines = [payload_i.hex()[:args.frame_size].encode()
+             for payload_i in payloads]
+    cases = [('line', lambda: LineProtocol(), NaiveLine,
+              b''.join(line_i + b'\r\n' for line_i in lines), lines),
+             ('fixed', lambda: FixedLengthProtocol(args.frame_size),
+              lambda: NaiveFixedLength(args.frame_size), b''.join(payloads),
+              payloads),
+             ('length', lambda: LengthPrefixedProtocol('<I'),
+              NaiveLengthPrefixed,
+              b''.join(HEADER.pack(len(payload_i)) + payload_i
+                       for payload_i in payloads), payloads),
+             ('cobs', lambda: COBSProtocol(), NaiveCOBS,
+              b''.join(cobs_encode(payload_i) + b'\0'
+                       for payload_i in payloads), payloads),
+             ('slip', lambda: SLIPProtocol(), NaiveSLIP,
+              b''.join(slip_encode(payload_i) for payload_i in payloads),
+              payloads)]
+
+    print('%-8s%14s%14s%10s' % ('framing', 'naive MB/s', 'framing MB/s',
+                                'speedup'))
+    for name_i, protocol_i, naive_i, stream_i, expected_i in cases:
+        naive_s, naive_frames = run(naive_i(), stream_i, args.chunk)
+        duration_s, frames = run(protocol_i(), stream_i, args.chunk)
+        assert frames == expected_i, name_i
+        assert naive_frames == expected_i, name_i
+        print('%-8s%14.1f%14.1f%9.1fx' % (name_i,
+                                          len(stream_i) / naive_s / 1e6,
+                                          len(stream_i) / duration_s / 1e6,
+                                          naive_s / duration_s))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+'''
+Benchmark serving reads for many ports: one
+:class:`serial.threaded.ReaderThread` per port vs. a single
+:class:`serial_device.selector.SerialSelector` thread.
+
+Each port is the slave end of a pseudo-terminal pair.  A writer thread sends
+timestamped messages to the master end of each port in turn, and the
+latency from write to :meth:`data_received` is recorded, along with the
+process CPU time and number of threads.
+
+Examples
+--------
+
+::
+
+    python benchmarks/multiplex.py -n 64 --messages 50 --interval 1e-3
+
+.. versionadded:: 0.11
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+
+import serial
+import serial.threaded
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from serial_device.selector import SelectorTransport, SerialSelector
+
+# Timestamp (see `time.perf_counter_ns()`) sent as each message.
+MESSAGE = struct.Struct('=Q')
+
+
+class LatencyProtocol(serial.threaded.Protocol):
+    latencies = []
+    received = 0
+    done = threading.Event()
+    expected = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.buffer = b''
+
+    def data_received(self, data):
+        now = time.perf_counter_ns()
+        self.buffer += data
+        count = len(self.buffer) // MESSAGE.size
+        latencies = [now - MESSAGE.unpack_from(self.buffer, i * MESSAGE.size)[0]
+                     for i in range(count)]
+        self.buffer = self.buffer[count * MESSAGE.size:]
+        cls = type(self)
+        with cls.lock:
+            cls.latencies.extend(latencies)
+            cls.received += count
+            if cls.received >= cls.expected:
+                cls.done.set()
+
+
+def run(mode, port_count, messages, interval_s):
+    '''
+    Returns
+    -------
+    dict
+        Latency percentiles (in microseconds), process CPU time (in seconds)
+        and peak number of threads.
+    '''
+    pairs = [os.openpty() for i in range(port_count)]
+    masters = [master_i for master_i, _ in pairs]
+    devices = []
+    transports = []
+    LatencyProtocol.latencies = []
+    LatencyProtocol.received = 0
+    LatencyProtocol.expected = port_count * messages
+    LatencyProtocol.done = threading.Event()
+    selector = SerialSelector() if mode == 'selector' else None
+    try:
+        for _, slave_i in pairs:
+            # Port is opened in raw mode, so each message can be read as soon
+            # as it is written.
+            devices.append(serial.Serial(os.ttyname(slave_i), 115200))
+        if selector is not None:
+            selector.start()
+        for device_i in devices:
+            if selector is not None:
+                transport_i = SelectorTransport(device_i, LatencyProtocol,
+                                                selector)
+            else:
+                transport_i = serial.threaded.ReaderThread(device_i,
+                                                           LatencyProtocol)
+            transport_i.start()
+            transport_i.connect()
+            transports.append(transport_i)
+        threads = threading.active_count()
+
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for i in range(messages):
+            for master_j in masters:
+                os.write(master_j, MESSAGE.pack(time.perf_counter_ns()))
+            time.sleep(interval_s)
+        LatencyProtocol.done.wait(10)
+        duration_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+    finally:
+        for transport_i in transports:
+            transport_i.close()
+        if selector is not None:
+            selector.stop()
+            selector.join()
+        for master_i, slave_i in pairs:
+            os.close(master_i)
+            os.close(slave_i)
+
+    latencies = sorted(LatencyProtocol.latencies)
+    result = {'mode': mode, 'ports': port_count, 'threads': threads,
+              'received': len(latencies), 'duration_s': duration_s,
+              'cpu_s': cpu_s}
+    for p in (50, 90, 99):
+        result['p%d_us' % p] = (latencies[min(len(latencies) - 1,
+                                              len(latencies) * p // 100)] /
+                                1e3 if latencies else float('nan'))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0]
+                                     .strip())
+    parser.add_argument('-n', '--ports', type=int, action='append',
+                        help='Number of ports (default: 1, 16, 64).')
+    parser.add_argument('-m', '--messages', type=int, default=100,
+                        help='Messages per port (default: %(default)s).')
+    parser.add_argument('-i', '--interval', type=float, default=1e-3,
+                        help='Interval (in seconds) between rounds of '
+                        'messages (default: %(default)s).')
+    args = parser.parse_args(argv)
+
+    columns = ('threads', 'received', 'cpu_s', 'p50_us', 'p90_us', 'p99_us')
+    print('%-10s%7s' % ('mode', 'ports') + ''.join('%10s' % c
+                                                   for c in columns))
+    for count_i in args.ports or (1, 16, 64):
+        for mode_j in ('threads', 'selector'):
+            result = run(mode_j, count_i, args.messages, args.interval)
+            print('%-10s%7d' % (mode_j, count_i) +
+                  ''.join(('%10d' if isinstance(result[c], int) else
+                           '%10.3f') % result[c] for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+'''
+Benchmark wake-up latency of :func:`serial_device.or_event.wait_any` (and
+:func:`serial_device.or_event.OrEvent`) compared to
+:meth:`threading.Event.wait` on a single event.
+
+A setter thread sets one of the waited-on events and records the time; each
+waiting thread records the time it woke up.
+
+Examples
+--------
+
+::
+
+    python benchmarks/wait.py --waiters 1 --waiters 16 --rounds 500
+
+.. versionadded:: 0.11
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from serial_device.or_event import Event, OrEvent, wait_any
+
+
+def _wait_single(events):
+    events[0].wait()
+
+
+def _wait_any(events):
+    wait_any(events)
+
+
+def _wait_or_event(events):
+    OrEvent(*events).wait()
+
+
+METHODS = (('Event.wait (1 event)', Event, _wait_single),
+           ('wait_any (Event)', Event, _wait_any),
+           ('wait_any (threading.Event)', threading.Event, _wait_any),
+           ('OrEvent (Event)', Event, _wait_or_event))
+
+
+def run(event_class, wait, waiters, rounds, event_count=2):
+    '''
+    Returns
+    -------
+    list(int)
+        Sorted wake-up latencies (in nanoseconds) of all waiters in all
+        rounds.
+    '''
+    latencies = []
+    lock = threading.Lock()
+    for i in range(rounds):
+        events = [event_class() for j in range(event_count)]
+        started = threading.Barrier(waiters + 1)
+        set_ns = []
+
+        def _waiter():
+            started.wait()
+            wait(events)
+            woke_ns = time.perf_counter_ns()
+            with lock:
+                latencies.append(woke_ns - set_ns[0])
+
+        threads = [threading.Thread(target=_waiter) for j in range(waiters)]
+        for thread_j in threads:
+            thread_j.start()
+        started.wait()
+        # Give waiters time to block.
+        time.sleep(1e-3)
+        set_ns.append(time.perf_counter_ns())
+        events[0].set()
+        for thread_j in threads:
+            thread_j.join()
+    return sorted(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0]
+                                     .strip())
+    parser.add_argument('-w', '--waiters', type=int, action='append',
+                        help='Number of concurrent waiters (default: 1, 16).')
+    parser.add_argument('-r', '--rounds', type=int, default=200,
+                        help='Number of rounds (default: %(default)s).')
+    args = parser.parse_args(argv)
+
+    print('%-28s%8s%10s%10s%10s' % ('method', 'waiters', 'p50_us', 'p90_us',
+                                     'p99_us'))
+    for waiters_i in args.waiters or (1, 16):
+        for name_j, event_class_j, wait_j in METHODS:
+            latencies = run(event_class_j, wait_j, waiters_i, args.rounds)
+            print('%-28s%8d' % (name_j, waiters_i) +
+                  ''.join('%10.1f' % (latencies[min(len(latencies) - 1,
+                                                    len(latencies) * p //
+                                                    100)] / 1e3)
+                          for p in (50, 90, 99)))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,35 +17,87 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with serial_device.  If not, see <http://www.gnu.org/licenses/>.
 '''
-from time import sleep
 import itertools
 import os
+import sys
+import threading
+import time
 
-import pandas as pd
-import path_helpers as ph
-import serial.tools.list_ports
 import six.moves
 
+from .cache import ENUMERATION_CACHE
+from .port_cache import PORT_CACHE, class_key
+from .ports import PortIndex, PortInfo, list_ports_fast, port_index
+from . import sysfs
+from .probe import MAX_WORKERS, PROBE_TIMEOUT_S, check_ports, first_success
 from ._version import get_versions
 __version__ = get_versions()['version']
 del get_versions
 
 
-def _comports():
+def invalidate_comports():
     '''
+    Discard cached serial port enumeration results.
+
+    .. versionadded:: 0.11
+    '''
+    ENUMERATION_CACHE.invalidate()
+
+
+def _comports(use_cache=True):
+    '''
+    .. versionchanged:: 0.11
+        Add :data:`use_cache` keyword argument.
+
+        :mod:`pandas` is imported on first use.  See :func:`list_ports_fast`
+        for an alternative which does not require :mod:`pandas`.
+
+    Parameters
+    ----------
+    use_cache : bool, optional
+        If ``True``, return cached results from :data:`ENUMERATION_CACHE` if
+        available.
+
     Returns
     -------
     pandas.DataFrame
         Table containing descriptor, and hardware ID of each available COM
         port, indexed by port (e.g., "COM4").
     '''
-    return (pd.DataFrame(list(map(list, serial.tools.list_ports.comports())),
-                         columns=['port', 'descriptor', 'hardware_id'])
-            .set_index('port'))
+    return _comports_ids(use_cache=use_cache)[['descriptor', 'hardware_id']]
+
+
+def _comports_ids(use_cache=True):
+    '''
+    .. versionadded:: 0.11
+
+    Parameters
+    ----------
+    use_cache : bool, optional
+        If ``True``, return cached results from :data:`ENUMERATION_CACHE` if
+        available.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Table containing descriptor, hardware ID, and USB vendor/product ID of
+        each available COM port, indexed by port (e.g., "COM4").
+    '''
+    import pandas as pd
+
+    if use_cache:
+        df_comports = ENUMERATION_CACHE.get('comports', lambda:
+                                            _comports_ids(use_cache=False))
+        return df_comports.copy()
+    columns = ['port', 'descriptor', 'hardware_id', 'vid', 'pid']
+    return (pd.DataFrame([port_i[:len(columns)]
+                          for port_i in list_ports_fast(use_cache=False)],
+                         columns=columns).set_index('port'))
 
 
 def comports(vid_pid=None, include_all=False, check_available=True,
-             only_available=False):
+             only_available=False, probe_timeout_s=PROBE_TIMEOUT_S,
+             max_workers=MAX_WORKERS, use_cache=True, probe=None):
     '''
     .. versionchanged:: 0.9
         Add :data:`check_available` keyword argument to optionally check if
@@ -55,6 +107,18 @@ def comports(vid_pid=None, include_all=False, check_available=True,
         Add :data:`only_available` keyword argument to only include ports that
         are actually available for connection.
 
+    .. versionchanged:: 0.11
+        Probe ports concurrently, bounded by :data:`max_workers`, and give up
+        on any port that does not respond within :data:`probe_timeout_s`.
+
+        Add :data:`use_cache` keyword argument to reuse recent enumeration
+        results from :data:`ENUMERATION_CACHE`.  Note that availability is
+        always checked on each call.
+
+        Add :data:`probe` keyword argument.  By default, if
+        :data:`only_available` is ``True``, check whether each port is in use
+        *without* opening it (see :mod:`serial_device.usage`).
+
     Parameters
     ----------
     vid_pid : str or list, optional
@@ -73,6 +137,22 @@ def comports(vid_pid=None, include_all=False, check_available=True,
         open a temporary connection.
     only_available : bool, optional
         If ``True``, only include ports that are available.
+    probe_timeout_s : float, optional
+        Maximum time (in seconds) to wait for a connection to each port.
+    max_workers : int, optional
+        Maximum number of ports to probe concurrently.
+    use_cache : bool, optional
+        If ``True``, reuse cached enumeration results if available.
+    probe : bool, optional
+        If ``True``, check availability by attempting to open a temporary
+        connection to each port.
+
+        If ``False``, check whether each port is in use without opening it,
+        i.e., without toggling DTR, which resets many boards (only supported
+        on Linux, other systems fall back to opening the port).
+
+        By default, :data:`probe` is ``False`` if :data:`only_available` is
+        ``True``, and ``True`` otherwise.
 
     Returns
     -------
@@ -83,24 +163,12 @@ def comports(vid_pid=None, include_all=False, check_available=True,
         .. versionchanged:: 0.9
             If :data:`check_available` is ``True``, add an ``available`` column
             to the table indicating whether each port accepted a connection.
+
+        .. versionchanged:: 0.11
+            The ``available`` column is ``None`` for ports that did not
+            respond within :data:`probe_timeout_s`.
     '''
-    df_comports = _comports()
-
-    # Extract USB product and vendor IDs from `hwid` entries of the form:
-    #
-    #     FTDIBUS\VID_0403+PID_6001+A60081GEA\0000
-    df_hwid = (df_comports.hardware_id.str.lower().str
-               .extract('vid_(?P<vid>[0-9a-f]+)\+pid_(?P<pid>[0-9a-f]+)',
-                        expand=True))
-    # Extract USB product and vendor IDs from `hwid` entries of the form:
-    #
-    #     USB VID:PID=16C0:0483 SNR=2145930
-    no_id_mask = df_hwid.vid.isnull()
-    df_hwid.loc[no_id_mask] = (df_comports.loc[no_id_mask, 'hardware_id']
-                               .str.lower().str
-                               .extract('vid:pid=(?P<vid>[0-9a-f]+):'
-                                        '(?P<pid>[0-9a-f]+)', expand=True))
-    df_comports = df_comports.join(df_hwid)
+    df_comports = _comports_ids(use_cache=use_cache)
 
     if vid_pid is not None:
         if isinstance(vid_pid, six.string_types):
@@ -108,9 +176,10 @@ def comports(vid_pid=None, include_all=False, check_available=True,
             vid_pid = [vid_pid]
 
         # Mark ports that match specified USB vendor/product IDs.
-        df_comports['include'] = (df_comports.vid + ':' +
-                                  df_comports.pid).isin(map(str.lower,
-                                                            vid_pid))
+        index = port_index(use_cache=use_cache)
+        df_comports['include'] = df_comports.index.isin([port_i.port for
+                                                         port_i in index
+                                                         .find(vid_pid)])
 
         if include_all:
             # All ports should be included, but sort rows such that ports
@@ -126,27 +195,40 @@ def comports(vid_pid=None, include_all=False, check_available=True,
         # Add `available` column indicating whether each port accepted a
         # connection.  A port may not, for example, accept a connection if the
         # port is already open.
-        available = []
-
-        for name_i, port_info_i in df_comports.iterrows():
-            try:
-                connection = serial.Serial(port=name_i)
-                connection.close()
-                available.append(True)
-            except serial.SerialException:
-                available.append(False)
-        df_comports['available'] = available
+        if probe is None:
+            probe = not only_available
+        df_comports['available'] = check_ports(df_comports.index, probe=probe,
+                                               timeout_s=probe_timeout_s,
+                                               max_workers=max_workers)
         if only_available:
-            df_comports = df_comports.loc[df_comports.available]
+            # Exclude ports that timed out, i.e., `available` is `None`.
+            df_comports = df_comports.loc[df_comports.available
+                                          .map(bool).astype(bool)]
         if not check_available:
             del df_comports['available']
     return df_comports
 
 
 def get_serial_ports():
+    '''
+    .. versionchanged:: 0.11
+        On Linux, list wired serial ports registered in ``/sys/class/tty``,
+        including built-in (``ttyS*``, ``ttyAMA*``) and Exar (``ttyXRUSB*``)
+        ports, instead of walking ``/dev``.
+
+    Yields
+    ------
+    str
+        Name of each serial port, in alphabetical order.
+    '''
     if os.name == 'nt':
         ports = _get_serial_ports_windows()
+    elif sys.platform.startswith('linux') and sysfs.available():
+        ports = (port_i.port for port_i in
+                 sysfs.list_ports(families=sysfs.WIRED_FAMILIES))
     else:
+        import path_helpers as ph
+
         ports = itertools.chain(ph.path('/dev').walk('ttyUSB*'),
                                 ph.path('/dev').walk('ttyACM*'),
                                 ph.path('/dev').walk('tty.usb*'))
@@ -199,11 +281,35 @@ class SerialDevice(object):
 
     This class intends to be cross-platform and has been verified to work on
     Windows and Ubuntu.
+
+    .. versionchanged:: 0.11
+        Add :attr:`max_concurrency`, :attr:`port_cache`, and :attr:`vid_pid`
+        class attributes.
     '''
+    #: USB vendor/product ID(s) of device, each in the form ``'<vid>:<pid>'``
+    #: (e.g., ``'2341:0010'``).
+    #:
+    #: If set, matching ports are tested first by :meth:`get_port` and
+    #: :meth:`detect`.
+    vid_pid = None
+
+    #: Maximum number of ports to test concurrently in :meth:`get_port`.
+    #:
+    #: Subclasses may increase this if :meth:`test_connection` is safe to
+    #: call concurrently from multiple threads (e.g., if it does not modify
+    #: the instance).
+    max_concurrency = 1
+
+    #: Persistent cache of the last port each device class was found at (see
+    #: :mod:`serial_device.port_cache`), or ``None`` to disable caching.
+    port_cache = PORT_CACHE
+
     def __init__(self):
         self.port = None
+        self.baud_rate = None
 
-    def get_port(self, baud_rate):
+    def get_port(self, baud_rate, timeout_s=None, max_concurrency=None,
+                 use_cache=True):
         '''
         Using the specified baud-rate, attempt to connect to each available
         serial port.  If the `test_connection()` method returns `True` for a
@@ -211,19 +317,202 @@ class SerialDevice(object):
 
         In the case where the `test_connection()` does not return `True` for
         any of the evaluated ports, raise a `ConnectionError`.
+
+        .. versionchanged:: 0.11
+            Test up to :data:`max_concurrency` ports concurrently and return
+            the first port that passes.  Ports that have not been tested yet
+            are skipped, and :meth:`abort_connection` is called for any other
+            port that passes.
+
+            Add :data:`timeout_s` keyword argument.
+
+            Add :data:`use_cache` keyword argument.  By default, first test
+            the ports where this type of device was last found (see
+            :attr:`port_cache`), before testing all other ports.
+
+        Parameters
+        ----------
+        baud_rate : int
+            Baud rate to test.
+        timeout_s : float, optional
+            Maximum total time (in seconds) to search for a port.
+
+            By default, wait until all ports have been tested.
+        max_concurrency : int, optional
+            Maximum number of ports to test concurrently.
+
+            Default: :attr:`max_concurrency`
+        use_cache : bool, optional
+            If ``True``, test cached ports first, and record the port found
+            in :attr:`port_cache`.
+
+        See also
+        --------
+        :meth:`detect`
         '''
-        self.port = None
+        return self.detect([baud_rate], timeout_s=timeout_s,
+                           max_concurrency=max_concurrency,
+                           use_cache=use_cache)[0]
 
-        for test_port in get_serial_ports():
-            if self.test_connection(test_port, baud_rate):
-                self.port = test_port
-                break
-            sleep(0.1)
+    def detect(self, baud_rates, timeout_s=None, max_concurrency=None,
+               use_cache=True, vid_pid=None):
+        '''
+        Find a port and baud rate at which :meth:`test_connection` passes.
+
+        Ports where this type of device was last found (see
+        :attr:`port_cache`) are tested first, starting with the baud rate it
+        was last found at.  All other ports are then tested concurrently (up
+        to :data:`max_concurrency` at a time), with ports matching
+        :data:`vid_pid` first.  The baud rates of each port are tested one
+        after another, so the same port is never opened twice at once.
+
+        Update the ``port`` and ``baud_rate`` attributes with the first
+        working pair, and call :meth:`abort_connection` for any other port
+        that passes.
+
+        .. versionadded:: 0.11
+
+        Parameters
+        ----------
+        baud_rates : list(int)
+            Baud rates to test, in order of preference.
+        timeout_s : float, optional
+            Maximum total time (in seconds) to search for a port.
+
+            By default, wait until all candidates have been tested.
+        max_concurrency : int, optional
+            Maximum number of ports to test concurrently.
+
+            Default: :attr:`max_concurrency`
+        use_cache : bool, optional
+            If ``True``, test cached ports first, and record the port and baud
+            rate found in :attr:`port_cache`.
+        vid_pid : str or list, optional
+            One or more USB vendor/product IDs (e.g., ``'2341:0010'``) of
+            ports to test first.
+
+            Default: :attr:`vid_pid`
+
+        Returns
+        -------
+        tuple
+            ``(port, baud_rate)``
+
+        Raises
+        ------
+        ConnectionError
+            If no port passed :meth:`test_connection` at any baud rate.
+        '''
+        self.port = None
+        self.baud_rate = None
+        baud_rates = list(baud_rates)
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        port_cache = self.port_cache if use_cache else None
+        index = port_index()
+        cached, ports = self._detect_candidates(baud_rates, port_cache,
+                                                vid_pid, index)
+
+        cancelled = threading.Event()
+
+        def _test_port(port, baud_rates):
+            for baud_rate_i in baud_rates:
+                if cancelled.is_set():
+                    break
+                if self.test_connection(port, baud_rate_i):
+                    return baud_rate_i
+            return None
+
+        def _remaining_s():
+            return (None if deadline is None
+                    else max(0, deadline - time.monotonic()))
+
+        # Test ports where this type of device was last found, one at a time.
+        # A test raising an exception (e.g., port busy) counts as a failure,
+        # and a blocked test is abandoned at the deadline.
+        success = first_success(lambda candidate: _test_port(*candidate),
+                                cached, timeout_s=_remaining_s(),
+                                max_workers=1,
+                                on_extra_success=lambda candidate, baud_rate:
+                                self.abort_connection(candidate[0]))
+        if success is not None:
+            (self.port, _), self.baud_rate = success
+        else:
+            # Test remaining ports concurrently.
+            success = first_success(lambda port: _test_port(port, baud_rates),
+                                    ports, timeout_s=_remaining_s(),
+                                    max_workers=(max_concurrency or
+                                                 self.max_concurrency),
+                                    on_extra_success=lambda port, baud_rate:
+                                    self.abort_connection(port))
+            if success is not None:
+                self.port, self.baud_rate = success
+        # Stop testing other baud rates on ports that are still running.
+        cancelled.set()
 
         if self.port is None:
             raise ConnectionError('Could not connect to serial device.')
 
-        return self.port
+        if port_cache is not None:
+            port_cache.record(class_key(type(self)), self.port, self.baud_rate,
+                              index.ports)
+        return self.port, self.baud_rate
+
+    def _detect_candidates(self, baud_rates, port_cache, vid_pid, index):
+        '''
+        .. versionadded:: 0.11
+
+        Parameters
+        ----------
+        baud_rates : list(int)
+            Baud rates to test, in order of preference.
+        port_cache : serial_device.port_cache.PortCache
+            Port cache, or ``None`` to skip cached ports.
+        vid_pid : str or list
+            USB vendor/product ID(s) of ports to test first.
+
+            If ``None``, use :attr:`vid_pid`.
+        index : serial_device.PortIndex
+            Index of current serial ports.
+
+        Returns
+        -------
+        tuple
+            ``(cached, ports)``, where ``cached`` is a list of ``(port,
+            baud_rates)`` for each cached port, ordered by preference, and
+            ``ports`` lists all other ports, starting with ports matching
+            :data:`vid_pid`.
+        '''
+        cached = []
+        if port_cache is not None:
+            for port_i, baud_rate_i in port_cache.candidates(class_key(type(
+                    self)), index.ports):
+                if port_i in (port_j for port_j, _ in cached):
+                    continue
+                # Start with the baud rate the device was last found at.
+                cached.append((port_i, sorted(baud_rates, key=lambda baud_rate:
+                                              baud_rate != baud_rate_i)))
+        tested = set(port_i for port_i, _ in cached)
+
+        if vid_pid is None:
+            vid_pid = self.vid_pid
+        hinted = (set(port_i.port for port_i in index.find(vid_pid))
+                  if vid_pid else set())
+        ports = sorted((port_i for port_i in get_serial_ports()
+                        if port_i not in tested),
+                       key=lambda port: port not in hinted)
+        return cached, ports
+
+    def abort_connection(self, port):
+        '''
+        Called by :meth:`get_port` for a port that passed
+        :meth:`test_connection` after another port was already selected.
+
+        Override to close any connection left open by
+        :meth:`test_connection`.  By default, do nothing.
+
+        .. versionadded:: 0.11
+        '''
+        pass
 
     def test_connection(self, port, baud_rate):
         '''
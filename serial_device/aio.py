@@ -0,0 +1,887 @@
+'''
+:mod:`asyncio` versions of port enumeration, availability checks and port
+discovery.
+
+Blocking operations (e.g., opening a port, or calling
+:meth:`serial_device.SerialDevice.test_connection`) are run in the event
+loop's default executor, so the loop is never blocked.  All coroutines may be
+cancelled, e.g., using :func:`asyncio.wait_for` to apply a deadline.
+
+Note that a call that is already running in an executor thread cannot be
+interrupted; on cancellation, its result is discarded (see
+:func:`detect` for how connections opened by such calls are released).
+
+The module also provides an :mod:`asyncio` transport for serial ports (see
+:func:`create_serial_connection`), and :class:`KeepAliveConnection`, the
+:mod:`asyncio` counterpart of :class:`serial_device.threaded.KeepAliveReader`.
+Reads and writes are driven by the event loop (i.e., ``loop.add_reader()``
+and ``loop.add_writer()``), so many ports can be served by a single thread.
+These are only supported for ports with a file descriptor (i.e., POSIX
+serial ports).
+
+.. versionadded:: 0.11
+'''
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import os
+import threading
+
+import serial
+
+from . import (ConnectionError, class_key, comports as comports_,
+               list_ports_fast as list_ports_fast_, port_index)
+from . import hotplug
+from .probe import MAX_WORKERS, PROBE_TIMEOUT_S, probe_port
+from .reconnect import Backoff, ReconnectStats
+from .selector import READ_SIZE, supported
+from .usage import ports_available
+
+logger = logging.getLogger(__name__)
+
+
+#: Default size (in bytes) of write buffer at which the protocol is paused.
+WRITE_BUFFER_HIGH = 64 * 1024
+#: Time (in seconds) to wait for a closing transport to report
+#: ``connection_lost`` before aborting it.
+CLOSE_TIMEOUT_S = 5.
+
+
+# Executor for port probes (see `check_ports()`), created on first use.
+_probe_executor = None
+_probe_executor_lock = threading.Lock()
+
+
+async def _run(func, *args, executor=None, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args,
+                                                                  **kwargs))
+
+
+def _get_probe_executor():
+    '''
+    Returns
+    -------
+    concurrent.futures.ThreadPoolExecutor
+        Executor dedicated to port probes, so probes left running after
+        timing out (e.g., on a wedged USB serial adapter) can never use up
+        the event loop's default executor.
+    '''
+    global _probe_executor
+
+    with _probe_executor_lock:
+        if _probe_executor is None:
+            _probe_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_WORKERS,
+                thread_name_prefix='serial_device-probe')
+        return _probe_executor
+
+
+async def list_ports_fast(**kwargs):
+    '''
+    See :func:`serial_device.list_ports_fast`.
+    '''
+    return await _run(list_ports_fast_, **kwargs)
+
+
+async def comports(**kwargs):
+    '''
+    See :func:`serial_device.comports`.
+
+    Note that availability checks run in a single executor thread.  Use
+    :func:`check_ports` to check ports concurrently on the event loop.
+    '''
+    return await _run(comports_, **kwargs)
+
+
+async def check_ports(ports, probe=True, timeout_s=PROBE_TIMEOUT_S,
+                      max_concurrency=MAX_WORKERS):
+    '''
+    Check whether each port is available.
+
+    See :func:`serial_device.probe.check_ports`.
+
+    Parameters
+    ----------
+    ports : list
+        Names of serial ports.
+    probe : bool, optional
+        If ``True``, check each port by opening a temporary connection.
+
+        If ``False``, check whether each port is in use *without* opening it,
+        falling back to opening ports whose usage cannot be determined.
+    timeout_s : float, optional
+        Maximum time (in seconds) to wait for each port probe.
+    max_concurrency : int, optional
+        Maximum number of ports to probe concurrently.
+
+        Probes run in a dedicated executor (of :data:`MAX_WORKERS` threads),
+        rather than the event loop's default executor.
+
+    Returns
+    -------
+    list
+        ``True`` if the respective port is available, ``False`` if not, or
+        ``None`` if a probe did not finish before :data:`timeout_s`.
+    '''
+    ports = list(ports)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _probe(port):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    _run(probe_port, port, executor=_get_probe_executor()),
+                    timeout_s)
+            except asyncio.TimeoutError:
+                return None
+
+    if probe:
+        available = [None] * len(ports)
+        unknown = list(range(len(ports)))
+    else:
+        available = await _run(ports_available, ports)
+        unknown = [i for i, available_i in enumerate(available)
+                   if available_i is None]
+    probed = await asyncio.gather(*[_probe(ports[i]) for i in unknown])
+    for i, available_i in zip(unknown, probed):
+        available[i] = available_i
+    return available
+
+
+async def detect(device, baud_rates, max_concurrency=None, use_cache=True,
+                 vid_pid=None):
+    '''
+    Find a port and baud rate at which ``device.test_connection()`` passes.
+
+    Candidates are tested in the same order as
+    :meth:`serial_device.SerialDevice.detect`.  Cached ports are tested
+    first, one at a time.  All other ports are then tested concurrently (up
+    to :data:`max_concurrency` at a time), each at one baud rate after
+    another.
+
+    On success, the ``port`` and ``baud_rate`` attributes of :data:`device`
+    are updated.  ``device.abort_connection()`` is called for any other port
+    that passes, including calls that finish after this coroutine was
+    cancelled.
+
+    Parameters
+    ----------
+    device : serial_device.SerialDevice
+        Device to find.
+    baud_rates : list(int)
+        Baud rates to test, in order of preference.
+    max_concurrency : int, optional
+        Maximum number of ports to test concurrently.
+
+        Default: ``device.max_concurrency``
+    use_cache : bool, optional
+        If ``True``, test cached ports first, and record the port and baud
+        rate found in ``device.port_cache``.
+    vid_pid : str or list, optional
+        One or more USB vendor/product IDs of ports to test first.
+
+        Default: ``device.vid_pid``
+
+    Returns
+    -------
+    tuple
+        ``(port, baud_rate)``
+
+    Raises
+    ------
+    serial_device.ConnectionError
+        If no port passed ``device.test_connection()`` at any baud rate.
+    '''
+    device.port = None
+    device.baud_rate = None
+    baud_rates = list(baud_rates)
+    port_cache = device.port_cache if use_cache else None
+    index = await _run(port_index)
+    cached, ports = await _run(device._detect_candidates, baud_rates,
+                               port_cache, vid_pid, index)
+
+    lock = threading.Lock()
+    state = {'success': None, 'cancelled': False}
+
+    def _test(port, baud_rate):
+        # Select first successful candidate from the executor thread, so late
+        # successes (e.g., after cancellation) are always released.
+        try:
+            if not device.test_connection(port, baud_rate):
+                return False
+        except Exception as exception:
+            # Treat as failure (as `serial_device.probe.first_success`).
+            logger.debug('Error testing `%s` at %s baud: %s', port,
+                         baud_rate, exception)
+            return False
+        with lock:
+            if state['success'] is None and not state['cancelled']:
+                state['success'] = port, baud_rate
+                return True
+        device.abort_connection(port)
+        return False
+
+    async def _test_port(port, port_baud_rates):
+        for baud_rate_i in port_baud_rates:
+            if state['success'] is not None:
+                break
+            if await _run(_test, port, baud_rate_i):
+                return True
+        return False
+
+    semaphore = asyncio.Semaphore(max_concurrency or device.max_concurrency)
+
+    async def _test_port_bounded(port):
+        async with semaphore:
+            return await _test_port(port, baud_rates)
+
+    tasks = []
+    try:
+        for port_i, baud_rates_i in cached:
+            if await _test_port(port_i, baud_rates_i):
+                break
+        if state['success'] is None and ports:
+            tasks = [asyncio.ensure_future(_test_port_bounded(port_i))
+                     for port_i in ports]
+            for task_i in asyncio.as_completed(tasks):
+                if await task_i:
+                    break
+    except BaseException:
+        # E.g., cancelled.  Release connection to port found (if any), since
+        # it will not be returned.
+        with lock:
+            state['cancelled'] = True
+        if state['success'] is not None:
+            device.abort_connection(state['success'][0])
+        raise
+    finally:
+        with lock:
+            state['cancelled'] = True
+        for task_i in tasks:
+            task_i.cancel()
+
+    if state['success'] is None:
+        raise ConnectionError('Could not connect to serial device.')
+    device.port, device.baud_rate = state['success']
+    if port_cache is not None:
+        await _run(port_cache.record, class_key(type(device)), device.port,
+                   device.baud_rate, index.ports)
+    return state['success']
+
+
+async def get_port(device, baud_rate, **kwargs):
+    '''
+    Find a port at which ``device.test_connection()`` passes at the specified
+    baud rate.
+
+    See :func:`detect` for keyword arguments.
+
+    Returns
+    -------
+    str
+        Name of serial port.
+    '''
+    port, _ = await detect(device, [baud_rate], **kwargs)
+    return port
+
+
+class SerialTransport(asyncio.Transport):
+    '''
+    :mod:`asyncio` transport for an open serial port.
+
+    Use :func:`create_serial_connection` to create a transport.
+
+    Parameters
+    ----------
+    loop : asyncio.AbstractEventLoop
+        Event loop.
+    protocol : asyncio.Protocol
+        Protocol.  A protocol providing ``get_buffer()`` and
+        ``buffer_updated()`` methods is read into directly (see
+        :class:`asyncio.BufferedProtocol`).  Set ``get_buffer = None`` on a
+        protocol class to have ``data_received()`` called instead.
+    serial_instance : serial.Serial
+        Open serial port.
+    '''
+    def __init__(self, loop, protocol, serial_instance):
+        super(SerialTransport, self).__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self.serial = serial_instance
+        self._fd = serial_instance.fileno()
+        os.set_blocking(self._fd, False)
+        self._buffer = bytearray()
+        self._closing = False
+        self._reading = True
+        self._protocol_paused = False
+        self.set_write_buffer_limits()
+        self._loop.add_reader(self._fd, self._read_ready)
+        self._loop.call_soon(self._protocol.connection_made, self)
+
+    def get_extra_info(self, name, default=None):
+        if name == 'serial':
+            return self.serial
+        return default
+
+    def get_protocol(self):
+        return self._protocol
+
+    def set_protocol(self, protocol):
+        self._protocol = protocol
+
+    def is_closing(self):
+        return self._closing
+
+    def is_reading(self):
+        return self._reading and not self._closing
+
+    def pause_reading(self):
+        '''
+        Stop reading from port (i.e., stop calling ``data_received``) until
+        :meth:`resume_reading` is called.
+        '''
+        if self._reading and not self._closing:
+            self._reading = False
+            self._loop.remove_reader(self._fd)
+
+    def resume_reading(self):
+        if not self._reading and not self._closing:
+            self._reading = True
+            self._loop.add_reader(self._fd, self._read_ready)
+
+    def _read_ready(self):
+        if getattr(self._protocol, 'get_buffer', None) is not None:
+            self._read_ready_buffered()
+            return
+        try:
+            data = os.read(self._fd, READ_SIZE)
+            if not data:
+                raise serial.SerialException('device reports readiness to '
+                                             'read but returned no data '
+                                             '(device disconnected or '
+                                             'multiple access on port?)')
+        except (BlockingIOError, InterruptedError):
+            return
+        except (OSError, serial.SerialException) as exception:
+            # E.g., disconnected USB serial adapter.
+            self._fatal_error(exception)
+            return
+        self._protocol.data_received(data)
+
+    def _read_ready_buffered(self):
+        try:
+            buffer = memoryview(self._protocol.get_buffer(READ_SIZE))
+            if not buffer.nbytes:
+                raise RuntimeError('get_buffer() returned an empty buffer')
+        except Exception as exception:
+            self._fatal_error(exception)
+            return
+        try:
+            with buffer:
+                size = os.readv(self._fd, [buffer])
+            if not size:
+                raise serial.SerialException('device reports readiness to '
+                                             'read but returned no data '
+                                             '(device disconnected or '
+                                             'multiple access on port?)')
+        except (BlockingIOError, InterruptedError):
+            return
+        except (OSError, serial.SerialException) as exception:
+            self._fatal_error(exception)
+            return
+        self._protocol.buffer_updated(size)
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        '''
+        Parameters
+        ----------
+        high : int, optional
+            Size (in bytes) of write buffer at which ``pause_writing()`` is
+            called on protocol.
+
+            Default: :data:`WRITE_BUFFER_HIGH`, or ``4 * low`` if :data:`low`
+            is specified.
+        low : int, optional
+            Size (in bytes) of write buffer at which ``resume_writing()`` is
+            called on protocol.
+
+            Default: ``high // 4``
+        '''
+        if high is None:
+            high = WRITE_BUFFER_HIGH if low is None else 4 * low
+        if low is None:
+            low = high // 4
+        if not high >= low >= 0:
+            raise ValueError('high (%r) must be >= low (%r) must be >= 0' %
+                             (high, low))
+        self._high_water = high
+        self._low_water = low
+        self._maybe_pause_protocol()
+
+    def get_write_buffer_limits(self):
+        return (self._low_water, self._high_water)
+
+    def get_write_buffer_size(self):
+        return len(self._buffer)
+
+    def _maybe_pause_protocol(self):
+        if (len(self._buffer) > self._high_water and
+                not self._protocol_paused):
+            self._protocol_paused = True
+            self._protocol.pause_writing()
+
+    def _maybe_resume_protocol(self):
+        if self._protocol_paused and len(self._buffer) <= self._low_water:
+            self._protocol_paused = False
+            self._protocol.resume_writing()
+
+    def write(self, data):
+        '''
+        Write data to port without blocking.
+
+        Data that cannot be written immediately is buffered and written as
+        soon as the port is writable.  If the buffer grows beyond the high
+        water mark, ``pause_writing()`` is called on the protocol.
+        '''
+        if self._closing:
+            logger.debug('Write to closed port `%s` ignored.',
+                         self.serial.port)
+            return
+        if not data:
+            return
+        if not self._buffer:
+            # Try to write immediately.
+            try:
+                written = os.write(self._fd, data)
+            except (BlockingIOError, InterruptedError):
+                written = 0
+            except OSError as exception:
+                self._fatal_error(exception)
+                return
+            data = data[written:]
+            if not data:
+                return
+            self._loop.add_writer(self._fd, self._write_ready)
+        self._buffer += data
+        self._maybe_pause_protocol()
+
+    def _write_ready(self):
+        try:
+            written = os.write(self._fd, self._buffer)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exception:
+            self._loop.remove_writer(self._fd)
+            del self._buffer[:]
+            self._fatal_error(exception)
+            return
+        del self._buffer[:written]
+        self._maybe_resume_protocol()
+        if not self._buffer:
+            self._loop.remove_writer(self._fd)
+            if self._closing:
+                self._call_connection_lost(None)
+
+    def can_write_eof(self):
+        return False
+
+    def close(self):
+        '''
+        Stop reading, write buffered data, then close port.
+        '''
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        if not self._buffer:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def abort(self):
+        '''
+        Close port immediately, discarding buffered data.
+        '''
+        self._force_close(None)
+
+    def _fatal_error(self, exception):
+        logger.debug('Connection to port `%s` lost: %s', self.serial.port,
+                     exception)
+        self._force_close(exception)
+
+    def _force_close(self, exception):
+        if self._fd is None:
+            return
+        if self._buffer:
+            del self._buffer[:]
+            self._loop.remove_writer(self._fd)
+        if not self._closing:
+            self._closing = True
+            self._loop.remove_reader(self._fd)
+        self._loop.call_soon(self._call_connection_lost, exception)
+
+    def _call_connection_lost(self, exception):
+        if self._fd is None:
+            # Already called.
+            return
+        self._fd = None
+        try:
+            self._protocol.connection_lost(exception)
+        finally:
+            self.serial.close()
+
+
+async def create_serial_connection(protocol_factory, url, **kwargs):
+    '''
+    Open serial port and connect it to a protocol.
+
+    Parameters
+    ----------
+    protocol_factory : callable
+        Function returning an :class:`asyncio.Protocol` instance.
+    url : str
+        Name or URL of serial port (see :func:`serial.serial_for_url`).
+    **kwargs
+        Keyword arguments passed to :func:`serial.serial_for_url`, e.g.,
+        ``baudrate``.
+
+    Returns
+    -------
+    tuple
+        ``(transport, protocol)``
+
+    Raises
+    ------
+    serial.SerialException
+        If port could not be opened.
+    NotImplementedError
+        If port has no file descriptor (e.g., on Windows).
+    '''
+    loop = asyncio.get_running_loop()
+    # Opening a port may block (e.g., while a USB device initializes).
+    serial_instance = await _run(serial.serial_for_url, url, **kwargs)
+    if not supported(serial_instance):
+        serial_instance.close()
+        raise NotImplementedError('Port `%s` has no file descriptor.' % url)
+    protocol = protocol_factory()
+    transport = SerialTransport(loop, protocol, serial_instance)
+    return transport, protocol
+
+
+class EventProtocol(asyncio.Protocol):
+    '''
+    :mod:`asyncio` counterpart of :class:`serial_device.threaded.EventProtocol`.
+
+    Subclasses must implement :meth:`data_received`.
+    '''
+    def __init__(self):
+        self.transport = None
+        self.port = None
+        self.connected = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        # Set while transport write buffer is below high water mark.
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.port = transport.serial.port
+        logger.debug('connection_made: `%s` `%s`', self.port, transport)
+        self.connected.set()
+        self.disconnected.clear()
+
+    def data_received(self, data):
+        raise NotImplementedError
+
+    def connection_lost(self, exception):
+        if isinstance(exception, Exception):
+            logger.debug('Connection to port `%s` lost: %s', self.port,
+                         exception)
+        else:
+            logger.debug('Connection to port `%s` closed', self.port)
+        self.connected.clear()
+        self.disconnected.set()
+        # Do not block writers waiting on a closed transport.
+        self._can_write.set()
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    async def drain(self):
+        '''
+        Wait until transport write buffer is below its low water mark.
+        '''
+        await self._can_write.wait()
+
+
+class KeepAliveConnection(object):
+    '''
+    Keep a serial connection alive (as much as possible).
+
+    :mod:`asyncio` counterpart of :class:`serial_device.threaded
+    .KeepAliveReader`.  If the port is disconnected, reconnect as soon as it
+    becomes available again.
+
+    Parameters
+    ----------
+    protocol_class : type
+        Protocol class, e.g., subclass of :class:`EventProtocol`.
+    comport : str
+        Name of com port to connect to.
+    default_timeout_s : float, optional
+        Default time to wait for serial operation (e.g., connect).
+
+        By default, block (i.e., no time out).
+    backoff : serial_device.reconnect.Backoff, optional
+        Delays between checks for a disconnected port to become available
+        again.  A hotplug event for an added port ends a wait immediately.
+    **kwargs
+        Keyword arguments passed to ``serial_for_url`` function, e.g.,
+        ``baudrate``, etc.
+
+    Attributes
+    ----------
+    stats : serial_device.reconnect.ReconnectStats
+        Reconnection statistics.
+    '''
+    def __init__(self, protocol_class, comport, default_timeout_s=None,
+                 backoff=None, **kwargs):
+        self.protocol_class = protocol_class
+        self.comport = comport
+        self.default_timeout_s = default_timeout_s
+        self.kwargs = kwargs
+        self.protocol = None
+        self.transport = None
+        self.connected = asyncio.Event()
+        self.has_connected = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.close_request = asyncio.Event()
+        # Event to wake the reconnect loop, i.e., when a port is added or a
+        # close is requested.
+        self.port_changed = asyncio.Event()
+        self.backoff = Backoff() if backoff is None else backoff
+        self.stats = ReconnectStats()
+        self.exception = None
+        self._task = None
+        self._loop = None
+
+    @property
+    def alive(self):
+        return not self.closed.is_set()
+
+    def _on_hotplug(self, action, port):
+        # Called from hotplug watcher thread.
+        if action == 'add':
+            self._loop.call_soon_threadsafe(self.port_changed.set)
+
+    async def _port_available(self):
+        # Only check requested port, without opening it (where supported).
+        available = await check_ports([self.comport], probe=False)
+        return bool(available[0])
+
+    async def start(self):
+        '''
+        Start connection task and wait for first connection.
+
+        Raises
+        ------
+        NameError
+            If port is not available.
+        serial.SerialException
+            If port could not be opened.
+        '''
+        if not await self._port_available():
+            df_comports = await comports(check_available=False)
+            raise NameError('Port `%s` not available.  Available ports: `%s`' %
+                            (self.comport, ', '.join(df_comports.index)))
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.ensure_future(self._run())
+        connected = asyncio.ensure_future(self.connected.wait())
+        done, _ = await asyncio.wait([connected, self._task],
+                                     timeout=self.default_timeout_s,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        connected.cancel()
+        if self._task in done and self.exception is not None:
+            raise self.exception
+
+    async def _wait_backoff(self):
+        '''
+        Wait for next backoff delay, a hotplug event, or a close request.
+        '''
+        try:
+            await asyncio.wait_for(self.port_changed.wait(),
+                                   self.backoff.next())
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wait_any(self, *events):
+        '''
+        Wait for any of :data:`events` to be set, or for a close request.
+
+        Note that a transport closed without delivering ``connection_lost``
+        (e.g., closed during ``connection_made``) never sets the protocol
+        events, so the close request must always be waited on as well.
+        '''
+        waiters = [asyncio.ensure_future(event_i.wait())
+                   for event_i in events + (self.close_request, )]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter_i in waiters:
+                waiter_i.cancel()
+
+    async def _run(self):
+        hotplug.subscribe(self._on_hotplug)
+        try:
+            await self._connect_loop()
+        except Exception as exception:
+            self.exception = exception
+        finally:
+            hotplug.unsubscribe(self._on_hotplug)
+            self.connected.clear()
+            if self.transport is not None:
+                self.transport.close()
+                try:
+                    await asyncio.wait_for(self.protocol.disconnected.wait(),
+                                           CLOSE_TIMEOUT_S)
+                except asyncio.TimeoutError:
+                    logger.debug('Timed out waiting for `%s` to close; '
+                                 'aborting', self.comport)
+                    self.transport.abort()
+            self.closed.set()
+
+    async def _connect_loop(self):
+        while not self.close_request.is_set():
+            # Wait for requested serial port to become available.
+            self.port_changed.clear()
+            if not await self._port_available():
+                # Assume serial port was disconnected temporarily.  Wait for a
+                # hotplug event (or check again after backoff delay, in case
+                # an event was missed).
+                await self._wait_backoff()
+                continue
+            try:
+                logger.debug('Open `%s` and monitor connection status',
+                             self.comport)
+                self.transport, self.protocol = \
+                    await create_serial_connection(self.protocol_class,
+                                                   self.comport,
+                                                   **self.kwargs)
+            except serial.SerialException as exception:
+                if not self.has_connected.is_set():
+                    raise
+                # Port may reappear before it is ready to be opened (e.g.,
+                # before `udev` has applied permissions).
+                logger.debug('Error reconnecting to `%s`: %s', self.comport,
+                             exception)
+                self.stats.attempted(False)
+                self.port_changed.clear()
+                await self._wait_backoff()
+                continue
+            await self._wait_any(self.protocol.connected,
+                                 self.protocol.disconnected)
+            if not self.protocol.connected.is_set():
+                if self.close_request.is_set():
+                    break
+                # Transport was closed before connection was established.
+                logger.debug('Connection to `%s` closed while connecting',
+                             self.comport)
+                self.stats.attempted(False)
+                self.transport = None
+                self.port_changed.clear()
+                await self._wait_backoff()
+                continue
+            self.stats.attempted(True)
+            self.backoff.reset()
+            self.connected.set()
+            self.has_connected.set()
+            # Wait for disconnection (or close request).
+            await self._wait_any(self.protocol.disconnected)
+            self.connected.clear()
+            if not self.close_request.is_set():
+                # Loop to try to reconnect to serial device.
+                self.stats.disconnected()
+                self.transport = None
+
+    async def write(self, data, timeout_s=None):
+        '''
+        Write to serial port.
+
+        Waits for serial connection to be established, and for the transport
+        write buffer to drain below its low water mark (i.e., flow control).
+
+        Parameters
+        ----------
+        data : bytes
+            Data to write to serial port.
+        timeout_s : float, optional
+            Maximum number of seconds to wait for serial connection.
+
+            By default, block until serial connection is ready.
+        '''
+        await asyncio.wait_for(self.connected.wait(), timeout_s)
+        self.transport.write(data)
+        await self.protocol.drain()
+
+    async def request(self, response_queue, payload, timeout_s=None):
+        '''
+        Send payload to serial device and wait for response.
+
+        Parameters
+        ----------
+        response_queue : asyncio.Queue
+            Queue to wait for response on (e.g., filled by protocol).
+        payload : bytes
+            Payload to send.
+        timeout_s : float, optional
+            Maximum time to wait (in seconds) for response.
+
+            By default, wait until response is ready.
+
+        Returns
+        -------
+        object
+            Next item from :data:`response_queue`.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If no response is received within :data:`timeout_s`.
+        '''
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self.write(payload, timeout_s=timeout_s)
+        if timeout_s is not None:
+            timeout_s = max(0, timeout_s - (loop.time() - start))
+        return await asyncio.wait_for(response_queue.get(), timeout_s)
+
+    def pause_reading(self):
+        '''
+        Stop reading from port until :meth:`resume_reading` is called (e.g.,
+        while a consumer is falling behind).
+        '''
+        if self.transport is not None:
+            self.transport.pause_reading()
+
+    def resume_reading(self):
+        if self.transport is not None:
+            self.transport.resume_reading()
+
+    async def close(self):
+        '''
+        Close connection and wait for connection task to finish.
+        '''
+        self.close_request.set()
+        self.port_changed.set()
+        if self._task is not None:
+            await self._task
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -0,0 +1,210 @@
+'''
+Receive buffer for protocols parsing frames from a serial stream.
+
+:class:`RingBuffer` holds received data in a preallocated
+:class:`bytearray`.  Parsers inspect buffered data through
+:class:`memoryview` slices (see :meth:`RingBuffer.view` and
+:meth:`RingBuffer.find`) and discard parsed frames with
+:meth:`RingBuffer.consume`, so neither appending nor consuming data copies the
+rest of the buffer.  Unread data is moved to the front of the buffer (in
+place) only when there is no room left after it.
+
+.. versionadded:: 0.11
+'''
+import struct
+
+#: Default initial size (in bytes) of :class:`RingBuffer`.
+BUFFER_SIZE = 65536
+#: Default maximum size (in bytes) of :class:`RingBuffer`.
+MAX_BUFFER_SIZE = 1 << 20
+
+
+class RingBuffer(object):
+    '''
+    Preallocated receive buffer.
+
+    Parameters
+    ----------
+    size : int, optional
+        Initial size (in bytes).
+    max_size : int, optional
+        Maximum number of bytes held.  The buffer grows (up to this size) if
+        more unread data must be held than fits in its current size.
+
+    Attributes
+    ----------
+    compactions : int
+        Number of times unread data was moved to the front of the buffer.
+    resizes : int
+        Number of times the buffer was grown.
+    '''
+    def __init__(self, size=BUFFER_SIZE, max_size=MAX_BUFFER_SIZE):
+        if size > max_size:
+            raise ValueError('Initial size must not exceed maximum size.')
+        self.max_size = max_size
+        self.compactions = 0
+        self.resizes = 0
+        self._data = bytearray(size)
+        # Unread data is `self._data[self._start:self._end]`.
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def capacity(self):
+        '''
+        Current size (in bytes) of the underlying buffer.
+        '''
+        return len(self._data)
+
+    def reserve(self, size):
+        '''
+        Make room for at least :data:`size` bytes after the unread data.
+
+        Parameters
+        ----------
+        size : int
+            Number of bytes to make room for.
+
+        Returns
+        -------
+        memoryview
+            Writable view of free space after unread data (at least
+            :data:`size` bytes).  Call :meth:`commit` with the number of bytes
+            written to the view.
+
+        Raises
+        ------
+        BufferError
+            If the unread data plus :data:`size` bytes would exceed
+            :attr:`max_size`.
+        '''
+        length = len(self)
+        if length + size > self.max_size:
+            raise BufferError('Buffer full (%d bytes buffered, %d bytes '
+                              'maximum).' % (length, self.max_size))
+        if len(self._data) - self._end < size:
+            if length + size <= len(self._data):
+                # Move unread data to front of buffer.
+                view = memoryview(self._data)
+                view[:length] = view[self._start:self._end]
+                view.release()
+                self.compactions += 1
+            else:
+                # Grow buffer.  Allocate a new buffer (rather than resizing
+                # in place), so views previously returned stay valid.
+                data = bytearray(min(self.max_size,
+                                     max(length + size, 2 * len(self._data))))
+                data[:length] = memoryview(self._data)[self._start:self._end]
+                self._data = data
+                self.resizes += 1
+            self._start = 0
+            self._end = length
+        return memoryview(self._data)[self._end:]
+
+    def commit(self, size):
+        '''
+        Add :data:`size` bytes written to the view returned by
+        :meth:`reserve` to the unread data.
+        '''
+        if size > len(self._data) - self._end:
+            raise ValueError('Cannot commit more bytes than were reserved.')
+        self._end += size
+
+    def write(self, data):
+        '''
+        Append data.
+
+        Raises
+        ------
+        BufferError
+            If the buffer would exceed :attr:`max_size`.
+        '''
+        size = len(data)
+        self.reserve(size)
+        self._data[self._end:self._end + size] = data
+        self._end += size
+
+    def view(self, start=0, stop=None):
+        '''
+        Returns
+        -------
+        memoryview
+            Read-only view of unread data (from :data:`start` to
+            :data:`stop`, relative to the first unread byte).
+
+            Only valid until the next :meth:`write` or :meth:`reserve`.
+        '''
+        length = len(self)
+        stop = length if stop is None else min(stop, length)
+        return (memoryview(self._data)[self._start + start:self._start + stop]
+                .toreadonly())
+
+    def find(self, sub, start=0):
+        '''
+        Returns
+        -------
+        int
+            Index (relative to the first unread byte) of the first occurrence
+            of :data:`sub` in unread data at or after :data:`start`, or ``-1``
+            if not found.
+        '''
+        index = self._data.find(sub, self._start + start, self._end)
+        return index if index < 0 else index - self._start
+
+    def unpack_from(self, struct_, offset=0):
+        '''
+        Unpack fields from unread data (without copying).
+
+        Parameters
+        ----------
+        struct_ : struct.Struct
+            Format of fields.
+        offset : int, optional
+            Offset (relative to the first unread byte) of fields.
+
+        Returns
+        -------
+        tuple
+            Unpacked fields.
+
+        Raises
+        ------
+        struct.error
+            If fewer than ``struct_.size`` bytes are buffered after
+            :data:`offset`.
+        '''
+        if offset + struct_.size > len(self):
+            raise struct.error('unpack_from requires a buffer of at least %d '
+                               'bytes' % (offset + struct_.size))
+        return struct_.unpack_from(self._data, self._start + offset)
+
+    def consume(self, size):
+        '''
+        Discard first :data:`size` bytes of unread data.
+        '''
+        self._start = min(self._start + size, self._end)
+        if self._start == self._end:
+            # Empty.  Start again from front of buffer (no copy needed).
+            self._start = self._end = 0
+
+    def read(self, size=None):
+        '''
+        Returns
+        -------
+        bytes
+            Copy of first :data:`size` bytes of unread data (or all unread
+            data), which are then discarded.
+        '''
+        stop = len(self) if size is None else min(size, len(self))
+        data = self._data[self._start:self._start + stop]
+        self.consume(stop)
+        return bytes(data)
+
+    def clear(self):
+        '''
+        Discard all unread data.
+        '''
+        self._start = self._end = 0
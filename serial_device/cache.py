@@ -0,0 +1,101 @@
+'''
+Time-to-live cache for serial port enumeration results.
+
+.. versionadded:: 0.11
+'''
+import os
+import sys
+import threading
+import time
+
+
+class TTLCache(object):
+    '''
+    Thread-safe cache of values computed on demand.
+
+    Each value is kept for at most :attr:`ttl_s` seconds.  All values are
+    discarded whenever :meth:`invalidate` is called or the modification time
+    of any of the :attr:`watch_paths` changes (e.g., a device node is added to
+    or removed from ``/dev``).
+
+    Parameters
+    ----------
+    ttl_s : float, optional
+        Maximum age (in seconds) of cached values.
+
+        If ``None``, values only expire on invalidation.  If ``0``, caching is
+        disabled.
+    watch_paths : list, optional
+        Paths to check for changes on each lookup.
+    '''
+    def __init__(self, ttl_s=1., watch_paths=None):
+        self.ttl_s = ttl_s
+        self.watch_paths = list(watch_paths or [])
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._signature = None
+        # Incremented on each invalidation to discard values computed
+        # concurrently with the invalidation.
+        self._generation = 0
+
+    def _watch_signature(self):
+        signature = []
+        for path_i in self.watch_paths:
+            try:
+                stat_i = os.stat(path_i)
+                signature.append((stat_i.st_ino, stat_i.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get(self, key, factory):
+        '''
+        Parameters
+        ----------
+        key : hashable
+            Cache key.
+        factory : callable
+            Function to compute value if no valid value is cached.
+
+        Returns
+        -------
+        object
+            Cached value, or value returned by :data:`factory`.
+        '''
+        if self.ttl_s == 0:
+            return factory()
+        now = time.monotonic()
+        signature = self._watch_signature() if self.watch_paths else None
+        with self._lock:
+            if signature != self._signature:
+                self._signature = signature
+                self._entries.clear()
+                self._generation += 1
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl_s is None or
+                                      now - entry[0] < self.ttl_s):
+                return entry[1]
+            generation = self._generation
+        value = factory()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now, value)
+        return value
+
+    def invalidate(self):
+        '''
+        Discard all cached values.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+#: Shared cache of serial port enumeration results.
+#:
+#: Set ``ENUMERATION_CACHE.ttl_s`` to change the maximum age (in seconds) of
+#: cached results, or to ``0`` to disable caching.  On Linux, cached results
+#: are also discarded whenever ``/dev`` or ``/sys/class/tty`` changes.
+ENUMERATION_CACHE = TTLCache(ttl_s=1.,
+                             watch_paths=['/dev', '/sys/class/tty']
+                             if sys.platform.startswith('linux') else None)
@@ -0,0 +1,588 @@
+'''
+Protocols splitting a serial stream into frames.
+
+Each protocol is a :class:`serial_device.threaded.BufferedEventProtocol`, so
+received data is collected in a preallocated buffer, and frame boundaries are
+found using :meth:`bytes.find` (or by reading a length header), rather than by
+looping over each byte in Python.
+
+Complete frames are passed to :meth:`FramedProtocol.frame_received`, which
+calls the ``frame_callback`` (if specified) or puts the frame in the
+``frames`` queue.  Protocols are created without arguments by
+:class:`serial_device.threaded.KeepAliveReader`, so bind options using
+:func:`functools.partial`, e.g.::
+
+    frames = queue.Queue()
+    protocol_class = functools.partial(SLIPProtocol, frame_queue=frames)
+
+    with KeepAliveReader(protocol_class, 'COM3') as reader:
+        reader.write(slip_encode(b'ping'))
+        frames.get(timeout=1)
+
+Use :func:`cobs_encode` and :func:`slip_encode` to encode frames for writing.
+
+:class:`IdleGapProtocol` instead ends each frame after a period of silence on
+the line (e.g., Modbus RTU).
+
+.. versionadded:: 0.11
+'''
+import logging
+import queue
+import struct
+import threading
+import time
+
+import serial
+
+from .threaded import BufferedEventProtocol
+
+logger = logging.getLogger(__name__)
+
+
+class FramedProtocol(BufferedEventProtocol):
+    '''
+    Base class for protocols splitting received data into frames.
+
+    Subclasses must implement :meth:`split`, and may implement
+    :meth:`decode`.
+
+    Parameters
+    ----------
+    frame_callback : callable, optional
+        Function called with each frame (from the reader thread).
+    frame_queue : queue.Queue, optional
+        Queue to put each frame in.
+
+        By default (if no :data:`frame_callback` is specified), frames are put
+        in a new queue.
+
+    Attributes
+    ----------
+    frames : queue.Queue
+        Queue of received frames (if no :data:`frame_callback` is specified).
+    frame_count : int
+        Number of frames received.
+    frame_errors : int
+        Number of invalid frames discarded.
+    '''
+    def __init__(self, frame_callback=None, frame_queue=None):
+        super(FramedProtocol, self).__init__()
+        self.frame_callback = frame_callback
+        self.frames = (queue.Queue() if frame_queue is None and
+                       frame_callback is None else frame_queue)
+        self.frame_count = 0
+        self.frame_errors = 0
+
+    def parse(self, buffer):
+        self._deliver(self.split(buffer))
+
+    def _deliver(self, frames):
+        if not frames:
+            return
+        decode = self.decode
+        frame_received = self.frame_received
+        for frame_i in frames:
+            try:
+                frame_i = decode(frame_i)
+            except ValueError as exception:
+                self._frame_error(exception)
+                continue
+            self.frame_count += 1
+            frame_received(frame_i)
+
+    def _frame_error(self, exception):
+        self.frame_errors += 1
+        logger.debug('Discarding invalid frame from port `%s`: %s',
+                     self.port, exception)
+
+    def split(self, buffer):
+        '''
+        Consume all complete frames from buffer.
+
+        Parameters
+        ----------
+        buffer : serial_device.buffer.RingBuffer
+            Receive buffer.
+
+        Returns
+        -------
+        list(bytes)
+            Complete (encoded) frames.
+        '''
+        raise NotImplementedError
+
+    def decode(self, frame):
+        '''
+        Returns
+        -------
+        bytes
+            Decoded frame.
+
+        Raises
+        ------
+        ValueError
+            If frame is invalid.
+        '''
+        return frame
+
+    def frame_received(self, frame):
+        '''
+        Called with each complete frame.
+        '''
+        if self.frame_callback is not None:
+            self.frame_callback(frame)
+        if self.frames is not None:
+            self.frames.put(frame)
+
+
+class DelimiterProtocol(FramedProtocol):
+    '''
+    Frames terminated by a delimiter.
+
+    Parameters
+    ----------
+    delimiter : bytes, optional
+        Frame terminator (not included in frames).
+    skip_empty : bool, optional
+        If ``True``, discard empty frames.
+    **kwargs
+        See :class:`FramedProtocol`.
+    '''
+    delimiter = b'\n'
+
+    def __init__(self, delimiter=None, skip_empty=False, **kwargs):
+        super(DelimiterProtocol, self).__init__(**kwargs)
+        if delimiter is not None:
+            self.delimiter = delimiter
+        if not self.delimiter:
+            raise ValueError('Delimiter must not be empty.')
+        self.skip_empty = skip_empty
+        # Number of buffered bytes already searched for the delimiter.
+        self._searched = 0
+
+    def _overflow(self):
+        super(DelimiterProtocol, self)._overflow()
+        # Buffered data was discarded, so search from the start again.
+        self._searched = 0
+
+    def split(self, buffer):
+        delimiter = self.delimiter
+        # Find end of each complete frame, then copy all complete frames at
+        # once.
+        ends = []
+        index = buffer.find(delimiter, self._searched)
+        while index >= 0:
+            ends.append(index)
+            index = buffer.find(delimiter, index + len(delimiter))
+        if not ends:
+            # Only search new data next time (allowing for a delimiter split
+            # between reads).
+            self._searched = max(0, len(buffer) - len(delimiter) + 1)
+            return []
+        self._searched = 0
+        data = buffer.read(ends[-1] + len(delimiter))
+        start = 0
+        frames = []
+        for end_i in ends:
+            if end_i > start or not self.skip_empty:
+                frames.append(data[start:end_i])
+            start = end_i + len(delimiter)
+        return frames
+
+
+class LineProtocol(DelimiterProtocol):
+    '''
+    Lines terminated by ``\\n`` (a trailing ``\\r`` is removed).
+
+    Parameters
+    ----------
+    **kwargs
+        See :class:`DelimiterProtocol`.
+    '''
+    def decode(self, frame):
+        return frame[:-1] if frame.endswith(b'\r') else frame
+
+
+class FixedLengthProtocol(FramedProtocol):
+    '''
+    Frames of a fixed number of bytes.
+
+    Parameters
+    ----------
+    frame_size : int
+        Number of bytes in each frame.
+    **kwargs
+        See :class:`FramedProtocol`.
+    '''
+    def __init__(self, frame_size, **kwargs):
+        super(FixedLengthProtocol, self).__init__(**kwargs)
+        if frame_size < 1:
+            raise ValueError('Frame size must be positive.')
+        self.frame_size = frame_size
+
+    def split(self, buffer):
+        size = self.frame_size
+        data = buffer.read(len(buffer) - len(buffer) % size)
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class LengthPrefixedProtocol(FramedProtocol):
+    '''
+    Frames preceded by a length header.
+
+    Parameters
+    ----------
+    header_format : str, optional
+        :mod:`struct` format of header, e.g., ``'<H'`` for a little-endian
+        16-bit length.  The **last** field of the header is the length.
+    length_includes_header : bool, optional
+        If ``True``, the length includes the header itself.
+    include_header : bool, optional
+        If ``True``, frames include the header.
+    max_frame_size : int, optional
+        Maximum length of a frame.  Larger lengths are treated as a framing
+        error, and all buffered data is discarded (i.e., the protocol
+        resynchronizes at the next read).
+
+        Default: :attr:`max_buffer_size`
+    **kwargs
+        See :class:`FramedProtocol`.
+    '''
+    def __init__(self, header_format='<H', length_includes_header=False,
+                 include_header=False, max_frame_size=None, **kwargs):
+        super(LengthPrefixedProtocol, self).__init__(**kwargs)
+        self.header = struct.Struct(header_format)
+        self.length_includes_header = length_includes_header
+        self.include_header = include_header
+        self.max_frame_size = (self.max_buffer_size if max_frame_size is None
+                               else max_frame_size)
+
+    def split(self, buffer):
+        header = self.header
+        # Read headers in place to find end of each complete frame, then copy
+        # all complete frames at once.
+        bounds = []
+        end = 0
+        available = len(buffer)
+        while available - end >= header.size:
+            length = buffer.unpack_from(header, end)[-1]
+            frame_size = (length if self.length_includes_header else
+                          header.size + length)
+            if frame_size < header.size or frame_size > self.max_frame_size:
+                frames = self._frames(buffer, bounds, end)
+                buffer.clear()
+                self._frame_error(ValueError('Invalid frame length: %d' %
+                                             length))
+                return frames
+            if available - end < frame_size:
+                break
+            bounds.append((end if self.include_header else end + header.size,
+                           end + frame_size))
+            end += frame_size
+        return self._frames(buffer, bounds, end)
+
+    def _frames(self, buffer, bounds, end):
+        data = buffer.read(end)
+        return [data[start_i:end_i] for start_i, end_i in bounds]
+
+
+def cobs_encode(data):
+    '''
+    Encode data using Consistent Overhead Byte Stuffing (COBS).
+
+    Parameters
+    ----------
+    data : bytes
+        Data to encode.
+
+    Returns
+    -------
+    bytes
+        Encoded data (without ``\\0`` frame delimiter).
+    '''
+    output = bytearray()
+    for block_i in bytes(data).split(b'\0'):
+        start = 0
+        # Runs of 254 non-zero bytes are written with code 255 (i.e., not
+        # followed by a zero).
+        while len(block_i) - start >= 254:
+            output.append(255)
+            output += block_i[start:start + 254]
+            start += 254
+        output.append(len(block_i) - start + 1)
+        output += block_i[start:]
+    return bytes(output)
+
+
+def cobs_decode(data):
+    '''
+    Decode data encoded using Consistent Overhead Byte Stuffing (COBS).
+
+    Parameters
+    ----------
+    data : bytes
+        Encoded data (without ``\\0`` frame delimiter).
+
+    Returns
+    -------
+    bytes
+        Decoded data.
+
+    Raises
+    ------
+    ValueError
+        If data is not valid COBS.
+    '''
+    output = bytearray()
+    index = 0
+    size = len(data)
+    while index < size:
+        code = data[index]
+        if not code:
+            raise ValueError('Unexpected zero byte in COBS data.')
+        end = index + code
+        if end > size:
+            raise ValueError('COBS block exceeds end of data.')
+        output += data[index + 1:end]
+        if code < 255 and end < size:
+            output.append(0)
+        index = end
+    return bytes(output)
+
+
+class COBSProtocol(DelimiterProtocol):
+    '''
+    Frames encoded using Consistent Overhead Byte Stuffing (COBS), each
+    terminated by a zero byte.
+
+    Empty frames are discarded.  Frames are decoded one block at a time
+    (i.e., one step per run of non-zero bytes, rather than per byte).
+
+    Parameters
+    ----------
+    **kwargs
+        See :class:`FramedProtocol`.
+    '''
+    def __init__(self, **kwargs):
+        super(COBSProtocol, self).__init__(delimiter=b'\0', skip_empty=True,
+                                           **kwargs)
+
+    def decode(self, frame):
+        return cobs_decode(frame)
+
+
+#: SLIP frame delimiter.
+SLIP_END = b'\xc0'
+#: SLIP escape byte.
+SLIP_ESC = b'\xdb'
+#: Escaped :data:`SLIP_END`.
+SLIP_ESC_END = b'\xdb\xdc'
+#: Escaped :data:`SLIP_ESC`.
+SLIP_ESC_ESC = b'\xdb\xdd'
+
+
+def slip_encode(data):
+    '''
+    Encode a frame using SLIP (`RFC 1055`_).
+
+    .. _`RFC 1055`: https://tools.ietf.org/html/rfc1055
+
+    Returns
+    -------
+    bytes
+        Encoded frame, including leading and trailing :data:`SLIP_END`.
+    '''
+    return (SLIP_END + bytes(data).replace(SLIP_ESC, SLIP_ESC_ESC)
+            .replace(SLIP_END, SLIP_ESC_END) + SLIP_END)
+
+
+def slip_decode(data):
+    '''
+    Decode a SLIP frame (without :data:`SLIP_END` delimiters).
+
+    Raises
+    ------
+    ValueError
+        If frame contains an invalid escape sequence.
+    '''
+    # Every escape byte in a valid frame starts an escape sequence, so
+    # sequences can be replaced one kind at a time.
+    decoded = data.replace(SLIP_ESC_END, SLIP_END)
+    if decoded.count(SLIP_ESC) != decoded.count(SLIP_ESC_ESC):
+        raise ValueError('Invalid SLIP escape sequence.')
+    return decoded.replace(SLIP_ESC_ESC, SLIP_ESC)
+
+
+class SLIPProtocol(DelimiterProtocol):
+    '''
+    Frames encoded using SLIP (`RFC 1055`_).
+
+    .. _`RFC 1055`: https://tools.ietf.org/html/rfc1055
+
+    Empty frames (e.g., between back-to-back :data:`SLIP_END` bytes) are
+    discarded.
+
+    Parameters
+    ----------
+    **kwargs
+        See :class:`FramedProtocol`.
+    '''
+    def __init__(self, **kwargs):
+        super(SLIPProtocol, self).__init__(delimiter=SLIP_END,
+                                           skip_empty=True, **kwargs)
+
+    def decode(self, frame):
+        return slip_decode(frame)
+
+
+#: Default idle gap (in characters) ending a frame, i.e., 3.5 characters as
+#: in Modbus RTU.
+IDLE_GAP_CHARS = 3.5
+#: Default minimum idle gap (in seconds), i.e., 1.75 ms as recommended in
+#: Modbus RTU for baud rates above 19200.
+MIN_IDLE_GAP_S = 1.75e-3
+
+
+def idle_gap_s(serial_instance, gap_chars=IDLE_GAP_CHARS,
+               min_gap_s=MIN_IDLE_GAP_S):
+    '''
+    Parameters
+    ----------
+    serial_instance : serial.Serial
+        Serial port (its baud rate, byte size, parity and stop bits are used to
+        compute the time to send a character).
+    gap_chars : float, optional
+        Idle gap (in characters).
+    min_gap_s : float, optional
+        Minimum idle gap (in seconds).
+
+    Returns
+    -------
+    float
+        Idle gap (in seconds) ending a frame.
+    '''
+    bits = (1 + serial_instance.bytesize + serial_instance.stopbits +
+            (serial_instance.parity != serial.PARITY_NONE))
+    return max(min_gap_s, gap_chars * bits / serial_instance.baudrate)
+
+
+class IdleGapProtocol(FramedProtocol):
+    '''
+    Frames delimited by silence on the line.
+
+    Each received chunk is timestamped (using :func:`time.perf_counter_ns`).
+    A frame ends once no data has been received for :attr:`gap_s` seconds:
+    either when the next chunk arrives after the gap, or when a watcher
+    thread (waiting on a :class:`threading.Condition` with a timeout, i.e.,
+    without spinning) wakes at the end of the gap.  All frames are delivered
+    (in order) from the watcher thread, so the frame callback is only ever
+    called from one thread.
+
+    Note that chunks are timestamped when read, so the gap cannot be measured
+    more accurately than the port driver delivers data (e.g., the latency
+    timer of USB serial adapters).  Data not yet ended by a gap when the
+    connection is lost is discarded.
+
+    Data is always passed to
+    :meth:`~serial_device.threaded.BufferedEventProtocol.data_received`,
+    even if served by a :class:`serial_device.selector.SelectorTransport`.
+
+    Parameters
+    ----------
+    gap_s : float, optional
+        Idle gap (in seconds) ending a frame.
+
+        By default, computed from the port settings when connected (see
+        :func:`idle_gap_s`).
+    gap_chars : float, optional
+        Idle gap (in characters), if :data:`gap_s` is not specified.
+    min_gap_s : float, optional
+        Minimum idle gap (in seconds), if :data:`gap_s` is not specified.
+    **kwargs
+        See :class:`FramedProtocol`.
+
+    Attributes
+    ----------
+    last_close_delay_ns : int
+        Time (in nanoseconds) between the end of the gap and when the watcher
+        thread ended the last frame.
+    '''
+    # Read chunks with `data_received` (i.e., not into buffer from selector
+    # thread), so each chunk is timestamped under lock.
+    get_buffer = None
+
+    def __init__(self, gap_s=None, gap_chars=IDLE_GAP_CHARS,
+                 min_gap_s=MIN_IDLE_GAP_S, **kwargs):
+        super(IdleGapProtocol, self).__init__(**kwargs)
+        self.gap_s = gap_s
+        self.gap_chars = gap_chars
+        self.min_gap_s = min_gap_s
+        self.last_close_delay_ns = None
+        # Time (see `time.perf_counter_ns()`) last chunk was received.
+        self._last_ns = None
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        # Frames ended by `data_received`, to be delivered by watcher thread.
+        self._closed_frames = []
+
+    def connection_made(self, transport):
+        super(IdleGapProtocol, self).connection_made(transport)
+        if self.gap_s is None:
+            self.gap_s = idle_gap_s(transport.serial, self.gap_chars,
+                                    self.min_gap_s)
+        self._stopped = False
+        self._closed_frames = []
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def connection_lost(self, exception):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        super(IdleGapProtocol, self).connection_lost(exception)
+
+    def data_received(self, data):
+        now = time.perf_counter_ns()
+        with self._condition:
+            if (len(self.buffer) and
+                    now - self._last_ns >= self.gap_s * 1e9):
+                # Gap elapsed before watcher thread ended frame.
+                self._closed_frames.append(self.buffer.read())
+            super(IdleGapProtocol, self).data_received(data)
+            self._last_ns = now
+            self._condition.notify()
+
+    def split(self, buffer):
+        # Frames are only ended by an idle gap.
+        return []
+
+    def _run(self):
+        gap_ns = int(self.gap_s * 1e9)
+        with self._condition:
+            while True:
+                if self._closed_frames:
+                    frames = self._closed_frames
+                    self._closed_frames = []
+                elif self._stopped:
+                    break
+                elif not len(self.buffer):
+                    self._condition.wait()
+                    continue
+                else:
+                    remaining_ns = (self._last_ns + gap_ns -
+                                    time.perf_counter_ns())
+                    if remaining_ns > 0:
+                        self._condition.wait(remaining_ns * 1e-9)
+                        continue
+                    self.last_close_delay_ns = -remaining_ns
+                    frames = [self.buffer.read()]
+                self._condition.release()
+                try:
+                    self._deliver(frames)
+                except Exception:
+                    logger.exception('Error handling frame from port `%s`.',
+                                     self.port)
+                finally:
+                    self._condition.acquire()
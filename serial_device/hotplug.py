@@ -0,0 +1,391 @@
+'''
+Serial port hotplug notifications.
+
+A :class:`HotplugWatcher` thread listens for serial ports being added or
+removed and calls subscribed callbacks with ``(action, port)``, where
+``action`` is either ``'add'`` or ``'remove'`` and ``port`` is the device path
+(e.g., ``'/dev/ttyUSB0'``).
+
+The following backends are supported:
+
+ - ``'netlink'``: kernel/``udev`` uevents (Linux).  If ``udev`` is running,
+   events are received *after* ``udev`` has finished processing the device
+   (e.g., applied permissions and created ``/dev/serial/by-id`` links).
+ - ``'inotify'``: changes to ``/dev`` (Linux).  Unlike uevents, which are only
+   delivered to the initial network namespace, this also works in most
+   containers.
+ - ``'poll'``: periodically compare the list of serial ports (all platforms).
+
+On Linux, the ``'netlink'`` and ``'inotify'`` backends are used together by
+default, so the same change may be reported more than once (``inotify`` also
+reports the permission change that follows creation of a device node).
+Callbacks should therefore be idempotent.
+
+Use :func:`subscribe` and :func:`unsubscribe` to share a single watcher
+thread, which is started for the first subscriber and stopped once the last
+subscriber unsubscribes.
+
+.. versionadded:: 0.11
+'''
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import select
+import socket
+import struct
+import sys
+import threading
+
+from .cache import ENUMERATION_CACHE
+from .ports import list_ports_fast
+from .sysfs import FAMILIES
+from .usage import USAGE_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+#: Default interval (in seconds) between checks of ``'poll'`` backend.
+POLL_INTERVAL_S = 1.
+
+NETLINK_KOBJECT_UEVENT = 15
+# Netlink multicast groups of kernel and `udev` uevents, respectively.
+UEVENT_GROUP_KERNEL = 1
+UEVENT_GROUP_UDEV = 2
+UDEV_CONTROL_PATH = '/run/udev/control'
+
+IN_ATTRIB = 0x4
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+INOTIFY_EVENT = struct.Struct('=iIII')
+
+# Match serial port device names in `/dev`.
+CRE_PORT_NAME = re.compile(r'^(%s)\d+$' % '|'.join(map(re.escape, FAMILIES)))
+
+
+def _parse_uevent(data):
+    '''
+    Parameters
+    ----------
+    data : bytes
+        Kernel or ``udev`` uevent netlink message.
+
+    Returns
+    -------
+    dict
+        Uevent properties, e.g., ``ACTION``, ``SUBSYSTEM``, ``DEVNAME``.
+    '''
+    if data.startswith(b'libudev\0'):
+        # `udev` message: header followed by properties.
+        properties_off, properties_len = struct.unpack_from('=II', data, 16)
+        data = data[properties_off:properties_off + properties_len]
+    else:
+        # Kernel message: `<action>@<devpath>` followed by properties.
+        data = data.partition(b'\0')[2]
+    properties = {}
+    for item_i in data.split(b'\0'):
+        key, sep, value = item_i.partition(b'=')
+        if sep:
+            properties[key.decode('ascii', 'replace')] = \
+                value.decode('utf8', 'replace')
+    return properties
+
+
+class HotplugWatcher(threading.Thread):
+    '''
+    Thread to notify subscribers when serial ports are added or removed.
+
+    Parameters
+    ----------
+    backend : str, optional
+        One of ``'netlink'``, ``'inotify'``, ``'netlink+inotify'``, or
+        ``'poll'``.
+
+        By default, use ``'netlink+inotify'`` on Linux (or whichever of the two
+        is supported), and ``'poll'`` otherwise.
+    poll_interval_s : float, optional
+        Interval (in seconds) between checks of ``'poll'`` backend.
+    '''
+    def __init__(self, backend=None, poll_interval_s=POLL_INTERVAL_S):
+        super(HotplugWatcher, self).__init__()
+        self.daemon = True
+        self.backend = backend
+        self.poll_interval_s = poll_interval_s
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop_request = threading.Event()
+        # Pipe to wake the thread from `select()` when a stop is requested.
+        self._stop_read, self._stop_write = os.pipe()
+        self.stopped = threading.Event()
+
+    def subscribe(self, callback):
+        '''
+        Parameters
+        ----------
+        callback : callable
+            Function to call as ``callback(action, port)`` for each event.
+
+        Returns
+        -------
+        callable
+            :data:`callback` (e.g., to pass to :meth:`unsubscribe`).
+        '''
+        with self._lock:
+            self._callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        '''
+        Returns
+        -------
+        int
+            Number of remaining subscribers.
+        '''
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+            return len(self._callbacks)
+
+    def _emit(self, action, port):
+        logger.debug('Hotplug event: `%s` `%s`', action, port)
+        # Discard cached enumeration and usage results.
+        ENUMERATION_CACHE.invalidate()
+        USAGE_CACHE.invalidate()
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback_i in callbacks:
+            try:
+                callback_i(action, port)
+            except Exception:
+                logger.exception('Error in hotplug callback `%s`', callback_i)
+
+    def _open_netlink(self):
+        group = (UEVENT_GROUP_UDEV if os.path.exists(UDEV_CONTROL_PATH)
+                 else UEVENT_GROUP_KERNEL)
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                             NETLINK_KOBJECT_UEVENT)
+        try:
+            sock.bind((0, group))
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _open_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = IN_CREATE | IN_DELETE | IN_ATTRIB | IN_MOVED_TO | IN_MOVED_FROM
+        if libc.inotify_add_watch(fd, b'/dev', mask) < 0:
+            errno_ = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno_, 'inotify_add_watch failed')
+        return fd
+
+    def _open_sources(self):
+        '''
+        Returns
+        -------
+        dict
+            Mapping from file descriptor of each opened event source to a
+            ``(read, close)`` pair of functions.
+        '''
+        if self.backend is None:
+            backends = (['netlink', 'inotify']
+                        if sys.platform.startswith('linux') else [])
+        else:
+            backends = [backend_i for backend_i in self.backend.split('+')
+                        if backend_i != 'poll']
+        sources = {}
+        opened = []
+        for backend_i in backends:
+            try:
+                if backend_i == 'netlink':
+                    sock = self._open_netlink()
+                    sources[sock.fileno()] = (lambda sock=sock:
+                                              self._read_netlink(sock),
+                                              sock.close)
+                elif backend_i == 'inotify':
+                    fd = self._open_inotify()
+                    sources[fd] = (lambda fd=fd: self._read_inotify(fd),
+                                   lambda fd=fd: os.close(fd))
+                else:
+                    raise ValueError('Unknown backend: `%s`' % backend_i)
+                opened.append(backend_i)
+            except (OSError, AttributeError) as exception:
+                logger.debug('Hotplug backend `%s` not available: %s',
+                             backend_i, exception)
+        self.backend = '+'.join(opened) if opened else 'poll'
+        return sources
+
+    def run(self):
+        try:
+            if self._stop_request.is_set():
+                # Stopped before started.
+                return
+            sources = self._open_sources()
+            logger.debug('Using hotplug backend: `%s`', self.backend)
+            if not sources:
+                self._run_poll()
+                return
+            try:
+                while True:
+                    readable, _, _ = select.select(list(sources) +
+                                                   [self._stop_read], [], [])
+                    if self._stop_read in readable:
+                        break
+                    for fd_i in readable:
+                        sources[fd_i][0]()
+            finally:
+                for _, close_i in sources.values():
+                    close_i()
+        finally:
+            if self._stop_request.is_set():
+                # Stopped from a callback (i.e., from this thread), so
+                # `stop()` could not wait for the thread to close the pipe.
+                self._close_pipe()
+            self.stopped.set()
+
+    def _read_netlink(self, sock):
+        try:
+            data = sock.recv(65536)
+        except OSError as exception:
+            # E.g., `ENOBUFS` if events were dropped.
+            logger.debug('Error receiving uevent: %s', exception)
+            return
+        properties = _parse_uevent(data)
+        action = properties.get('ACTION')
+        devname = properties.get('DEVNAME')
+        if (properties.get('SUBSYSTEM') != 'tty' or not devname or
+                action not in ('add', 'remove')):
+            return
+        if not devname.startswith('/dev/'):
+            devname = '/dev/' + devname
+        self._emit(action, devname)
+
+    def _read_inotify(self, fd):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = (data[offset:offset + length].rstrip(b'\0')
+                    .decode('utf8', 'replace'))
+            offset += length
+            if not CRE_PORT_NAME.match(name):
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO | IN_ATTRIB):
+                self._emit('add', '/dev/' + name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._emit('remove', '/dev/' + name)
+
+    def _run_poll(self):
+        ports = set(port_i.port for port_i in list_ports_fast(use_cache=False))
+        while not self._stop_request.wait(self.poll_interval_s):
+            ports_i = set(port_i.port
+                          for port_i in list_ports_fast(use_cache=False))
+            for port_j in sorted(ports - ports_i):
+                self._emit('remove', port_j)
+            for port_j in sorted(ports_i - ports):
+                self._emit('add', port_j)
+            ports = ports_i
+
+    def stop(self):
+        '''
+        Stop thread and close its wake-up pipe.
+
+        Waits for the thread to stop, unless called from the thread itself
+        (e.g., from a callback).
+        '''
+        self._stop_request.set()
+        with self._lock:
+            if self._stop_write is not None:
+                os.write(self._stop_write, b'\0')
+        if self.ident is not None and self is not threading.current_thread():
+            self.join()
+        if self is not threading.current_thread():
+            self._close_pipe()
+
+    def _close_pipe(self):
+        with self._lock:
+            if self._stop_write is not None:
+                os.close(self._stop_read)
+                os.close(self._stop_write)
+                self._stop_read = self._stop_write = None
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher():
+    '''
+    Returns
+    -------
+    HotplugWatcher
+        Shared hotplug watcher, started on first call.
+
+        Prefer :func:`subscribe`, so the watcher is stopped once it has no
+        subscribers; otherwise, call ``stop()`` on the watcher when done.
+    '''
+    with _watcher_lock:
+        return _get_watcher()
+
+
+def _get_watcher():
+    # Must be called with `_watcher_lock` held.
+    global _watcher
+
+    if _watcher is None or _watcher.stopped.is_set():
+        _watcher = HotplugWatcher()
+        _watcher.start()
+    return _watcher
+
+
+def subscribe(callback):
+    '''
+    Subscribe to shared hotplug watcher, starting it if necessary.
+
+    Parameters
+    ----------
+    callback : callable
+        Function to call as ``callback(action, port)`` for each event.
+
+    Returns
+    -------
+    callable
+        :data:`callback` (e.g., to pass to :func:`unsubscribe`).
+    '''
+    with _watcher_lock:
+        return _get_watcher().subscribe(callback)
+
+
+def unsubscribe(callback):
+    '''
+    Unsubscribe from shared hotplug watcher, and stop it once it has no
+    subscribers (e.g., so the ``'poll'`` backend stops enumerating ports).
+
+    Parameters
+    ----------
+    callback : callable
+        Function passed to :func:`subscribe`.
+    '''
+    global _watcher
+
+    with _watcher_lock:
+        watcher = _watcher
+        if watcher is None or watcher.unsubscribe(callback):
+            return
+        _watcher = None
+    # Stop outside of lock, since a callback running on the watcher thread
+    # may be waiting for the lock (e.g., in `subscribe()`).
+    watcher.stop()
@@ -1,16 +1,22 @@
 import json
 import logging
 import re
+import threading
 
 import paho_mqtt_helpers as pmh
 import serial
 import serial.threaded
 
-from . import comports as _comports
+from . import check_ports, list_ports_fast
+from . import hotplug
+from . import selector
 
 
 logger = logging.getLogger(__name__)
 
+#: Time (in seconds) without hotplug events to wait before refreshing ports
+#: (a single plug typically causes several events).
+HOTPLUG_DEBOUNCE_S = .25
 
 # Regular expression to match the following topics the manager listens for:
 #
@@ -34,14 +40,42 @@ CRE_CLIENT = re.compile(r'^serial_device'
 
 
 class SerialDeviceManager(pmh.BaseMqttReactor):
+    '''
+    .. versionchanged:: 0.11
+        Add :data:`use_selector` keyword argument.
+
+    Parameters
+    ----------
+    use_selector : bool, optional
+        If ``True``, serve reads for all open ports from the shared selector
+        thread (see :mod:`serial_device.selector`), rather than starting a
+        :class:`serial.threaded.ReaderThread` per port.
+    *args, **kwargs
+        Passed to :class:`paho_mqtt_helpers.BaseMqttReactor`.
+    '''
     def __init__(self, *args, **kwargs):
+        self.use_selector = kwargs.pop('use_selector', False)
         super(SerialDeviceManager, self).__init__(*args, **kwargs)
         # Open devices.
         self.open_devices = {}
+        # Subscribed to hotplug watcher (on first connection to broker).
+        self._hotplug_subscribed = False
+        # Pending refresh after hotplug events (see `_on_hotplug()`).
+        self._hotplug_timer = None
+        self._hotplug_lock = threading.Lock()
 
     def refresh_comports(self):
         # Query list of available serial ports
-        comports = _comports().T.to_dict()
+        ports = list_ports_fast()
+        # Check whether each port is in use *without* opening it (opening a
+        # port may reset the connected device, e.g., an Arduino).
+        available = check_ports([port_i.port for port_i in ports],
+                                probe=False)
+        comports = {port_i.port: {'descriptor': port_i.descriptor,
+                                  'hardware_id': port_i.hardware_id,
+                                  'vid': port_i.vid, 'pid': port_i.pid,
+                                  'available': available_i}
+                    for port_i, available_i in zip(ports, available)}
         comports_json = json.dumps(comports)
 
         # Publish list of available serial communication ports.
@@ -104,6 +138,37 @@ class SerialDeviceManager(pmh.BaseMqttReactor):
             self.mqtt_client.subscribe('serial_device/+/close')
             self.mqtt_client.subscribe('serial_device/refresh_comports')
             self.refresh_comports()
+            if not self._hotplug_subscribed:
+                # Publish updated list of ports whenever a port is added or
+                # removed.
+                hotplug.subscribe(self._on_hotplug)
+                self._hotplug_subscribed = True
+
+    def _on_hotplug(self, action, port):
+        '''
+        Callback for when a serial port is added or removed.
+
+        Ports are refreshed (from a timer thread) once no further events are
+        received for :data:`HOTPLUG_DEBOUNCE_S` seconds.
+
+        .. versionadded:: 0.11
+        '''
+        logger.debug('Port `%s` %s', port,
+                     'added' if action == 'add' else 'removed')
+        with self._hotplug_lock:
+            if self._hotplug_timer is not None:
+                self._hotplug_timer.cancel()
+            self._hotplug_timer = threading.Timer(HOTPLUG_DEBOUNCE_S,
+                                                  self._refresh_hotplug)
+            self._hotplug_timer.daemon = True
+            self._hotplug_timer.start()
+
+    def _refresh_hotplug(self):
+        logger.debug('Refreshing comports after hotplug events.')
+        try:
+            self.refresh_comports()
+        except Exception:
+            logger.exception('Error refreshing comports.')
 
     def on_message(self, client, userdata, msg):
         '''
@@ -315,8 +380,11 @@ class SerialDeviceManager(pmh.BaseMqttReactor):
                     del parent.open_devices[self.PORT]
                     parent._publish_status(self.PORT)
 
-            reader_thread = serial.threaded.ReaderThread(device,
-                                                         PassThroughProtocol)
+            if self.use_selector and selector.supported(device):
+                reader_class = selector.SelectorTransport
+            else:
+                reader_class = serial.threaded.ReaderThread
+            reader_thread = reader_class(device, PassThroughProtocol)
             reader_thread.start()
             reader_thread.connect()
         except Exception as exception:
@@ -351,6 +419,12 @@ class SerialDeviceManager(pmh.BaseMqttReactor):
 
     def __exit__(self, type_, value, traceback):
         logger.info('Shutting down, closing all open ports.')
+        if self._hotplug_subscribed:
+            hotplug.unsubscribe(self._on_hotplug)
+            self._hotplug_subscribed = False
+        with self._hotplug_lock:
+            if self._hotplug_timer is not None:
+                self._hotplug_timer.cancel()
         for port_i in list(self.open_devices.keys()):
             self._serial_close(port_i)
         super(SerialDeviceManager, self).stop()
@@ -2,42 +2,199 @@
 Wait on multiple :class:`threading.Event` instances.
 
 Based on code from: https://stackoverflow.com/questions/12317940/python-threading-can-i-sleep-on-two-threading-events-simultaneously/12320352#12320352
+
+.. versionchanged:: 0.11
+    Each event keeps a list of listeners, so any number of waiters (and
+    :func:`OrEvent` instances) may wait on the same event.  Previously, only
+    the most recently created :func:`OrEvent` on an event was notified.
+
+    Add :class:`Event`, :func:`wait_any` and :func:`wait_all`.
 '''
 import threading
+import weakref
+
+
+class Event(threading.Event):
+    '''
+    :class:`threading.Event` that notifies listeners when it is set or
+    cleared.
+
+    Plain :class:`threading.Event` instances may also be passed to
+    :func:`wait_any`, :func:`wait_all` and :func:`OrEvent`, but their
+    ``set``/``clear`` methods are patched on first use.
+
+    .. versionadded:: 0.11
+    '''
+    def __init__(self):
+        super(Event, self).__init__()
+        _init_listeners(self)
+
+    def set(self):
+        super(Event, self).set()
+        _notify(self)
+
+    def clear(self):
+        super(Event, self).clear()
+        _notify(self)
+
+
+def _init_listeners(event):
+    event._listeners = []
+    event._listeners_lock = threading.Lock()
+
+
+def _notify(event):
+    with event._listeners_lock:
+        listeners = list(event._listeners)
+    for listener_i in listeners:
+        listener_i()
 
 
 def or_set(self):
     self._set()
-    self.changed()
+    _notify(self)
 
 
 def or_clear(self):
     self._clear()
-    self.changed()
+    _notify(self)
+
+
+def _patch(event):
+    '''
+    Override ``set`` and ``clear`` methods on a plain
+    :class:`threading.Event` (once) to notify listeners after performing
+    default behaviour.
+    '''
+    if hasattr(event, '_listeners'):
+        return
+    _init_listeners(event)
+    event._set = event.set
+    event._clear = event.clear
+    event.set = lambda: or_set(event)
+    event.clear = lambda: or_clear(event)
 
 
 def orify(event, changed_callback):
     '''
-    Override ``set`` and ``clear`` methods on event to call specified callback
-    function after performing default behaviour.
+    Call specified callback function after ``set`` or ``clear`` is called on
+    event.
+
+    .. versionchanged:: 0.11
+        Add callback to listeners of event, rather than replacing the callback
+        of any previous call.
 
     Parameters
     ----------
-
+    event : threading.Event
+        Event.
+    changed_callback : callable
+        Function to call (without arguments).
     '''
     event.changed = changed_callback
-    if not hasattr(event, '_set'):
-        # `set`/`clear` methods have not been overridden on event yet.
-        # Override methods to call `changed_callback` after performing default
-        # action.
-        event._set = event.set
-        event._clear = event.clear
-        event.set = lambda: or_set(event)
-        event.clear = lambda: or_clear(event)
+    add_listener(event, changed_callback)
+
+
+def add_listener(event, listener):
+    '''
+    .. versionadded:: 0.11
+
+    Parameters
+    ----------
+    event : threading.Event
+        Event.
+    listener : callable
+        Function to call (without arguments) after event is set or cleared.
+    '''
+    _patch(event)
+    with event._listeners_lock:
+        event._listeners.append(listener)
+
+
+def remove_listener(event, listener):
+    '''
+    .. versionadded:: 0.11
+    '''
+    with event._listeners_lock:
+        if listener in event._listeners:
+            event._listeners.remove(listener)
+
+
+def _wait(events, predicate, timeout):
+    condition = threading.Condition()
+
+    def notify():
+        with condition:
+            condition.notify_all()
+
+    for event_i in events:
+        add_listener(event_i, notify)
+    try:
+        with condition:
+            return condition.wait_for(predicate, timeout)
+    finally:
+        for event_i in events:
+            remove_listener(event_i, notify)
+
+
+def wait_any(events, timeout=None):
+    '''
+    Wait until **at least one** event is set.
+
+    .. versionadded:: 0.11
+
+    Parameters
+    ----------
+    events : list(threading.Event)
+        Events to wait on.
+    timeout : float, optional
+        Maximum time to wait (in seconds).
+
+        By default, wait indefinitely.
+
+    Returns
+    -------
+    threading.Event or None
+        First event in :data:`events` that is set, or ``None`` if no event was
+        set within :data:`timeout`.
+    '''
+    events = list(events)
+    return _wait(events, lambda: next((event_i for event_i in events
+                                       if event_i.is_set()), None), timeout)
+
+
+def wait_all(events, timeout=None):
+    '''
+    Wait until **all** events are set.
+
+    .. versionadded:: 0.11
+
+    Parameters
+    ----------
+    events : list(threading.Event)
+        Events to wait on.
+    timeout : float, optional
+        Maximum time to wait (in seconds).
+
+        By default, wait indefinitely.
+
+    Returns
+    -------
+    bool
+        ``True`` if all events are set, or ``False`` if not all events were
+        set within :data:`timeout`.
+    '''
+    events = list(events)
+    return _wait(events, lambda: all(event_i.is_set() for event_i in events),
+                 timeout)
 
 
 def OrEvent(*events):
     '''
+    .. versionchanged:: 0.11
+        Any number of :func:`OrEvent` instances may share an event.  Each
+        instance stops listening to its events once it is garbage collected.
+
     Parameters
     ----------
     events : list(threading.Event)
@@ -50,20 +207,25 @@ def OrEvent(*events):
         is set.
     '''
     or_event = threading.Event()
+    or_event_ref = weakref.ref(or_event)
 
     def changed():
         '''
         Set ``or_event`` if any of the specified events have been set.
         '''
-        bools = [event_i.is_set() for event_i in events]
-        if any(bools):
+        or_event = or_event_ref()
+        if or_event is None:
+            # `or_event` was garbage collected.  Stop listening.
+            for event_i in events:
+                remove_listener(event_i, changed)
+        elif any(event_i.is_set() for event_i in events):
             or_event.set()
         else:
             or_event.clear()
+
     for event_i in events:
-        # Override ``set`` and ``clear`` methods on event to update state of
-        # `or_event` after performing default behaviour.
-        orify(event_i, changed)
+        # Update state of `or_event` whenever an event is set or cleared.
+        add_listener(event_i, changed)
 
     # Set initial state of `or_event`.
     changed()
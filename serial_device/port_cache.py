@@ -0,0 +1,213 @@
+'''
+Persistent cache of the last port (and baud rate) at which each type of
+:class:`serial_device.SerialDevice` was found.
+
+Entries are keyed by device class and by the USB serial number and
+vendor/product ID of the port, so a device is found again even if it is
+assigned a different port name (e.g., ``/dev/ttyUSB1`` instead of
+``/dev/ttyUSB0``) after being plugged back in.
+
+.. versionadded:: 0.11
+'''
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .ports import PortIndex, list_ports_fast
+
+logger = logging.getLogger(__name__)
+
+
+#: Maximum number of entries kept per device class.
+MAX_ENTRIES = 8
+
+
+def default_path():
+    '''
+    Returns
+    -------
+    str
+        Default cache file path, i.e., ``serial_device/ports.json`` in the
+        user cache directory (``%LOCALAPPDATA%`` on Windows,
+        ``$XDG_CACHE_HOME`` or ``~/.cache`` otherwise).
+    '''
+    if os.name == 'nt':
+        root = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        root = (os.environ.get('XDG_CACHE_HOME') or
+                os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(root, 'serial_device', 'ports.json')
+
+
+def class_key(cls):
+    '''
+    Returns
+    -------
+    str
+        Fully qualified name of class, e.g., ``'mypackage.MyDevice'``.
+    '''
+    return '%s.%s' % (cls.__module__, getattr(cls, '__qualname__',
+                                              cls.__name__))
+
+
+class PortCache(object):
+    '''
+    Parameters
+    ----------
+    path : str, optional
+        Cache file path.
+
+        Default: :func:`default_path`
+    '''
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as input_:
+                data = json.load(input_)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _entries(self, data, key):
+        # Ignore malformed entries (e.g., cache file edited by hand).
+        entries = data.get(key)
+        if not isinstance(entries, list):
+            return []
+        return [entry_i for entry_i in entries if isinstance(entry_i, dict)]
+
+    def _dump(self, data):
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Write to temporary file and rename to replace cache atomically.
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as output:
+                    json.dump(data, output, indent=2, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        except (IOError, OSError) as exception:
+            logger.debug('Error writing port cache `%s`: %s', self.path,
+                         exception)
+
+    def candidates(self, key, ports=None):
+        '''
+        Parameters
+        ----------
+        key : str
+            Device class key (see :func:`class_key`).
+        ports : list(serial_device.PortInfo), optional
+            Current serial ports.
+
+            Default: :func:`serial_device.list_ports_fast`
+
+        Returns
+        -------
+        list
+            ``(port, baud_rate)`` for each cached entry that matches a current
+            port, most recent first.
+        '''
+        with self._lock:
+            entries = self._entries(self._load(), key)
+        if not entries:
+            return []
+        index = PortIndex(list_ports_fast() if ports is None else ports)
+
+        candidates = []
+        for entry_i in entries:
+            serial_number = entry_i.get('serial_number')
+            vid, pid = entry_i.get('vid'), entry_i.get('pid')
+            if serial_number:
+                # Match USB serial number, regardless of current port name.
+                port_i = next((port_j for port_j in
+                               index.by_serial_number.get(serial_number, [])
+                               if (port_j.vid, port_j.pid) == (vid, pid)),
+                              None)
+            else:
+                # Match port name, and USB IDs (if any).
+                port_i = index.by_port.get(entry_i.get('port'))
+                if port_i is not None and (port_i.vid, port_i.pid) != (vid,
+                                                                       pid):
+                    port_i = None
+            if port_i is not None:
+                candidate_i = port_i.port, entry_i.get('baud_rate')
+                if candidate_i not in candidates:
+                    candidates.append(candidate_i)
+        return candidates
+
+    def record(self, key, port, baud_rate, ports=None):
+        '''
+        Record successful connection to port.
+
+        The cache file is only written if the entry differs from the most
+        recent entry for :data:`key` (e.g., not each time a device is found
+        again at the same port).  Errors writing the cache file are logged
+        and otherwise ignored.
+
+        Parameters
+        ----------
+        key : str
+            Device class key (see :func:`class_key`).
+        port : str
+            Name of serial port.
+        baud_rate : int
+            Baud rate.
+        ports : list(serial_device.PortInfo), optional
+            Current serial ports.
+
+            Default: :func:`serial_device.list_ports_fast`
+        '''
+        if ports is None:
+            ports = list_ports_fast()
+        info = next((port_i for port_i in ports if port_i.port == port), None)
+        entry = {'port': port, 'baud_rate': baud_rate,
+                 'serial_number': getattr(info, 'serial_number', None),
+                 'vid': getattr(info, 'vid', None),
+                 'pid': getattr(info, 'pid', None),
+                 'timestamp': time.time()}
+
+        def _same_device(other):
+            if entry['serial_number']:
+                return all(other.get(k) == entry[k]
+                           for k in ('serial_number', 'vid', 'pid'))
+            return (not other.get('serial_number') and
+                    other.get('port') == port)
+
+        with self._lock:
+            data = self._load()
+            previous = self._entries(data, key)
+            if previous and all(previous[0].get(k) == v
+                                for k, v in entry.items() if k != 'timestamp'):
+                # Already most recent entry; skip writing cache file.
+                return
+            entries = [entry] + [entry_i for entry_i in previous
+                                 if not _same_device(entry_i)]
+            data[key] = entries[:MAX_ENTRIES]
+            self._dump(data)
+
+    def clear(self, key=None):
+        '''
+        Parameters
+        ----------
+        key : str, optional
+            Device class key (see :func:`class_key`).
+
+            By default, clear entries for all device classes.
+        '''
+        with self._lock:
+            data = self._load() if key is not None else {}
+            data.pop(key, None)
+            self._dump(data)
+
+
+#: Default port cache shared by :class:`serial_device.SerialDevice` classes.
+PORT_CACHE = PortCache()
@@ -0,0 +1,188 @@
+'''
+Lightweight serial port enumeration that does not require :mod:`pandas`.
+
+.. versionadded:: 0.11
+'''
+import collections
+import re
+import sys
+
+import serial.tools.list_ports
+import six
+
+from .cache import ENUMERATION_CACHE
+
+
+#: Serial port record.
+#:
+#: ``vid`` and ``pid`` are lower-case hexadecimal strings (e.g., ``'2341'``),
+#: or ``None`` if the port is not a USB device.
+#:
+#: ``interface_number`` (USB interface number) and ``driver`` (kernel driver
+#: name) are only available from the Linux ``sysfs`` backend (see
+#: :mod:`serial_device.sysfs`), and are ``None`` otherwise.
+PortInfo = collections.namedtuple('PortInfo', 'port descriptor hardware_id '
+                                  'vid pid serial_number location interface '
+                                  'interface_number driver')
+
+# Match USB product and vendor IDs (and serial number) from `hwid` entries of
+# the form:
+#
+#     FTDIBUS\VID_0403+PID_6001+A60081GEA\0000
+CRE_FTDIBUS_HWID = re.compile(r'vid_(?P<vid>[0-9a-f]+)\+pid_(?P<pid>[0-9a-f]+)'
+                              r'(\+(?P<serial_number>[^\\]+))?', re.I)
+# Match USB product and vendor IDs (and serial number) from `hwid` entries of
+# the form:
+#
+#     USB VID:PID=16C0:0483 SNR=2145930
+CRE_USB_HWID = re.compile(r'vid:pid=(?P<vid>[0-9a-f]+):(?P<pid>[0-9a-f]+)'
+                          r'(.*\s(SER|SNR)=(?P<serial_number>\S+))?', re.I)
+
+
+def _port_info(info):
+    '''
+    Parameters
+    ----------
+    info : serial.tools.list_ports_common.ListPortInfo or tuple
+        Port information as returned by
+        :func:`serial.tools.list_ports.comports`, or a ``(port, descriptor,
+        hardware_id)`` tuple.
+
+    Returns
+    -------
+    PortInfo
+        Port record.
+    '''
+    port, descriptor, hardware_id = info[0], info[1], info[2]
+    vid = getattr(info, 'vid', None)
+    if vid is not None:
+        return PortInfo(port, descriptor, hardware_id, '%04x' % vid,
+                        '%04x' % (info.pid or 0), info.serial_number,
+                        info.location, info.interface, None, None)
+    for cre_i in (CRE_FTDIBUS_HWID, CRE_USB_HWID):
+        match = cre_i.search(hardware_id)
+        if match is not None:
+            return PortInfo(port, descriptor, hardware_id,
+                            match.group('vid').lower(),
+                            match.group('pid').lower(),
+                            match.group('serial_number'), None, None, None,
+                            None)
+    return PortInfo(port, descriptor, hardware_id, None, None, None, None,
+                    None, None, None)
+
+
+class PortIndex(object):
+    '''
+    Lookup tables of serial port records by port name, by USB vendor/product
+    ID, and by USB serial number.
+
+    Parameters
+    ----------
+    ports : list(PortInfo)
+        Serial port records.
+    '''
+    def __init__(self, ports):
+        self.ports = list(ports)
+        self.by_port = {}
+        self.by_vid_pid = collections.defaultdict(list)
+        self.by_serial_number = collections.defaultdict(list)
+        for port_i in self.ports:
+            self.by_port[port_i.port] = port_i
+            if port_i.vid is not None:
+                self.by_vid_pid['%s:%s' % (port_i.vid,
+                                           port_i.pid)].append(port_i)
+            if port_i.serial_number:
+                self.by_serial_number[port_i.serial_number].append(port_i)
+
+    def find(self, vid_pid=None, serial_number=None):
+        '''
+        Parameters
+        ----------
+        vid_pid : str or list, optional
+            One or more USB vendor/product IDs to match, each in the form
+            ``'<vid>:<pid>'`` (e.g., ``'2341:0010'``).
+        serial_number : str, optional
+            USB serial number to match.
+
+        Returns
+        -------
+        list(PortInfo)
+            Records of ports matching all specified criteria.
+        '''
+        if serial_number is not None:
+            ports = self.by_serial_number.get(serial_number, [])
+        else:
+            ports = self.ports
+        if vid_pid is not None:
+            if isinstance(vid_pid, six.string_types):
+                vid_pid = [vid_pid]
+            matches = set()
+            for vid_pid_i in vid_pid:
+                matches.update(port_i.port for port_i in
+                               self.by_vid_pid.get(vid_pid_i.lower(), []))
+            ports = [port_i for port_i in ports if port_i.port in matches]
+        return list(ports)
+
+
+def port_index(use_cache=True):
+    '''
+    Parameters
+    ----------
+    use_cache : bool, optional
+        If ``True``, return cached index from
+        :data:`serial_device.cache.ENUMERATION_CACHE` if available.
+
+    Returns
+    -------
+    PortIndex
+        Index of serial ports listed by :func:`list_ports_fast`.
+    '''
+    if use_cache:
+        return ENUMERATION_CACHE.get('port_index',
+                                     lambda: port_index(use_cache=False))
+    return PortIndex(list_ports_fast(use_cache=False))
+
+
+def list_ports_fast(use_cache=True, backend=None):
+    '''
+    List serial ports without building a :class:`pandas.DataFrame`.
+
+    Parameters
+    ----------
+    use_cache : bool, optional
+        If ``True``, return cached results from
+        :data:`serial_device.cache.ENUMERATION_CACHE` if available.
+    backend : str, optional
+        Enumeration backend:
+
+         - ``'sysfs'``: read ports directly from ``/sys/class/tty`` (Linux
+           only, see :func:`serial_device.sysfs.list_ports`).
+         - ``'pyserial'``: use :func:`serial.tools.list_ports.comports`.
+
+        By default, use ``'sysfs'`` if supported, otherwise ``'pyserial'``.
+
+    Returns
+    -------
+    list(PortInfo)
+        Record for each available serial port.
+
+    See also
+    --------
+    :func:`serial_device.comports`
+    '''
+    from . import sysfs
+
+    if backend is None:
+        backend = ('sysfs' if sys.platform.startswith('linux') and
+                   sysfs.available() else 'pyserial')
+    if use_cache:
+        return list(ENUMERATION_CACHE.get(('list_ports_fast', backend),
+                                          lambda: list_ports_fast(False,
+                                                                  backend)))
+    if backend == 'sysfs':
+        return sysfs.list_ports()
+    elif backend == 'pyserial':
+        return [_port_info(info_i)
+                for info_i in serial.tools.list_ports.comports()]
+    else:
+        raise ValueError('Unknown backend: `%s`' % backend)
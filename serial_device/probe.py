@@ -0,0 +1,282 @@
+'''
+Concurrent, deadline-bounded probing of serial ports.
+
+.. versionadded:: 0.11
+'''
+import collections
+import logging
+import queue
+import threading
+import time
+
+import serial
+
+from . import usage
+
+logger = logging.getLogger(__name__)
+
+
+#: Default maximum number of ports to probe concurrently.
+MAX_WORKERS = 8
+
+#: Default maximum time (in seconds) to wait for a single port probe.
+PROBE_TIMEOUT_S = 1.
+
+
+def map_with_deadline(func, items, timeout_s=None, max_workers=None,
+                      default=None):
+    '''
+    Apply function to each item using a bounded pool of worker threads.
+
+    Each call is given its own deadline, starting from the time the call is
+    scheduled.  Calls that do not finish before their deadline are abandoned
+    (the worker is left to finish in the background as a daemon thread) and
+    their slot is handed to the next item, so a wedged call can never stall
+    the remaining items.
+
+    Parameters
+    ----------
+    func : callable
+        Function to apply to each item.
+    items : iterable
+        Items to apply function to.
+    timeout_s : float, optional
+        Maximum time (in seconds) to wait for each call.
+
+        By default, wait for each call to complete.
+    max_workers : int, optional
+        Maximum number of calls to run concurrently.
+
+        Default: :data:`MAX_WORKERS`
+    default : object, optional
+        Result for calls that timed out or raised an exception.
+
+    Returns
+    -------
+    list
+        Result of each call, in the same order as :data:`items`.
+    '''
+    items = list(items)
+    max_workers = max(1, max_workers or MAX_WORKERS)
+    results = [default] * len(items)
+    done = queue.Queue()
+    pending = collections.deque(enumerate(items))
+    # Deadline of each running call, indexed by item position.
+    running = {}
+
+    def _worker(i, item):
+        try:
+            result = func(item)
+        except Exception as exception:
+            logger.debug('Error processing `%s`: %s', item, exception)
+            result = default
+        done.put((i, result))
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            i, item = pending.popleft()
+            running[i] = (None if timeout_s is None
+                          else time.monotonic() + timeout_s)
+            thread = threading.Thread(target=_worker, args=(i, item))
+            thread.daemon = True
+            thread.start()
+
+        deadlines = [d for d in running.values() if d is not None]
+        wait_s = (max(0, min(deadlines) - time.monotonic()) if deadlines
+                  else None)
+        try:
+            i, result = done.get(timeout=wait_s)
+        except queue.Empty:
+            now = time.monotonic()
+            for i, deadline_i in list(running.items()):
+                if deadline_i is not None and deadline_i <= now:
+                    logger.debug('Timed out processing `%s`', items[i])
+                    del running[i]
+            continue
+        if i in running:
+            # Ignore late results from calls that were already abandoned.
+            del running[i]
+            results[i] = result
+    return results
+
+
+def first_success(func, items, timeout_s=None, max_workers=None,
+                  on_extra_success=None):
+    '''
+    Apply function to items using a bounded pool of worker threads, and
+    return the first item for which the function returns a true value.
+
+    Once a result is found (or :data:`timeout_s` elapses), no further items
+    are started.  Calls that are still running are left to finish in the
+    background as daemon threads.
+
+    Parameters
+    ----------
+    func : callable
+        Function to apply to each item.
+    items : iterable
+        Items to apply function to, in order of preference.
+    timeout_s : float, optional
+        Maximum total time (in seconds) to wait for a result.
+
+        By default, wait until all calls have completed.
+    max_workers : int, optional
+        Maximum number of calls to run concurrently.
+
+        Default: :data:`MAX_WORKERS`
+    on_extra_success : callable, optional
+        Function called as ``on_extra_success(item, result)`` for each other
+        item that succeeds (possibly after this function has returned), e.g.,
+        to close a connection opened by :data:`func`.
+
+    Returns
+    -------
+    tuple or None
+        ``(item, result)`` for the first successful item, or ``None`` if no
+        item succeeded before :data:`timeout_s`.
+    '''
+    max_workers = max(1, max_workers or MAX_WORKERS)
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    done = queue.Queue()
+    pending = collections.deque(items)
+    lock = threading.Lock()
+    # Set once the first successful result is selected (or on time out).
+    finished = threading.Event()
+
+    def _extra_success(item, result):
+        if on_extra_success is not None:
+            try:
+                on_extra_success(item, result)
+            except Exception as exception:
+                logger.debug('Error processing extra success `%s`: %s', item,
+                             exception)
+
+    def _worker(item):
+        try:
+            result = func(item)
+        except Exception as exception:
+            logger.debug('Error processing `%s`: %s', item, exception)
+            result = None
+        with lock:
+            if not finished.is_set():
+                done.put((item, result))
+                return
+        if result:
+            _extra_success(item, result)
+
+    success = None
+    running = 0
+    while success is None and (pending or running):
+        while pending and running < max_workers:
+            thread = threading.Thread(target=_worker,
+                                      args=(pending.popleft(), ))
+            thread.daemon = True
+            running += 1
+            thread.start()
+        wait_s = (None if deadline is None
+                  else max(0, deadline - time.monotonic()))
+        try:
+            item, result = done.get(timeout=wait_s)
+        except queue.Empty:
+            logger.debug('Timed out after %s s', timeout_s)
+            break
+        running -= 1
+        if result:
+            success = item, result
+
+    with lock:
+        finished.set()
+    # Handle results that were queued before the first success was selected.
+    while True:
+        try:
+            item, result = done.get_nowait()
+        except queue.Empty:
+            break
+        if result:
+            _extra_success(item, result)
+    return success
+
+
+def probe_port(port):
+    '''
+    Parameters
+    ----------
+    port : str
+        Name of serial port (e.g., ``"COM4"``, ``"/dev/ttyUSB0"``).
+
+    Returns
+    -------
+    bool
+        ``True`` if a temporary connection to the port could be opened.
+    '''
+    try:
+        connection = serial.Serial(port=port)
+        connection.close()
+        return True
+    except serial.SerialException:
+        return False
+
+
+def probe_ports(ports, timeout_s=PROBE_TIMEOUT_S, max_workers=MAX_WORKERS):
+    '''
+    Check concurrently whether each port accepts a temporary connection.
+
+    Parameters
+    ----------
+    ports : list
+        Names of serial ports.
+    timeout_s : float, optional
+        Maximum time (in seconds) to wait for each port.
+    max_workers : int, optional
+        Maximum number of ports to probe concurrently.
+
+    Returns
+    -------
+    list
+        ``True`` if the respective port accepted a connection, ``False`` if
+        the connection was refused, or ``None`` if the probe did not finish
+        before :data:`timeout_s`.
+    '''
+    return map_with_deadline(probe_port, ports, timeout_s=timeout_s,
+                             max_workers=max_workers)
+
+
+def check_ports(ports, probe=True, timeout_s=PROBE_TIMEOUT_S,
+                max_workers=MAX_WORKERS):
+    '''
+    Check whether each port is available.
+
+    Parameters
+    ----------
+    ports : list
+        Names of serial ports.
+    probe : bool, optional
+        If ``True``, check each port by opening a temporary connection (see
+        :func:`probe_ports`).
+
+        If ``False``, check whether each port is in use *without* opening it
+        (see :func:`serial_device.usage.ports_available`), falling back to
+        opening ports whose usage cannot be determined on this system.
+    timeout_s : float, optional
+        Maximum time (in seconds) to wait for each port probe.
+    max_workers : int, optional
+        Maximum number of ports to probe concurrently.
+
+    Returns
+    -------
+    list
+        ``True`` if the respective port is available, ``False`` if not, or
+        ``None`` if a probe did not finish before :data:`timeout_s`.
+    '''
+    ports = list(ports)
+    if probe:
+        return probe_ports(ports, timeout_s=timeout_s, max_workers=max_workers)
+    available = usage.ports_available(ports)
+    unknown = [i for i, available_i in enumerate(available)
+               if available_i is None]
+    if unknown:
+        probed = probe_ports([ports[i] for i in unknown], timeout_s=timeout_s,
+                             max_workers=max_workers)
+        for i, available_i in zip(unknown, probed):
+            available[i] = available_i
+    return available
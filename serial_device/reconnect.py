@@ -0,0 +1,226 @@
+'''
+Reconnect to a serial port after it is disconnected.
+
+While the port is unavailable, only the target port is checked (without
+opening it, where supported; see :mod:`serial_device.usage`), with
+exponential backoff (and jitter) between checks.  A hotplug event or a close
+request ends a wait immediately.
+
+.. versionadded:: 0.11
+'''
+import random
+import threading
+import time
+
+from .or_event import wait_any
+from .probe import check_ports
+
+
+#: Maximum time (in seconds) between checks for a disconnected port to become
+#: available again, in case a hotplug event was missed.
+RECONNECT_CHECK_INTERVAL_S = 2.
+#: Default time (in seconds) to wait before the first check.
+BACKOFF_INITIAL_S = .05
+#: Default factor by which the time between checks grows.
+BACKOFF_FACTOR = 2.
+#: Default jitter, as a fraction of each delay.
+BACKOFF_JITTER = .1
+
+
+class Backoff(object):
+    '''
+    Exponential backoff with jitter.
+
+    Parameters
+    ----------
+    initial_s : float, optional
+        First delay (in seconds).
+    max_s : float, optional
+        Maximum delay (in seconds).
+    factor : float, optional
+        Factor by which each delay grows.
+    jitter : float, optional
+        Each delay is randomly adjusted by up to this fraction (e.g., ``0.1``
+        for ±10%), so ports disconnected at the same time (e.g., by a USB hub
+        reset) are not all checked at the same time.
+    '''
+    def __init__(self, initial_s=BACKOFF_INITIAL_S,
+                 max_s=RECONNECT_CHECK_INTERVAL_S, factor=BACKOFF_FACTOR,
+                 jitter=BACKOFF_JITTER):
+        self.initial_s = initial_s
+        self.max_s = max_s
+        self.factor = factor
+        self.jitter = jitter
+        self.attempt = 0
+
+    def reset(self):
+        self.attempt = 0
+
+    def next(self):
+        '''
+        Returns
+        -------
+        float
+            Next delay (in seconds).
+        '''
+        delay = min(self.max_s, self.initial_s * self.factor ** self.attempt)
+        self.attempt += 1
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0, delay)
+
+
+class ReconnectStats(object):
+    '''
+    Reconnection statistics.
+
+    Attributes
+    ----------
+    attempts : int
+        Number of attempts to open the port after a disconnection.
+    failures : int
+        Number of attempts that failed.
+    disconnects : int
+        Number of times connection was lost.
+    reconnects : int
+        Number of times connection was established again.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.failures = 0
+        self.disconnects = 0
+        self.reconnects = 0
+        # Total time (in seconds) of outages that have ended.
+        self._downtime_s = 0.
+        self._reconnect_times_s = []
+        # Time (see `time.monotonic()`) connection was lost, or `None` if
+        # connected.
+        self._down_since = None
+
+    def disconnected(self):
+        with self._lock:
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+                self.disconnects += 1
+
+    def attempted(self, success):
+        with self._lock:
+            if self._down_since is None:
+                # Initial connection.
+                return
+            self.attempts += 1
+            if not success:
+                self.failures += 1
+                return
+            duration_s = time.monotonic() - self._down_since
+            self._down_since = None
+            self.reconnects += 1
+            self._downtime_s += duration_s
+            self._reconnect_times_s.append(duration_s)
+
+    def as_dict(self):
+        '''
+        Returns
+        -------
+        dict
+            Counters, total ``downtime_s`` (including any current outage),
+            and ``last``, ``mean`` and ``max`` time to reconnect (in seconds,
+            ``None`` if never reconnected).
+        '''
+        with self._lock:
+            downtime_s = self._downtime_s
+            if self._down_since is not None:
+                downtime_s += time.monotonic() - self._down_since
+            times = list(self._reconnect_times_s)
+            return {'attempts': self.attempts, 'failures': self.failures,
+                    'disconnects': self.disconnects,
+                    'reconnects': self.reconnects,
+                    'connected': self._down_since is None,
+                    'downtime_s': downtime_s,
+                    'last_reconnect_s': times[-1] if times else None,
+                    'mean_reconnect_s': (sum(times) / len(times) if times
+                                         else None),
+                    'max_reconnect_s': max(times) if times else None}
+
+
+def port_available(port):
+    '''
+    Returns
+    -------
+    bool
+        ``True`` if port exists and is not in use (checked without opening
+        the port, where supported).
+    '''
+    return bool(check_ports([port], probe=False)[0])
+
+
+class ReconnectSupervisor(object):
+    '''
+    Wait for a disconnected port to become available again.
+
+    Parameters
+    ----------
+    port : str
+        Name of serial port.
+    wake : threading.Event
+        Event set to end a wait early, e.g., by a hotplug callback when a port
+        is added.
+    stop : threading.Event
+        Event set when a close is requested.
+    backoff : Backoff, optional
+        Delays between checks.
+
+    Attributes
+    ----------
+    stats : ReconnectStats
+        Reconnection statistics.
+    '''
+    def __init__(self, port, wake, stop, backoff=None):
+        self.port = port
+        self.wake = wake
+        self.stop = stop
+        self.backoff = Backoff() if backoff is None else backoff
+        self.stats = ReconnectStats()
+
+    def wait(self):
+        '''
+        Wait for next backoff delay, a wake event, or a close request.
+
+        Returns
+        -------
+        bool
+            ``False`` if close was requested.
+        '''
+        wait_any([self.wake, self.stop], self.backoff.next())
+        return not self.stop.is_set()
+
+    def wait_available(self):
+        '''
+        Wait for port to become available.
+
+        Returns
+        -------
+        bool
+            ``True`` if port is available, or ``False`` if close was
+            requested.
+        '''
+        while not self.stop.is_set():
+            self.wake.clear()
+            if port_available(self.port):
+                return True
+            self.wait()
+        return False
+
+    def connected(self):
+        '''
+        Record successful connection, and reset backoff.
+        '''
+        self.stats.attempted(True)
+        self.backoff.reset()
+
+    def connect_failed(self):
+        self.stats.attempted(False)
+
+    def disconnected(self):
+        self.stats.disconnected()
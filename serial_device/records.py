@@ -0,0 +1,201 @@
+'''
+Decode streams of fixed-size binary records using :mod:`numpy`.
+
+:class:`RecordProtocol` decodes all complete records buffered after each read
+with a single :func:`numpy.frombuffer` call (i.e., without looping over
+records in Python), and appends them to a :class:`RecordRingBuffer`.  Bytes
+of a partial record are kept for the next read.
+
+For example, to decode records holding a 32-bit timestamp and three 16-bit
+samples::
+
+    dtype = np.dtype([('time_us', '<u4'), ('samples', '<i2', 3)])
+    records = RecordRingBuffer(dtype)
+    protocol_class = functools.partial(RecordProtocol, dtype, records=records)
+
+    with KeepAliveReader(protocol_class, 'COM3', baudrate=2000000):
+        ...
+        samples = records.read()  # Structured array of records read so far.
+
+.. versionadded:: 0.11
+'''
+import threading
+
+import numpy as np
+
+from .threaded import BufferedEventProtocol
+
+
+#: Default initial size (in records) of :class:`RecordRingBuffer`.
+RECORD_BUFFER_SIZE = 4096
+#: Default maximum size (in records) of :class:`RecordRingBuffer`.
+MAX_RECORD_BUFFER_SIZE = 1 << 20
+
+
+class RecordRingBuffer(object):
+    '''
+    Preallocated, growable buffer of records.
+
+    Records are appended by the reader thread, and may be read from any
+    thread.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Record type.
+    size : int, optional
+        Initial size (in records).
+    max_size : int, optional
+        Maximum number of records held.  The buffer grows (up to this size)
+        as needed; once full, the **oldest** records are dropped.
+
+    Attributes
+    ----------
+    dropped : int
+        Number of records dropped because the buffer was full.
+    resizes : int
+        Number of times the buffer was grown.
+    '''
+    def __init__(self, dtype, size=RECORD_BUFFER_SIZE,
+                 max_size=MAX_RECORD_BUFFER_SIZE):
+        if size > max_size:
+            raise ValueError('Initial size must not exceed maximum size.')
+        self.dtype = np.dtype(dtype)
+        self.max_size = max_size
+        self.dropped = 0
+        self.resizes = 0
+        self._data = np.empty(size, dtype=self.dtype)
+        # Unread records are `self._data[self._start:self._end]`.
+        self._start = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def capacity(self):
+        '''
+        Current size (in records) of the underlying array.
+        '''
+        return len(self._data)
+
+    def append(self, records):
+        '''
+        Append records (copied).
+
+        Parameters
+        ----------
+        records : numpy.ndarray
+            Records of type :attr:`dtype`.
+        '''
+        with self._lock:
+            if len(records) > self.max_size:
+                self.dropped += len(self) + len(records) - self.max_size
+                records = records[-self.max_size:]
+                self._start = self._end = 0
+            excess = len(self) + len(records) - self.max_size
+            if excess > 0:
+                # Drop oldest records.
+                self._start += excess
+                self.dropped += excess
+            length = len(self)
+            size = len(records)
+            if len(self._data) - self._end < size:
+                if length + size <= len(self._data):
+                    # Move unread records to front of array.
+                    self._data[:length] = self._data[self._start:self._end]
+                else:
+                    data = np.empty(min(self.max_size,
+                                        max(length + size,
+                                            2 * len(self._data))),
+                                    dtype=self.dtype)
+                    data[:length] = self._data[self._start:self._end]
+                    self._data = data
+                    self.resizes += 1
+                self._start = 0
+                self._end = length
+            self._data[self._end:self._end + size] = records
+            self._end += size
+
+    def read(self, size=None):
+        '''
+        Parameters
+        ----------
+        size : int, optional
+            Maximum number of records to read.
+
+            By default, read all unread records.
+
+        Returns
+        -------
+        numpy.ndarray
+            Copy of the oldest unread records, which are then discarded.
+        '''
+        with self._lock:
+            stop = len(self) if size is None else min(size, len(self))
+            records = self._data[self._start:self._start + stop].copy()
+            self._start += stop
+            if self._start == self._end:
+                self._start = self._end = 0
+            return records
+
+    def clear(self):
+        '''
+        Discard all unread records.
+        '''
+        with self._lock:
+            self._start = self._end = 0
+
+
+class RecordProtocol(BufferedEventProtocol):
+    '''
+    Decode a stream of fixed-size binary records.
+
+    After each read, all complete records are decoded with one call to
+    :func:`numpy.frombuffer` (reading straight from the receive buffer), and
+    appended to :attr:`records`.  Bytes of a partial record stay in the
+    receive buffer until the rest of the record is read.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Record type, e.g., a structured type with explicit byte order.
+    records : RecordRingBuffer, optional
+        Buffer to append decoded records to.
+
+        By default (if no :data:`record_callback` is specified), records are
+        appended to a new buffer.
+    record_callback : callable, optional
+        Function called (from the reader thread) with a (read-only) array of
+        the records decoded from each read.  The array is only valid during
+        the call; copy it to keep records.
+
+    Attributes
+    ----------
+    records : RecordRingBuffer
+        Decoded records (if no :data:`record_callback` is specified).
+    record_count : int
+        Number of records decoded.
+    '''
+    def __init__(self, dtype, records=None, record_callback=None):
+        super(RecordProtocol, self).__init__()
+        self.dtype = np.dtype(dtype)
+        if self.dtype.itemsize < 1:
+            raise ValueError('Record type must not be empty.')
+        self.record_callback = record_callback
+        self.records = (RecordRingBuffer(self.dtype) if records is None and
+                        record_callback is None else records)
+        self.record_count = 0
+
+    def parse(self, buffer):
+        size = len(buffer) - len(buffer) % self.dtype.itemsize
+        if not size:
+            return
+        records = np.frombuffer(buffer.view(0, size), dtype=self.dtype)
+        if self.records is not None:
+            self.records.append(records)
+        if self.record_callback is not None:
+            self.record_callback(records)
+        self.record_count += len(records)
+        buffer.consume(size)
@@ -0,0 +1,337 @@
+'''
+Serve reads for many serial ports from a single thread.
+
+:class:`serial.threaded.ReaderThread` starts one thread per port.
+:class:`SelectorTransport` is a drop-in replacement which instead registers
+the port with a shared :class:`SerialSelector` thread, which waits for any
+registered port to become readable (using :mod:`selectors`, i.e., ``epoll``
+on Linux) and calls the protocol of each readable port.
+
+Protocol callbacks are called from the selector thread, so a slow
+``data_received`` delays reads from all other ports served by the same
+selector.
+
+Protocols providing ``get_buffer()`` and ``buffer_updated()`` methods (see
+:class:`asyncio.BufferedProtocol` and
+:class:`serial_device.threaded.BufferedEventProtocol`) are read into
+directly, without allocating a :class:`bytes` object for each read.
+
+Only ports with a file descriptor (i.e., POSIX serial ports) are supported;
+see :func:`supported`.
+
+.. versionadded:: 0.11
+'''
+import logging
+import os
+import selectors
+import threading
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+
+#: Maximum number of bytes to read from a port at a time.
+READ_SIZE = 65536
+#: Maximum time (in seconds) to wait for a request to be processed by the
+#: selector thread (see :meth:`SerialSelector.call`).
+CALL_TIMEOUT_S = 2.
+
+
+def supported(serial_instance):
+    '''
+    Returns
+    -------
+    bool
+        ``True`` if port can be served by a :class:`SerialSelector`.
+    '''
+    try:
+        return serial_instance.fileno() >= 0
+    except (AttributeError, NotImplementedError, serial.SerialException,
+            ValueError):
+        return False
+
+
+class SerialSelector(threading.Thread):
+    '''
+    Thread serving reads for all registered :class:`SelectorTransport`
+    instances.
+    '''
+    def __init__(self):
+        super(SerialSelector, self).__init__()
+        self.daemon = True
+        self._selector = selectors.DefaultSelector()
+        # Pipe to wake the thread from `select()` to process requests.
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        # Written with lock held, so must never block.
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+        self._lock = threading.Lock()
+        # Pending `(function, done event)` requests.
+        self._requests = []
+        self._stop_request = False
+
+    @property
+    def transports(self):
+        '''
+        list(SelectorTransport) : Registered transports.
+        '''
+        return [key_i.data for key_i in self._selector.get_map().values()
+                if key_i.data is not None]
+
+    def call(self, func, timeout_s=CALL_TIMEOUT_S):
+        '''
+        Call function from selector thread and wait for it to return.
+
+        If called from the selector thread, call function immediately.
+
+        Parameters
+        ----------
+        func : callable
+            Function to call (without arguments).
+        timeout_s : float, optional
+            Maximum time (in seconds) to wait for function to return, e.g., if
+            the selector thread is blocked in a protocol callback.
+
+        Returns
+        -------
+        bool
+            ``True`` if function returned within :data:`timeout_s`.
+        '''
+        if threading.current_thread() is self or not self.is_alive():
+            func()
+            return True
+        done = threading.Event()
+        with self._lock:
+            # Wake pipe is closed (under lock) once thread stops.
+            stopped = self._wake_write is None
+            if not stopped:
+                self._requests.append((func, done))
+                try:
+                    os.write(self._wake_write, b'\0')
+                except BlockingIOError:
+                    # Pipe is full, so thread will wake anyway.
+                    pass
+        if stopped:
+            func()
+            return True
+        if not done.wait(timeout_s):
+            logger.warning('Timed out waiting for selector thread to process '
+                           'request.')
+            return False
+        return True
+
+    def register(self, transport):
+        self.call(lambda: transport._register(self._selector))
+
+    def unregister(self, transport, exception=None):
+        self.call(lambda: transport._unregister(self._selector, exception))
+
+    def run(self):
+        try:
+            while not self._stop_request:
+                for key_i, _ in self._selector.select():
+                    if key_i.data is None:
+                        self._process_requests()
+                    else:
+                        key_i.data._read_ready(self._selector)
+        finally:
+            self._process_requests()
+            for transport_i in self.transports:
+                transport_i._unregister(self._selector)
+            self._selector.close()
+            with self._lock:
+                os.close(self._wake_read)
+                os.close(self._wake_write)
+                self._wake_read = self._wake_write = None
+                requests, self._requests = self._requests, []
+            # Requests added since last processed.
+            self._run_requests(requests)
+
+    def _process_requests(self):
+        try:
+            os.read(self._wake_read, 4096)
+        except OSError:
+            pass
+        with self._lock:
+            requests, self._requests = self._requests, []
+        self._run_requests(requests)
+
+    def _run_requests(self, requests):
+        for func_i, done_i in requests:
+            try:
+                func_i()
+            except Exception:
+                logger.exception('Error in selector request.')
+            finally:
+                done_i.set()
+
+    def stop(self):
+        '''
+        Unregister all transports and stop thread.
+        '''
+        def _stop():
+            self._stop_request = True
+        self.call(_stop)
+
+
+class SelectorTransport(object):
+    '''
+    Drop-in replacement for :class:`serial.threaded.ReaderThread` that is
+    served by a shared :class:`SerialSelector` thread.
+
+    Parameters
+    ----------
+    serial_instance : serial.Serial
+        Open serial port.
+    protocol_factory : callable
+        Function returning a :class:`serial.threaded.Protocol` instance.
+    selector : SerialSelector, optional
+        Selector thread.
+
+        Default: :func:`get_selector`
+    '''
+    def __init__(self, serial_instance, protocol_factory, selector=None):
+        self.serial = serial_instance
+        self.protocol_factory = protocol_factory
+        self.selector = selector
+        self.alive = False
+        self.protocol = None
+        self._lock = threading.Lock()
+        self._connection_made = threading.Event()
+        self._fd = None
+
+    def start(self):
+        '''
+        Register port with selector thread.
+        '''
+        if self.selector is None:
+            self.selector = get_selector()
+        self.alive = True
+        self.selector.register(self)
+
+    def _register(self, selector):
+        self.protocol = self.protocol_factory()
+        try:
+            self.protocol.connection_made(self)
+            self._fd = self.serial.fileno()
+            selector.register(self._fd, selectors.EVENT_READ, self)
+        except Exception as exception:
+            self.alive = False
+            self.protocol.connection_lost(exception)
+        finally:
+            self._connection_made.set()
+
+    def _unregister(self, selector, exception=None):
+        if self._fd is None:
+            # Not registered (or already unregistered).
+            return
+        try:
+            selector.unregister(self._fd)
+        except (KeyError, ValueError):
+            pass
+        self._fd = None
+        self.alive = False
+        protocol, self.protocol = self.protocol, None
+        protocol.connection_lost(exception)
+
+    def _read_ready(self, selector):
+        if self._fd is None:
+            # Unregistered while handling another port in the same batch.
+            return
+        get_buffer = getattr(self.protocol, 'get_buffer', None)
+        try:
+            if get_buffer is not None:
+                # Read straight into protocol buffer (see
+                # `asyncio.BufferedProtocol`).  Any writable buffer may be
+                # returned (e.g., a `bytearray`), so release a view of it.
+                with memoryview(get_buffer(READ_SIZE)) as buffer:
+                    size = os.readv(self._fd, [buffer])
+            else:
+                data = os.read(self._fd, READ_SIZE)
+                size = len(data)
+            if not size:
+                raise serial.SerialException('device reports readiness to '
+                                             'read but returned no data '
+                                             '(device disconnected or '
+                                             'multiple access on port?)')
+        except Exception as exception:
+            # E.g., disconnected USB serial adapter (or error in
+            # `get_buffer()`).
+            self._unregister(selector, exception)
+            return
+        try:
+            if get_buffer is not None:
+                self.protocol.buffer_updated(size)
+            else:
+                self.protocol.data_received(data)
+        except Exception as exception:
+            self._unregister(selector, exception)
+
+    def write(self, data):
+        '''
+        Thread safe writing (uses lock).
+        '''
+        with self._lock:
+            return self.serial.write(data)
+
+    def stop(self):
+        '''
+        Stop serving reads from port.
+        '''
+        if self.selector is not None:
+            self.selector.unregister(self)
+
+    def close(self):
+        '''
+        Stop serving reads from port and close port (uses lock).
+        '''
+        # Stop before taking lock; a protocol callback running in the
+        # selector thread may be waiting for the lock (e.g., in `write()`).
+        self.stop()
+        with self._lock:
+            self.serial.close()
+
+    def connect(self):
+        '''
+        Wait until connection is set up and return the transport and protocol
+        instances.
+        '''
+        if self.alive:
+            self._connection_made.wait()
+            if not self.alive:
+                raise RuntimeError('connection_lost already called')
+            return (self, self.protocol)
+        else:
+            raise RuntimeError('already stopped')
+
+    def __enter__(self):
+        self.start()
+        self._connection_made.wait()
+        if not self.alive:
+            raise RuntimeError('connection_lost already called')
+        return self.protocol
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_selector():
+    '''
+    Returns
+    -------
+    SerialSelector
+        Shared selector thread, started on first call.
+    '''
+    global _selector
+
+    with _selector_lock:
+        if _selector is None or not _selector.is_alive():
+            _selector = SerialSelector()
+            _selector.start()
+        return _selector
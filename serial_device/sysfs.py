@@ -0,0 +1,212 @@
+'''
+Serial port enumeration on Linux, read directly from ``/sys/class/tty``.
+
+Unlike :func:`serial.tools.list_ports.comports`, ``/sys/class/tty`` is
+scanned once and no device is opened.  USB vendor/product ID, serial number,
+USB path, interface number and driver are read from the attributes of each
+port's parent devices.
+
+.. versionadded:: 0.11
+'''
+import os
+import re
+
+from .ports import PortInfo
+
+
+#: Root of ``tty`` class in ``sysfs``.
+SYSFS_TTY_ROOT = '/sys/class/tty'
+
+#: Device name prefixes of serial ports (in the order they are listed).
+FAMILIES = ('ttyS',  # Built-in serial ports
+            'ttyUSB',  # USB-serial with own driver
+            'ttyXRUSB',  # Exar USB-serial
+            'ttyACM',  # USB-serial with CDC-ACM profile
+            'ttyAMA',  # ARM internal port (e.g., Raspberry Pi)
+            'rfcomm',  # Bluetooth serial devices
+            'ttyAP')  # Advantech multi-port serial controllers
+
+#: Device name prefixes of wired serial ports, i.e., excluding Bluetooth.
+WIRED_FAMILIES = tuple(family_i for family_i in FAMILIES
+                       if family_i != 'rfcomm')
+
+# Generic subsystem of serial ports on newer kernels (>= 6.5), which sits
+# between the ``tty`` device and the actual hardware device.
+SERIAL_BASE_SUBSYSTEM = 'serial-base'
+# UART type of ports that are not present, e.g., unused legacy `ttyS*` ports.
+PORT_UNKNOWN = '0'
+
+
+def available():
+    '''
+    Returns
+    -------
+    bool
+        ``True`` if ``sysfs`` serial port enumeration is supported on this
+        system.
+    '''
+    return os.path.isdir(SYSFS_TTY_ROOT)
+
+
+def _read_line(*args):
+    '''
+    Returns
+    -------
+    str or None
+        First line of file (stripped of whitespace), or ``None`` if the file
+        could not be read.
+    '''
+    try:
+        with open(os.path.join(*args)) as input_:
+            return input_.readline().strip()
+    except (IOError, OSError):
+        return None
+
+
+def _link_name(*args):
+    '''
+    Returns
+    -------
+    str or None
+        Base name of target of symbolic link, or ``None`` if the link does not
+        exist.
+    '''
+    try:
+        return os.path.basename(os.readlink(os.path.join(*args)))
+    except OSError:
+        return None
+
+
+def _driver(device_path):
+    '''
+    Returns
+    -------
+    str or None
+        Name of driver bound to device or, if no driver is bound directly, to
+        the nearest parent device.
+    '''
+    while device_path.startswith('/sys/devices/'):
+        driver = _link_name(device_path, 'driver')
+        if driver is not None and driver != 'port':
+            # Skip generic `serial-base` port driver.
+            return driver
+        device_path = os.path.dirname(device_path)
+    return None
+
+
+def _port_info(name, device_path):
+    '''
+    Parameters
+    ----------
+    name : str
+        Device name, e.g., ``'ttyUSB0'``.
+    device_path : str
+        Resolved path of ``sysfs`` device of port.
+
+    Returns
+    -------
+    PortInfo
+        Port record, with ``descriptor`` and ``hardware_id`` formatted the
+        same as :func:`serial.tools.list_ports.comports`, i.e., the device
+        name and ID of PCI (``pnp``) and ``amba`` ports, and ``'n/a'`` for
+        other non-USB ports.
+
+        Note that on kernels >= 6.5, pyserial (<= 3.5) does not step over
+        the ``serial-base`` bus, so reports ``'n/a'`` for *all* non-USB
+        ports, whereas the ``pnp``/``amba`` parent device is used here.
+    '''
+    port = '/dev/' + name
+    subsystem = _link_name(device_path, 'subsystem')
+    while subsystem == SERIAL_BASE_SUBSYSTEM:
+        device_path = os.path.dirname(device_path)
+        subsystem = _link_name(device_path, 'subsystem')
+    driver = _driver(device_path)
+
+    if subsystem == 'usb-serial':
+        interface_path = os.path.dirname(device_path)
+    elif subsystem == 'usb':
+        interface_path = device_path
+    else:
+        # As pyserial: name of PCI (`pnp`) and Raspberry Pi (`amba`) ports,
+        # and `'n/a'` for other ports (e.g., platform UARTs).
+        descriptor = name if subsystem in ('pnp', 'amba') else 'n/a'
+        if subsystem == 'pnp':
+            hardware_id = _read_line(device_path, 'id') or 'n/a'
+        elif subsystem == 'amba':
+            hardware_id = os.path.basename(device_path)
+        else:
+            hardware_id = 'n/a'
+        return PortInfo(port, descriptor, hardware_id, None, None, None, None,
+                        None, None, driver)
+
+    usb_device_path = os.path.dirname(interface_path)
+    vid = (_read_line(usb_device_path, 'idVendor') or '').lower() or None
+    pid = (_read_line(usb_device_path, 'idProduct') or '').lower() or None
+    serial_number = _read_line(usb_device_path, 'serial')
+    try:
+        interface_number = int(_read_line(interface_path,
+                                          'bInterfaceNumber'), 16)
+    except (TypeError, ValueError):
+        interface_number = None
+    try:
+        interface_count = int(_read_line(usb_device_path, 'bNumInterfaces'))
+    except (TypeError, ValueError):
+        interface_count = 1
+    location = os.path.basename(interface_path if interface_count > 1
+                                else usb_device_path)
+    product = _read_line(usb_device_path, 'product')
+    interface = _read_line(interface_path, 'interface')
+
+    if interface is not None:
+        descriptor = '%s - %s' % (product, interface)
+    else:
+        descriptor = product or name
+    hardware_id = 'USB VID:PID=%s:%s' % ((vid or '0000').upper(),
+                                         (pid or '0000').upper())
+    if serial_number is not None:
+        hardware_id += ' SER=%s' % serial_number
+    hardware_id += ' LOCATION=%s' % location
+    return PortInfo(port, descriptor, hardware_id, vid, pid, serial_number,
+                    location, interface, interface_number, driver)
+
+
+def list_ports(families=FAMILIES):
+    '''
+    List serial ports registered in ``/sys/class/tty``.
+
+    Ports with an unknown UART type (e.g., unused legacy ``ttyS*`` ports) are
+    skipped.
+
+    Parameters
+    ----------
+    families : list(str), optional
+        Device name prefixes of ports to list.
+
+    Returns
+    -------
+    list(PortInfo)
+        Record for each serial port, ordered by family and port number.
+    '''
+    cre_name = re.compile(r'^(?P<family>%s)(?P<number>\d+)$' %
+                          '|'.join(map(re.escape, families)))
+    family_order = {family_i: i for i, family_i in enumerate(families)}
+    matches = []
+    for entry_i in os.scandir(SYSFS_TTY_ROOT):
+        match = cre_name.match(entry_i.name)
+        if match is None:
+            continue
+        if _read_line(entry_i.path, 'type') == PORT_UNKNOWN:
+            continue
+        try:
+            device_path = os.path.realpath(os.path.join(entry_i.path,
+                                                        'device'))
+        except OSError:
+            continue
+        if not os.path.isdir(device_path):
+            # Virtual terminal, pseudo-terminal, etc.
+            continue
+        matches.append(((family_order[match.group('family')],
+                         int(match.group('number'))), entry_i.name,
+                        device_path))
+    return [_port_info(name_i, device_path_i)
+            for _, name_i, device_path_i in sorted(matches)]
@@ -0,0 +1,100 @@
+import struct
+
+import pytest
+
+from serial_device.buffer import RingBuffer
+
+
+def test_reserve_commit():
+    buffer = RingBuffer(size=8, max_size=8)
+    view = buffer.reserve(3)
+    assert len(view) == 8
+    view[:3] = b'abc'
+    buffer.commit(3)
+    assert len(buffer) == 3
+    assert bytes(buffer.view()) == b'abc'
+    with pytest.raises(ValueError):
+        buffer.commit(6)
+
+
+def test_find_relative_to_unread_data():
+    buffer = RingBuffer(size=16)
+    buffer.write(b'xx\nab\ncd')
+    buffer.consume(3)
+    assert buffer.find(b'\n') == 2
+    assert buffer.find(b'\n', 3) == -1
+    assert buffer.find(b'x') == -1
+    assert buffer.read(3) == b'ab\n'
+    assert buffer.read() == b'cd'
+    assert len(buffer) == 0
+
+
+def test_compact_when_no_room_after_unread_data():
+    buffer = RingBuffer(size=8, max_size=8)
+    buffer.write(b'abcdef')
+    buffer.consume(4)
+    # 2 bytes unread at end of buffer; 5 more only fit after moving them to
+    # the front.
+    buffer.write(b'ghijk')
+    assert buffer.compactions == 1
+    assert buffer.resizes == 0
+    assert buffer.read() == b'efghijk'
+
+
+def test_consume_all_resets_to_front():
+    buffer = RingBuffer(size=8, max_size=8)
+    buffer.write(b'abcdef')
+    buffer.consume(10)
+    assert len(buffer) == 0
+    buffer.write(b'12345678')
+    assert buffer.compactions == 0
+    assert buffer.read() == b'12345678'
+
+
+def test_grow_keeps_previous_views_valid():
+    buffer = RingBuffer(size=4, max_size=64)
+    buffer.write(b'abc')
+    buffer.consume(1)
+    view = buffer.view()
+    buffer.write(b'defgh')
+    assert buffer.resizes == 1
+    assert buffer.capacity >= 7
+    # View of old buffer is unchanged.
+    assert bytes(view) == b'bc'
+    assert buffer.read() == b'bcdefgh'
+
+
+def test_grow_limited_to_max_size():
+    buffer = RingBuffer(size=4, max_size=10)
+    buffer.write(b'abcdef')
+    assert buffer.capacity == 8
+    buffer.write(b'ghij')
+    assert buffer.capacity == 10
+    with pytest.raises(BufferError):
+        buffer.write(b'k')
+    assert buffer.read() == b'abcdefghij'
+
+
+def test_initial_size_exceeds_max_size():
+    with pytest.raises(ValueError):
+        RingBuffer(size=16, max_size=8)
+
+
+def test_view_is_read_only():
+    buffer = RingBuffer(size=8)
+    buffer.write(b'abcd')
+    view = buffer.view(1, 3)
+    assert bytes(view) == b'bc'
+    with pytest.raises(TypeError):
+        view[0] = 0
+
+
+def test_unpack_from():
+    header = struct.Struct('<H')
+    buffer = RingBuffer(size=8)
+    buffer.write(b'x\x01\x02\x03')
+    buffer.consume(1)
+    assert buffer.unpack_from(header) == (0x0201, )
+    assert buffer.unpack_from(header, 1) == (0x0302, )
+    with pytest.raises(struct.error):
+        buffer.unpack_from(header, 2)
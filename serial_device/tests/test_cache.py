@@ -0,0 +1,80 @@
+import os
+
+from serial_device import cache
+from serial_device.cache import TTLCache
+
+
+class Counter(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    ttl_cache = TTLCache(ttl_s=1.)
+    factory = Counter()
+    assert ttl_cache.get('a', factory) == 1
+    now[0] += .5
+    assert ttl_cache.get('a', factory) == 1
+    # Keys are cached separately.
+    assert ttl_cache.get('b', factory) == 2
+    now[0] += .6
+    assert ttl_cache.get('a', factory) == 3
+    assert ttl_cache.get('b', factory) == 2
+
+
+def test_ttl_none_never_expires(monkeypatch):
+    now = [100.]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    ttl_cache = TTLCache(ttl_s=None)
+    factory = Counter()
+    ttl_cache.get('a', factory)
+    now[0] += 1e6
+    assert ttl_cache.get('a', factory) == 1
+
+
+def test_ttl_zero_disables_cache():
+    ttl_cache = TTLCache(ttl_s=0)
+    factory = Counter()
+    assert [ttl_cache.get('a', factory) for i in range(3)] == [1, 2, 3]
+
+
+def test_invalidate():
+    ttl_cache = TTLCache(ttl_s=None)
+    factory = Counter()
+    ttl_cache.get('a', factory)
+    ttl_cache.invalidate()
+    assert ttl_cache.get('a', factory) == 2
+
+
+def test_invalidate_discards_value_computed_concurrently():
+    ttl_cache = TTLCache(ttl_s=None)
+
+    def factory():
+        # E.g., invalidated by another thread while enumerating ports.
+        ttl_cache.invalidate()
+        return 'stale'
+
+    assert ttl_cache.get('a', factory) == 'stale'
+    assert ttl_cache.get('a', lambda: 'fresh') == 'fresh'
+
+
+def test_watch_path_change_invalidates(tmpdir):
+    path = str(tmpdir.join('watched'))
+    ttl_cache = TTLCache(ttl_s=None, watch_paths=[path])
+    factory = Counter()
+    assert ttl_cache.get('a', factory) == 1
+    assert ttl_cache.get('a', factory) == 1
+    # Watched path created.
+    with open(path, 'w'):
+        pass
+    assert ttl_cache.get('a', factory) == 2
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert ttl_cache.get('a', factory) == 3
+    assert ttl_cache.get('a', factory) == 3
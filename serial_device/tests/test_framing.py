@@ -0,0 +1,102 @@
+import struct
+
+import pytest
+
+from serial_device.framing import (COBSProtocol, DelimiterProtocol,
+                                   LengthPrefixedProtocol, SLIP_END,
+                                   SLIPProtocol, cobs_decode, cobs_encode,
+                                   slip_decode, slip_encode)
+
+
+class SmallBufferProtocol(DelimiterProtocol):
+    buffer_size = 16
+    max_buffer_size = 16
+
+
+def test_delimiter_search_restarts_after_overflow():
+    protocol = SmallBufferProtocol()
+    # No delimiter, so only bytes after these are searched next time.
+    protocol.data_received(b'x' * 15)
+    # Overflow discards buffered data and keeps the last 16 bytes of this
+    # read, i.e., `b'za\n' + b'b' * 13`.
+    protocol.data_received(b'zzzza\n' + b'b' * 13)
+    assert protocol.overflows == 1
+    assert protocol.frames.get_nowait() == b'za'
+    assert protocol.frames.empty()
+
+
+COBS_PAYLOADS = [b'', b'\0', b'\0\0', b'a', b'a\0b', b'\0a\0',
+                 b'x' * 253, b'x' * 254, b'x' * 255, b'x' * 254 + b'\0',
+                 b'\0' + b'x' * 254, b'x' * 508, b'x' * 600 + b'\0' * 3,
+                 bytes(range(256)) * 3]
+
+
+def test_cobs_round_trip():
+    for payload_i in COBS_PAYLOADS:
+        encoded = cobs_encode(payload_i)
+        assert b'\0' not in encoded
+        assert cobs_decode(encoded) == payload_i
+
+
+def test_cobs_encode_runs():
+    # Run of 254 non-zero bytes is a full block (code 255), with no zero.
+    assert cobs_encode(b'x' * 254) == b'\xff' + b'x' * 254 + b'\x01'
+    assert cobs_encode(b'x' * 255) == b'\xff' + b'x' * 254 + b'\x02x'
+    assert cobs_encode(b'a\0b') == b'\x02a\x02b'
+
+
+def test_cobs_decode_invalid():
+    for data_i in (b'\x02a\0', b'\x05ab'):
+        with pytest.raises(ValueError):
+            cobs_decode(data_i)
+
+
+def test_cobs_protocol_chunked():
+    stream = b''.join(cobs_encode(payload_i) + b'\0'
+                      for payload_i in COBS_PAYLOADS)
+    protocol = COBSProtocol()
+    for i in range(0, len(stream), 7):
+        protocol.data_received(stream[i:i + 7])
+    frames = [protocol.frames.get_nowait()
+              for i in range(protocol.frames.qsize())]
+    # An empty payload is encoded as `b'\x01'`, so (unlike empty frames
+    # between delimiters) it is delivered.
+    assert frames == COBS_PAYLOADS
+
+
+SLIP_PAYLOADS = [b'a', b'\xc0', b'\xdb', b'\xdb\xdc', b'\xc0\xdb\xc0',
+                 bytes(range(256))]
+
+
+def test_slip_round_trip():
+    for payload_i in SLIP_PAYLOADS:
+        encoded = slip_encode(payload_i)
+        assert encoded.startswith(SLIP_END) and encoded.endswith(SLIP_END)
+        assert SLIP_END not in encoded[1:-1]
+        assert slip_decode(encoded[1:-1]) == payload_i
+
+
+def test_slip_decode_invalid():
+    for data_i in (b'\xdb', b'a\xdbb'):
+        with pytest.raises(ValueError):
+            slip_decode(data_i)
+
+
+def test_slip_protocol_discards_invalid_frames():
+    protocol = SLIPProtocol()
+    protocol.data_received(slip_encode(b'\xc0a') + b'\xc0\xdbx\xc0' +
+                           slip_encode(b'b'))
+    assert protocol.frames.get_nowait() == b'\xc0a'
+    assert protocol.frames.get_nowait() == b'b'
+    assert protocol.frames.empty()
+    assert protocol.frame_errors == 1
+
+
+def test_length_prefixed_protocol_chunked():
+    payloads = [b'', b'a', b'bc' * 300]
+    stream = b''.join(struct.pack('<H', len(payload_i)) + payload_i
+                      for payload_i in payloads)
+    protocol = LengthPrefixedProtocol('<H')
+    for byte_i in range(len(stream)):
+        protocol.data_received(stream[byte_i:byte_i + 1])
+    assert [protocol.frames.get_nowait() for i in range(3)] == payloads
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from serial_device.or_event import Event, OrEvent, wait_all, wait_any
+
+
+def _set_later(event, delay_s=.05):
+    timer = threading.Timer(delay_s, event.set)
+    timer.start()
+    return timer
+
+
+def test_wait_any_returns_first_set_event():
+    events = [Event(), threading.Event()]
+    assert wait_any(events, timeout=.01) is None
+    _set_later(events[1]).join()
+    assert wait_any(events, timeout=1) is events[1]
+    events[0].set()
+    # First set event in list order.
+    assert wait_any(events, timeout=1) is events[0]
+
+
+def test_wait_any_wakes_on_set():
+    events = [Event(), Event()]
+    _set_later(events[0])
+    start = time.monotonic()
+    assert wait_any(events, timeout=5) is events[0]
+    assert time.monotonic() - start < 1
+
+
+def test_wait_all():
+    events = [Event(), threading.Event()]
+    events[0].set()
+    assert not wait_all(events, timeout=.01)
+    _set_later(events[1])
+    assert wait_all(events, timeout=5)
+
+
+def test_wait_removes_listeners():
+    event = Event()
+    wait_any([event], timeout=.01)
+    wait_all([event], timeout=.01)
+    assert event._listeners == []
+
+
+def test_or_events_share_event():
+    shared = threading.Event()
+    others = [Event(), Event()]
+    or_events = [OrEvent(shared, other_i) for other_i in others]
+    assert not any(or_event_i.is_set() for or_event_i in or_events)
+    # All `OrEvent` instances on an event are notified (not only the most
+    # recently created).
+    shared.set()
+    assert all(or_event_i.is_set() for or_event_i in or_events)
+    shared.clear()
+    assert not any(or_event_i.is_set() for or_event_i in or_events)
+    others[1].set()
+    assert [or_event_i.is_set() for or_event_i in or_events] == [False, True]
+
+
+def test_or_event_initial_state():
+    event = Event()
+    event.set()
+    assert OrEvent(event, Event()).is_set()
+
+
+def test_or_event_stops_listening_once_collected():
+    event = Event()
+    OrEvent(event)
+    assert len(event._listeners) == 1
+    # Listener of collected `OrEvent` is removed on next notification.
+    event.set()
+    assert event._listeners == []
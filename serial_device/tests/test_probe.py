@@ -0,0 +1,92 @@
+import threading
+import time
+
+from serial_device.probe import first_success, map_with_deadline
+
+
+def test_map_with_deadline_results_in_order():
+    def func(item):
+        # Later items finish first.
+        time.sleep(.01 * (3 - item))
+        return item * 2
+
+    assert map_with_deadline(func, range(4), max_workers=4) == [0, 2, 4, 6]
+
+
+def test_map_with_deadline_exception_gives_default():
+    def func(item):
+        if item == 1:
+            raise IOError('Port busy.')
+        return item
+
+    assert map_with_deadline(func, range(3), default=-1) == [0, -1, 2]
+
+
+def test_map_with_deadline_abandons_wedged_calls():
+    release = threading.Event()
+
+    def func(item):
+        if item == 0:
+            release.wait(5)
+        return item
+
+    start = time.monotonic()
+    results = map_with_deadline(func, range(4), timeout_s=.1, max_workers=1,
+                                default='timeout')
+    duration_s = time.monotonic() - start
+    release.set()
+    # Wedged call does not stall remaining items (with a single worker).
+    assert results == ['timeout', 1, 2, 3]
+    assert duration_s < 1
+
+
+def test_first_success_returns_first_successful_item():
+    def func(item):
+        return item != 'bad'
+
+    assert first_success(func, ['bad', 'good'], max_workers=1) == ('good',
+                                                                   True)
+    assert first_success(func, ['bad', 'bad']) is None
+
+
+def test_first_success_exception_counts_as_failure():
+    def func(item):
+        if item == 0:
+            raise IOError('Port busy.')
+        return item
+
+    assert first_success(func, [0, 5], max_workers=1) == (5, 5)
+
+
+def test_first_success_timeout():
+    release = threading.Event()
+    extra = []
+
+    def func(item):
+        release.wait(5)
+        return item
+
+    start = time.monotonic()
+    assert first_success(func, [1, 2], timeout_s=.1,
+                         on_extra_success=lambda item, result:
+                         extra.append(item)) is None
+    assert time.monotonic() - start < 1
+    # Calls that succeed after the time out are passed to
+    # `on_extra_success`.
+    release.set()
+    for i in range(100):
+        if len(extra) == 2:
+            break
+        time.sleep(.01)
+    assert sorted(extra) == [1, 2]
+
+
+def test_first_success_stops_starting_items():
+    started = []
+
+    def func(item):
+        started.append(item)
+        return item == 1
+
+    assert first_success(func, [1, 2, 3], max_workers=1) == (1, True)
+    assert started == [1]
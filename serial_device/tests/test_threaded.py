@@ -0,0 +1,109 @@
+import queue
+import time
+
+import pytest
+
+from serial_device.threaded import RequestEngine
+
+
+class EchoDevice(object):
+    '''
+    Respond to each ``b'<key>:<data>'`` request with ``b'<key>:ok'``, unless
+    key is in :attr:`silent`.  Responses are sent in reverse order of
+    requests once :meth:`flush` is called.
+    '''
+    def __init__(self, response_queue):
+        self.response_queue = response_queue
+        self.silent = set()
+        self.requests = []
+        self.fail = False
+
+    def write(self, data, timeout_s=None):
+        if self.fail:
+            raise IOError('Port disconnected.')
+        self.requests.append(data)
+
+    def flush(self):
+        for request_i in reversed(self.requests):
+            key = request_i.split(b':')[0]
+            if key not in self.silent:
+                self.response_queue.put(key + b':ok')
+        del self.requests[:]
+
+
+def correlation_id(response):
+    return response.split(b':')[0]
+
+
+@pytest.fixture
+def engine():
+    response_queue = queue.Queue()
+    device = EchoDevice(response_queue)
+    engine = RequestEngine(device, response_queue, correlation_id)
+    engine.device = device
+    yield engine
+    engine.close()
+
+
+def test_responses_matched_to_requests(engine):
+    futures = [engine.request(b'%d:req' % i, b'%d' % i) for i in range(10)]
+    engine.device.flush()
+    assert ([future_i.result(1) for future_i in futures] ==
+            [b'%d:ok' % i for i in range(10)])
+    assert engine.unmatched == 0
+
+
+def test_duplicate_key(engine):
+    engine.request(b'a:req', b'a')
+    with pytest.raises(ValueError):
+        engine.request(b'a:req', b'a')
+
+
+def test_timeout_and_late_response_dropped(engine):
+    engine.device.silent.add(b'b')
+    late = engine.request(b'b:req', b'b', timeout_s=.05)
+    engine.device.flush()
+    with pytest.raises(queue.Empty):
+        late.result(1)
+    assert engine.timed_out == 1
+    # Late response must not resolve the next request.
+    engine.response_queue.put(b'b:late')
+    future = engine.request(b'c:req', b'c')
+    engine.device.flush()
+    assert future.result(1) == b'c:ok'
+    for i in range(100):
+        if engine.unmatched:
+            break
+        time.sleep(.01)
+    assert engine.unmatched == 1
+
+
+def test_write_failure(engine):
+    engine.device.fail = True
+    with pytest.raises(IOError):
+        engine.request(b'a:req', b'a').result(1)
+    engine.device.fail = False
+    # Key is free again.
+    engine.request(b'a:req', b'a')
+
+
+def test_bad_correlation_id_dropped(engine):
+    future = engine.request(b'a:req', b'a')
+    engine.response_queue.put(None)
+    engine.device.flush()
+    assert future.result(1) == b'a:ok'
+    assert engine.unmatched == 1
+
+
+def test_close_fails_pending_requests():
+    response_queue = queue.Queue()
+    engine = RequestEngine(EchoDevice(response_queue), response_queue,
+                           correlation_id)
+    future = engine.request(b'a:req', b'a')
+    engine.close()
+    with pytest.raises(RuntimeError):
+        future.result(1)
+    with pytest.raises(RuntimeError):
+        engine.request(b'b:req', b'b')
+    # Engine never puts anything on the response queue.
+    assert response_queue.empty()
@@ -0,0 +1,233 @@
+import queue
+import threading
+import time
+
+import pytest
+import serial
+
+from serial_device.writers import CoalescingWriter, QueuedWriter, ReplayBuffer
+
+
+class Port(object):
+    '''
+    Record writes, optionally failing or accepting only part of each write.
+    '''
+    def __init__(self):
+        self.data = []
+        self.fail = False
+        self.max_size = None
+
+    def write(self, data):
+        if self.fail:
+            raise serial.SerialException('Port disconnected.')
+        size = len(data) if self.max_size is None else min(len(data),
+                                                            self.max_size)
+        self.data.append(bytes(data[:size]))
+        return size
+
+    @property
+    def written(self):
+        return b''.join(self.data)
+
+
+def test_replay_buffers_while_disconnected():
+    port = Port()
+    replay = ReplayBuffer(port.write)
+    replay.write(b'ab')
+    replay.write(b'cd')
+    assert port.data == []
+    assert replay.buffered_bytes == 4
+    assert replay.connected()
+    replay.write(b'ef')
+    assert port.data == [b'ab', b'cd', b'ef']
+    assert replay.stats()['replayed_bytes'] == 4
+
+
+def test_replay_overflow_drops_oldest_whole_writes():
+    port = Port()
+    replay = ReplayBuffer(port.write, max_bytes=5)
+    for data_i in (b'aa', b'bbb', b'cc'):
+        replay.write(data_i)
+    assert replay.dropped_overflow == 2
+    assert replay.connected()
+    assert port.data == [b'bbb', b'cc']
+
+
+def test_replay_partial_write_buffers_rest():
+    port = Port()
+    replay = ReplayBuffer(port.write, max_bytes=4)
+    replay.connected()
+    port.max_size = 2
+    replay.write(b'abcdef')
+    assert replay.buffered_bytes == 4
+    # Rest of partial write is kept on overflow (only whole writes are
+    # dropped), and is not dropped by filter.
+    port.max_size = 0
+    replay.write(b'gh')
+    assert replay.dropped_overflow == 2
+    replay.filter_func = lambda data, age_s: False
+    port.max_size = None
+    assert replay.connected()
+    assert port.written == b'abcdef'
+
+
+def test_replay_retries_failed_writes_while_connected():
+    port = Port()
+    replay = ReplayBuffer(port.write)
+    replay.connected()
+    port.fail = True
+    replay.write(b'ab')
+    assert replay.buffered_bytes == 2
+    port.fail = False
+    # Buffered data is written first, without waiting for a reconnect.
+    replay.write(b'cd')
+    assert port.data == [b'ab', b'cd']
+    assert replay.buffered_bytes == 0
+
+
+def test_replay_failure_keeps_remaining_writes():
+    port = Port()
+    replay = ReplayBuffer(port.write)
+    replay.write(b'ab')
+    port.fail = True
+    assert not replay.connected()
+    assert replay.buffered_bytes == 2
+    port.fail = False
+    assert replay.connected()
+    assert port.data == [b'ab']
+
+
+def test_replay_drops_stale_and_filtered_writes():
+    port = Port()
+    replay = ReplayBuffer(port.write, max_age_s=60,
+                          filter_func=lambda data, age_s: data != b'skip')
+    replay.write(b'old')
+    replay._buffer[0] = (replay._buffer[0][0] - 120, b'old')
+    replay.write(b'skip')
+    replay.write(b'new')
+    assert replay.connected()
+    assert port.data == [b'new']
+    assert replay.dropped_stale == 3
+    assert replay.dropped_filtered == 4
+    assert replay.clear() == 0
+
+
+def test_coalescing_writer_flush():
+    port = Port()
+    writer = CoalescingWriter(port.write, window_s=60)
+    writer.write(b'ab')
+    writer.write(b'cd')
+    assert port.data == []
+    writer.flush()
+    assert port.data == [b'abcd']
+    writer.write(b'ef', flush=True)
+    assert port.data == [b'abcd', b'ef']
+    assert writer.stats()['syscalls_saved'] == 1
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.write(b'gh')
+
+
+def test_coalescing_writer_flushes_at_max_bytes_and_window():
+    port = Port()
+    writer = CoalescingWriter(port.write, window_s=.01, max_bytes=4)
+    writer.write(b'abcd')
+    assert port.data == [b'abcd']
+    writer.write(b'e')
+    time.sleep(.2)
+    assert port.data == [b'abcd', b'e']
+    writer.close()
+
+
+def test_coalescing_writer_reports_background_error():
+    port = Port()
+    port.fail = True
+    writer = CoalescingWriter(port.write, window_s=.01)
+    writer.write(b'ab')
+    time.sleep(.2)
+    assert writer.errors == 1
+    with pytest.raises(serial.SerialException):
+        writer.write(b'cd')
+    port.fail = False
+    writer.write(b'ef', flush=True)
+    assert port.data == [b'ef']
+    writer.close()
+
+
+def test_queued_writer_writes_in_order():
+    port = Port()
+    writer = QueuedWriter(port.write)
+    futures = [writer.write(data_i) for data_i in (b'a', b'bc', b'def')]
+    assert [future_i.result(1) for future_i in futures] == [1, 2, 3]
+    assert port.written == b'abcdef'
+    writer.close()
+    assert writer.stats()['written'] == 3
+    with pytest.raises(RuntimeError):
+        writer.write(b'g')
+
+
+def _blocked_writer(overflow):
+    '''
+    Returns
+    -------
+    tuple
+        Writer with full queue (of size 1), event to set to start writing,
+        and futures of queued writes.
+    '''
+    port = Port()
+    ready = threading.Event()
+    writer = QueuedWriter(port.write, maxsize=1, overflow=overflow,
+                          ready=ready)
+    futures = [writer.write(b'a')]
+    # Wait for thread to take first write, and wait for ready event.
+    for i in range(100):
+        if not writer.stats()['queued']:
+            break
+        time.sleep(.01)
+    futures.append(writer.write(b'b'))
+    return writer, ready, futures
+
+
+def test_queued_writer_block():
+    writer, ready, _ = _blocked_writer('block')
+    with pytest.raises(queue.Full):
+        writer.write(b'c', timeout_s=.05)
+    ready.set()
+    assert writer.write(b'c', timeout_s=1).result(1) == 1
+    writer.close()
+
+
+def test_queued_writer_drop():
+    writer, ready, _ = _blocked_writer('drop')
+    future = writer.write(b'c')
+    with pytest.raises(queue.Full):
+        future.result(1)
+    assert writer.dropped == 1
+    ready.set()
+    writer.close()
+
+
+def test_queued_writer_raise():
+    writer, ready, _ = _blocked_writer('raise')
+    with pytest.raises(queue.Full):
+        writer.write(b'c')
+    ready.set()
+    writer.close()
+
+
+def test_queued_writer_close_fails_unwritten_data():
+    writer, ready, futures = _blocked_writer('block')
+    writer.close()
+    for future_i in futures:
+        with pytest.raises(RuntimeError):
+            future_i.result(1)
+
+
+def test_queued_writer_write_failure():
+    port = Port()
+    port.fail = True
+    writer = QueuedWriter(port.write)
+    with pytest.raises(serial.SerialException):
+        writer.write(b'a').result(1)
+    assert writer.failed == 1
+    writer.close()
@@ -1,14 +1,24 @@
+import concurrent.futures
+import heapq
+import itertools
 import queue
 import logging
 import platform
 import threading
+import time
 
-import datetime as dt
 import serial
 import serial.threaded
 import serial_device
 
-from .or_event import OrEvent
+from .buffer import BUFFER_SIZE, MAX_BUFFER_SIZE, RingBuffer
+from . import hotplug
+from .or_event import Event, wait_any
+from . import selector
+from .reconnect import ReconnectSupervisor
+from .waiter import DEFAULT_WAITER, HybridWaiter
+from .writers import (COALESCE_MAX_BYTES, WRITE_QUEUE_SIZE, CoalescingWriter,
+                      QueuedWriter, ReplayBuffer)
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +31,8 @@ POLL_QUEUES = (platform.system() == 'Windows')
 class EventProtocol(serial.threaded.Protocol):
     def __init__(self):
         self.transport = None
-        self.connected = threading.Event()
-        self.disconnected = threading.Event()
+        self.connected = Event()
+        self.disconnected = Event()
         self.port = None
 
     def connection_made(self, transport):
@@ -51,6 +61,90 @@ class EventProtocol(serial.threaded.Protocol):
         self.disconnected.set()
 
 
+class BufferedEventProtocol(EventProtocol):
+    '''
+    :class:`EventProtocol` that collects received data in a preallocated
+    :class:`serial_device.buffer.RingBuffer`.
+
+    Subclasses must implement :meth:`parse`, which is called each time data
+    is added to :attr:`buffer`.
+
+    If served by a :class:`serial_device.selector.SelectorTransport`, data is
+    read from the port straight into :attr:`buffer` (see :meth:`get_buffer`).
+
+    If more than :attr:`max_buffer_size` bytes of unparsed data would be
+    held, unparsed data is discarded (and :attr:`overflows` is incremented).
+
+    .. versionadded:: 0.11
+
+    Attributes
+    ----------
+    buffer : serial_device.buffer.RingBuffer
+        Received data not yet consumed by :meth:`parse`.
+    overflows : int
+        Number of times unparsed data was discarded.
+    '''
+    #: Initial size (in bytes) of receive buffer.
+    buffer_size = BUFFER_SIZE
+    #: Maximum number of unparsed bytes held.
+    max_buffer_size = MAX_BUFFER_SIZE
+
+    def __init__(self):
+        super(BufferedEventProtocol, self).__init__()
+        self.buffer = RingBuffer(self.buffer_size, self.max_buffer_size)
+        self.overflows = 0
+
+    def _overflow(self):
+        logger.warning('Receive buffer for port `%s` full.  Discarding %d '
+                       'unparsed bytes.', self.port, len(self.buffer))
+        self.overflows += 1
+        self.buffer.clear()
+
+    def data_received(self, data):
+        try:
+            self.buffer.write(data)
+        except BufferError:
+            self._overflow()
+            self.buffer.write(memoryview(data)[-self.buffer.max_size:])
+        self.parse(self.buffer)
+
+    def get_buffer(self, sizehint):
+        '''
+        Returns
+        -------
+        memoryview
+            Writable view to read up to :data:`sizehint` bytes into (see
+            :class:`asyncio.BufferedProtocol`).
+        '''
+        size = max(1, min(sizehint, self.buffer.max_size - len(self.buffer)))
+        try:
+            return self.buffer.reserve(size)
+        except BufferError:
+            self._overflow()
+            return self.buffer.reserve(size)
+
+    def buffer_updated(self, nbytes):
+        self.buffer.commit(nbytes)
+        self.parse(self.buffer)
+
+    def parse(self, buffer):
+        '''
+        Parse received data.
+
+        Inspect unread data using :meth:`~serial_device.buffer.RingBuffer.view`
+        or :meth:`~serial_device.buffer.RingBuffer.find`, and discard each
+        parsed frame using
+        :meth:`~serial_device.buffer.RingBuffer.consume`.  Data that is not
+        consumed (e.g., a partial frame) is kept for the next call.
+
+        Parameters
+        ----------
+        buffer : serial_device.buffer.RingBuffer
+            Receive buffer.
+        '''
+        raise NotImplementedError
+
+
 class KeepAliveReader(threading.Thread):
     '''
     Keep a serial connection alive (as much as possible).
@@ -65,6 +159,67 @@ class KeepAliveReader(threading.Thread):
         Default time to wait for serial operation (e.g., connect).
 
         By default, block (i.e., no time out).
+    coalesce_window_s : float, optional
+        If set, coalesce small writes into a single write to the port, held
+        for at most this many seconds (see
+        :class:`serial_device.writers.CoalescingWriter`).
+
+        By default, each call to :meth:`write` writes to the port immediately.
+
+        .. versionadded:: 0.11
+    coalesce_max_bytes : int, optional
+        Number of buffered bytes at which coalesced writes are flushed
+        immediately.
+
+        .. versionadded:: 0.11
+    write_queue : bool, optional
+        If ``True``, write from a dedicated thread (see
+        :class:`serial_device.writers.QueuedWriter`).  :meth:`write` then
+        returns a future immediately, even while the port is reconnecting.
+
+        Cannot be combined with :data:`coalesce_window_s` or
+        :data:`replay_max_bytes`.
+
+        .. versionadded:: 0.11
+    write_queue_size : int, optional
+        Maximum number of queued writes.
+
+        .. versionadded:: 0.11
+    write_overflow : str, optional
+        What :meth:`write` does when the write queue is full: ``'block'``
+        (default), ``'drop'`` or ``'raise'``.
+
+        .. versionadded:: 0.11
+    use_selector : bool, optional
+        If ``True``, serve reads from the shared selector thread (see
+        :mod:`serial_device.selector`) instead of starting a
+        :class:`serial.threaded.ReaderThread` for the port.  Falls back to a
+        :class:`serial.threaded.ReaderThread` for ports without a file
+        descriptor (e.g., on Windows).
+
+        .. versionadded:: 0.11
+    backoff : serial_device.reconnect.Backoff, optional
+        Delays between checks for a disconnected port to become available
+        again.  A hotplug event for an added port ends a wait immediately.
+
+        .. versionadded:: 0.11
+    replay_max_bytes : int, optional
+        If set, hold up to this many bytes of writes while the port is
+        disconnected, and write them (in order) once reconnected (see
+        :class:`serial_device.writers.ReplayBuffer`).  :meth:`write` then
+        never waits for the serial connection.
+
+        .. versionadded:: 0.11
+    replay_max_age_s : float, optional
+        Maximum age (in seconds) of a held write to replay.
+
+        .. versionadded:: 0.11
+    replay_filter : callable, optional
+        Function called as ``replay_filter(data, age_s)`` for each held write
+        before it is replayed; the write is dropped unless it returns
+        ``True``.
+
+        .. versionadded:: 0.11
     **kwargs
         Keyword arguments passed to ``serial_for_url`` function, e.g.,
         ``baudrate``, etc.
@@ -77,32 +232,97 @@ class KeepAliveReader(threading.Thread):
         self.kwargs = kwargs
         self.protocol = None
         self.default_timeout_s = kwargs.pop('default_timeout_s', None)
+        coalesce_window_s = kwargs.pop('coalesce_window_s', None)
+        coalesce_max_bytes = kwargs.pop('coalesce_max_bytes',
+                                        COALESCE_MAX_BYTES)
+        write_queue = kwargs.pop('write_queue', False)
+        write_queue_size = kwargs.pop('write_queue_size', WRITE_QUEUE_SIZE)
+        write_overflow = kwargs.pop('write_overflow', 'block')
+        self.use_selector = kwargs.pop('use_selector', False)
+        backoff = kwargs.pop('backoff', None)
+        replay_max_bytes = kwargs.pop('replay_max_bytes', None)
+        replay_max_age_s = kwargs.pop('replay_max_age_s', None)
+        replay_filter = kwargs.pop('replay_filter', None)
 
         # Event to indicate serial connection has been established.
-        self.connected = threading.Event()
+        self.connected = Event()
+
+        if replay_max_bytes is not None:
+            self.replay = ReplayBuffer(self._write, replay_max_bytes,
+                                       replay_max_age_s, replay_filter)
+            write_func = self.replay.write
+        else:
+            self.replay = None
+            write_func = self._write
+
+        if write_queue and coalesce_window_s is not None:
+            raise ValueError('`write_queue` and `coalesce_window_s` cannot be '
+                             'combined.')
+        elif write_queue and self.replay is not None:
+            raise ValueError('`write_queue` and `replay_max_bytes` cannot be '
+                             'combined.')
+        elif write_queue:
+            self.writer = QueuedWriter(self._write, write_queue_size,
+                                       write_overflow, ready=self.connected)
+        elif coalesce_window_s is not None:
+            # Coalesced writes are held by the replay buffer (if enabled)
+            # while disconnected.
+            self.writer = CoalescingWriter(write_func, coalesce_window_s,
+                                           coalesce_max_bytes)
+        else:
+            self.writer = None
+
         # Event to request a break from the run loop.
-        self.close_request = threading.Event()
+        self.close_request = Event()
         # Event to indicate thread has been closed.
-        self.closed = threading.Event()
+        self.closed = Event()
         # Event to indicate an exception has occurred.
-        self.error = threading.Event()
+        self.error = Event()
         # Event to indicate that the thread has connected to the specified port
         # **at least once**.
-        self.has_connected = threading.Event()
+        self.has_connected = Event()
+        # Event to wake the reconnect loop, i.e., when a port is added or a
+        # close is requested.
+        self.port_changed = Event()
+        self.supervisor = ReconnectSupervisor(comport, self.port_changed,
+                                              self.close_request,
+                                              backoff=backoff)
+
+    @property
+    def reconnect_stats(self):
+        '''
+        dict : Reconnection statistics (see
+        :meth:`serial_device.reconnect.ReconnectStats.as_dict`).
+
+        .. versionadded:: 0.11
+        '''
+        return self.supervisor.stats.as_dict()
 
     @property
     def alive(self):
         return not self.closed.is_set()
 
+    def _on_hotplug(self, action, port):
+        if action == 'add':
+            self.port_changed.set()
+
     def run(self):
+        hotplug.subscribe(self._on_hotplug)
+        try:
+            self._run()
+        finally:
+            hotplug.unsubscribe(self._on_hotplug)
+
+    def _run(self):
         # Verify requested serial port is available.
         try:
             if self.comport not in (serial_device
                                     .comports(only_available=True).index):
                 raise NameError('Port `%s` not available.  Available ports: '
                                 '`%s`' % (self.comport,
-                                          ', '.join(serial_device.comports()
-                                                    .index)))
+                                          ', '.join(serial_device
+                                                    .comports(check_available=
+                                                              False).index)))
         except NameError as exception:
             self.error.exception = exception
             self.error.set()
@@ -110,22 +330,31 @@ class KeepAliveReader(threading.Thread):
             return
 
         while True:
-            # Wait for requested serial port to become available.
-            while self.comport not in (serial_device
-                                       .comports(only_available=True).index):
-                # Assume serial port was disconnected temporarily.  Wait and
-                # periodically check again.
-                self.close_request.wait(2)
-                if self.close_request.is_set():
-                    # No connection is open, so nothing to close.  Just quit.
-                    self.closed.set()
-                    return
+            # Wait for requested serial port to become available.  Only the
+            # requested port is checked, with exponential backoff between
+            # checks; a hotplug event or close request ends a wait early.
+            if not self.supervisor.wait_available():
+                # No connection is open, so nothing to close.  Just quit.
+                self.closed.set()
+                return
             try:
                 # Try to open serial device and monitor connection status.
                 logger.debug('Open `%s` and monitor connection status',
                              self.comport)
                 device = serial.serial_for_url(self.comport, **self.kwargs)
             except serial.SerialException as exception:
+                if self.has_connected.is_set():
+                    # Port may reappear before it is ready to be opened (e.g.,
+                    # before `udev` has applied permissions).  Wait for the
+                    # next hotplug event (or backoff delay) and try again.
+                    logger.debug('Error reconnecting to `%s`: %s',
+                                 self.comport, exception)
+                    self.supervisor.connect_failed()
+                    self.port_changed.clear()
+                    if not self.supervisor.wait():
+                        self.closed.set()
+                        return
+                    continue
                 self.error.exception = exception
                 self.error.set()
                 self.closed.set()
@@ -136,62 +365,113 @@ class KeepAliveReader(threading.Thread):
                 self.closed.set()
                 return
             else:
-                with serial.threaded.ReaderThread(device, self
-                                                  .protocol_class) as protocol:
+                if self.use_selector and selector.supported(device):
+                    reader_class = selector.SelectorTransport
+                else:
+                    reader_class = serial.threaded.ReaderThread
+                with reader_class(device, self.protocol_class) as protocol:
                     self.protocol = protocol
 
-                    connected_event = OrEvent(protocol.connected,
-                                              self.close_request)
-                    disconnected_event = OrEvent(protocol.disconnected,
-                                                 self.close_request)
-
                     # Wait for connection.
-                    connected_event.wait(None if self.has_connected.is_set()
-                                         else self.default_timeout_s)
+                    wait_any([protocol.connected, self.close_request],
+                             None if self.has_connected.is_set()
+                             else self.default_timeout_s)
                     if self.close_request.is_set():
                         # Quit run loop.  Serial connection will be closed by
                         # `ReaderThread` context manager.
                         self.closed.set()
                         return
+                    self.supervisor.connected()
+                    if self.replay is not None:
+                        # Write held data before any new writes.
+                        self.replay.connected()
                     self.connected.set()
                     self.has_connected.set()
                     # Wait for disconnection.
-                    disconnected_event.wait()
+                    wait_any([protocol.disconnected, self.close_request])
                     if self.close_request.is_set():
                         # Quit run loop.
                         self.closed.set()
                         return
+                    self.supervisor.disconnected()
                     self.connected.clear()
+                    if self.replay is not None:
+                        self.replay.disconnected()
                     # Loop to try to reconnect to serial device.
 
-    def write(self, data, timeout_s=None):
+    def write(self, data, timeout_s=None, flush=False):
         '''
         Write to serial port.
 
         Waits for serial connection to be established before writing.
 
+        .. versionchanged:: 0.11
+            If write coalescing is enabled (see :data:`coalesce_window_s`),
+            buffer data to be written with other writes.
+
+            If the write queue is enabled (see :data:`write_queue`), queue
+            data without waiting for the serial connection and return a
+            future.
+
+            If the replay buffer is enabled (see :data:`replay_max_bytes`),
+            hold data while disconnected, without waiting for the serial
+            connection.
+
         Parameters
         ----------
         data : str or bytes
             Data to write to serial port.
         timeout_s : float, optional
             Maximum number of seconds to wait for serial connection to be
-            established.
+            established (or, if the write queue is enabled, for space in the
+            queue).
 
             By default, block until serial connection is ready.
+        flush : bool, optional
+            If ``True`` and write coalescing is enabled, write buffered data
+            (including :data:`data`) immediately.
+
+            .. versionadded:: 0.11
+
+        Returns
+        -------
+        concurrent.futures.Future or None
+            If the write queue is enabled, future resolved with the number of
+            bytes written once the data has been written to the port.
         '''
-        self.connected.wait(timeout_s)
-        self.protocol.transport.write(data)
+        if isinstance(self.writer, QueuedWriter):
+            return self.writer.write(data, timeout_s=timeout_s)
+        if self.replay is None:
+            self.connected.wait(timeout_s)
+        if self.writer is not None:
+            self.writer.write(data, flush=flush)
+        elif self.replay is not None:
+            self.replay.write(data)
+        else:
+            self._write(data)
+
+    def _write(self, data):
+        return self.protocol.transport.write(data)
 
-    def request(self, response_queue, payload, timeout_s=None,
-                poll=POLL_QUEUES):
+    def flush(self):
+        '''
+        Write any coalesced writes immediately.
+
+        .. versionadded:: 0.11
+        '''
+        if isinstance(self.writer, CoalescingWriter):
+            self.writer.flush()
+
+    def request(self, response_queue, payload, timeout_s=None, poll=None):
         '''
         Send
 
+        .. versionchanged:: 0.11
+            If write coalescing is enabled, flush :data:`payload` (and any
+            buffered writes) immediately.
+
         Parameters
         ----------
-        device : serial.Serial
-            Serial instance.
         response_queue : Queue.Queue
             Queue to wait for response on.
         payload : str or bytes
@@ -200,20 +480,20 @@ class KeepAliveReader(threading.Thread):
             Maximum time to wait (in seconds) for response.
 
             By default, block until response is ready.
-        poll : bool, optional
-            If ``True``, poll response queue in a busy loop until response is
-            ready (or timeout occurs).
-
-            Polling is much more processor intensive, but (at least on Windows)
-            results in faster response processing.  On Windows, polling is
-            enabled by default.
+        poll : bool or serial_device.waiter.HybridWaiter, optional
+            See :func:`request`.
         '''
-        self.connected.wait(timeout_s)
-        return request(self, response_queue, payload, timeout_s=timeout_s,
-                       poll=poll)
+        self.write(payload, timeout_s=timeout_s, flush=True)
+        return _get_response(response_queue, timeout_s, poll)
 
     def close(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:
+                logger.debug('Error flushing writes.', exc_info=True)
         self.close_request.set()
+        self.port_changed.set()
 
     # - -  context manager, returns protocol
 
@@ -224,8 +504,7 @@ class KeepAliveReader(threading.Thread):
         """
         self.start()
         # Wait for protocol to connect.
-        event = OrEvent(self.connected, self.closed)
-        event.wait(self.default_timeout_s)
+        wait_any([self.connected, self.closed], self.default_timeout_s)
         return self
 
     def __exit__(self, *args):
@@ -234,10 +513,15 @@ class KeepAliveReader(threading.Thread):
         self.closed.wait()
 
 
-def request(device, response_queue, payload, timeout_s=None, poll=POLL_QUEUES):
+def request(device, response_queue, payload, timeout_s=None, poll=None):
     '''
     Send payload to serial device and wait for response.
 
+    .. versionchanged:: 0.11
+        Spin for a short (calibrated) window, then block, instead of polling
+        in a busy loop for the whole timeout.  :data:`poll` defaults to the
+        value of :data:`POLL_QUEUES` at call time, rather than at import time.
+
     Parameters
     ----------
     device : serial.Serial
@@ -250,23 +534,256 @@ def request(device, response_queue, payload, timeout_s=None, poll=POLL_QUEUES):
         Maximum time to wait (in seconds) for response.
 
         By default, block until response is ready.
-    poll : bool, optional
-        If ``True``, poll response queue in a busy loop until response is
-        ready (or timeout occurs).
+    poll : bool or serial_device.waiter.HybridWaiter, optional
+        If ``True``, spin briefly before blocking on the response queue (see
+        :class:`serial_device.waiter.HybridWaiter`).  Pass a
+        :class:`serial_device.waiter.HybridWaiter` instance to use its spin
+        window and collect its latency statistics.
+
+        Spinning uses more processor time, but (at least on Windows) results
+        in faster response processing.
 
-        Polling is much more processor intensive, but (at least on Windows)
-        results in faster response processing.  On Windows, polling is
-        enabled by default.
+        Default: :data:`POLL_QUEUES`, read at call time (i.e., ``True`` on
+        Windows).
     '''
     device.write(payload)
-    if poll:
-        # Polling enabled.  Wait for response in busy loop.
-        start = dt.datetime.now()
-        while not response_queue.qsize():
-            if (dt.datetime.now() - start).total_seconds() > timeout_s:
-                raise queue.Empty('No response received.')
-        return response_queue.get()
+    return _get_response(response_queue, timeout_s, poll)
+
+
+def _get_response(response_queue, timeout_s, poll):
+    if poll is None:
+        poll = POLL_QUEUES
+    if isinstance(poll, HybridWaiter):
+        return poll.get(response_queue, timeout_s=timeout_s)
+    elif poll:
+        # Spin briefly, then block, to wait for response.
+        return DEFAULT_WAITER.get(response_queue, timeout_s=timeout_s)
     else:
         # Polling disabled.  Use blocking `Queue.get()` method to wait for
         # response.
         return response_queue.get(timeout=timeout_s)
+
+
+#: Interval (in seconds) between checks for a close request while a
+#: :class:`RequestEngine` waits for responses.
+CLOSE_CHECK_INTERVAL_S = .1
+
+
+class RequestEngine(object):
+    '''
+    Send pipelined requests, i.e., keep many requests outstanding, and match
+    each response to its request by correlation ID.
+
+    Unlike :func:`request`, a response that arrives after its request timed
+    out is dropped, rather than returned as the response to the next request.
+
+    A dispatcher thread consumes :data:`response_queue`, so no other code
+    should read from it while the engine is running.  The engine never puts
+    anything on :data:`response_queue`; requests time out from a separate
+    timer thread.
+
+    .. versionadded:: 0.11
+
+    Parameters
+    ----------
+    device : KeepAliveReader
+        Device to write requests to (i.e., any object with a
+        ``write(data, timeout_s=None)`` method).
+    response_queue : queue.Queue
+        Queue that responses are put on (e.g., by protocol).
+    correlation_id : callable
+        Function returning correlation ID of a response, i.e.,
+        ``correlation_id(response)``.  Responses for which an exception is
+        raised are dropped.
+    default_timeout_s : float, optional
+        Default time to wait (in seconds) for each response.
+
+        By default, wait indefinitely.
+
+    Attributes
+    ----------
+    unmatched : int
+        Number of responses dropped, since they matched no pending request
+        (e.g., a response to a request that timed out).
+    timed_out : int
+        Number of requests that timed out.
+    '''
+    def __init__(self, device, response_queue, correlation_id,
+                 default_timeout_s=None):
+        self.device = device
+        self.response_queue = response_queue
+        self.correlation_id = correlation_id
+        self.default_timeout_s = default_timeout_s
+        self.unmatched = 0
+        self.timed_out = 0
+        self._lock = threading.Lock()
+        # Notified when a deadline is added or a close is requested.
+        self._condition = threading.Condition(self._lock)
+        # Pending futures, keyed by correlation ID.
+        self._pending = {}
+        # Heap of ``(deadline, sequence number, correlation ID, future)``.
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self._close_request = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        self._timer_thread = threading.Thread(target=self._run_timer)
+        self._timer_thread.daemon = True
+        self._timer_thread.start()
+
+    def request(self, payload, key, timeout_s=None):
+        '''
+        Send request without waiting for response.
+
+        Parameters
+        ----------
+        payload : str or bytes
+            Payload to send.
+        key : hashable
+            Correlation ID of response to request, i.e., the value
+            ``correlation_id(response)`` returns for the expected response.
+        timeout_s : float, optional
+            Maximum time to wait (in seconds) for response, including time to
+            wait for the serial connection to be established.
+
+            Default: :attr:`default_timeout_s`
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future resolved with response.  If no response is received in
+            time, the future raises :class:`queue.Empty`.
+
+        Raises
+        ------
+        ValueError
+            If a request with the same correlation ID is already pending.
+        RuntimeError
+            If the engine is closed.
+        '''
+        if timeout_s is None:
+            timeout_s = self.default_timeout_s
+        future = concurrent.futures.Future()
+        # Request is sent immediately, so it cannot be cancelled.
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            if self._close_request.is_set():
+                raise RuntimeError('Request engine is closed.')
+            if key in self._pending:
+                raise ValueError('Request `%s` already pending.' % (key, ))
+            # Register request *before* writing, in case response arrives
+            # before write returns.
+            self._pending[key] = future
+            if timeout_s is not None:
+                heapq.heappush(self._deadlines,
+                               (time.monotonic() + timeout_s,
+                                next(self._sequence), key, future))
+                # Wake timer thread to update time until next deadline.
+                self._condition.notify()
+        try:
+            self.device.write(payload, timeout_s=timeout_s)
+        except Exception as exception:
+            self._resolve(key, future, exception=exception)
+        return future
+
+    def _resolve(self, key, future, result=None, exception=None):
+        with self._lock:
+            if self._pending.get(key) is not future:
+                # Already resolved.
+                return False
+            del self._pending[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+        return True
+
+    def _pop_expired(self):
+        '''
+        Remove requests that are past their deadline.
+
+        Must be called with ``self._lock`` held.
+
+        Returns
+        -------
+        tuple
+            ``(expired, remaining)``, where ``expired`` is a list of futures
+            of requests that timed out, and ``remaining`` is the time (in
+            seconds) until the next deadline, or ``None`` if no request has a
+            deadline.
+        '''
+        expired = []
+        now = time.monotonic()
+        while self._deadlines:
+            deadline, _, key, future = self._deadlines[0]
+            if deadline > now and not future.done():
+                return expired, deadline - now
+            heapq.heappop(self._deadlines)
+            if self._pending.get(key) is future:
+                del self._pending[key]
+                expired.append(future)
+        return expired, None
+
+    def _run_timer(self):
+        while True:
+            with self._condition:
+                expired, remaining = self._pop_expired()
+                if not expired:
+                    if self._close_request.is_set():
+                        return
+                    self._condition.wait(remaining)
+                    continue
+            for future_i in expired:
+                self.timed_out += 1
+                future_i.set_exception(queue.Empty('No response received.'))
+
+    def _run(self):
+        while not self._close_request.is_set():
+            try:
+                response = self.response_queue.get(timeout=
+                                                   CLOSE_CHECK_INTERVAL_S)
+            except queue.Empty:
+                continue
+            try:
+                key = self.correlation_id(response)
+            except Exception:
+                logger.debug('Error extracting correlation ID from response: '
+                             '`%s`', response, exc_info=True)
+                self.unmatched += 1
+                continue
+            with self._lock:
+                future = self._pending.get(key)
+            if future is None or not self._resolve(key, future,
+                                                   result=response):
+                logger.debug('Drop unmatched response: `%s`', response)
+                self.unmatched += 1
+
+    def close(self):
+        '''
+        Stop dispatcher and timer threads.
+
+        Waits up to :data:`CLOSE_CHECK_INTERVAL_S` for the dispatcher to stop
+        waiting on the response queue.  Pending requests fail with
+        :class:`RuntimeError`.
+        '''
+        with self._condition:
+            self._close_request.set()
+            self._condition.notify()
+        self._thread.join()
+        self._timer_thread.join()
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+            self._deadlines = []
+        for key_i, future_i in pending:
+            future_i.set_exception(RuntimeError('Request engine closed before '
+                                                'response to `%s` was '
+                                                'received.' % (key_i, )))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
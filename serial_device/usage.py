@@ -0,0 +1,173 @@
+'''
+Check whether serial ports are in use *without* opening them.
+
+Opening a port to test whether it is free is slow, may reset the connected
+device (e.g., Arduino-class boards reset when DTR is asserted on open), and
+races with other processes.  Instead, a port is considered unavailable if
+the current user does not have read and write permission on the device (see
+:func:`os.access`), or in use if:
+
+ - any process has the device open (see ``/proc/<pid>/fd``), which also
+   covers processes holding the port in exclusive mode (``TIOCEXCL`` or
+   ``flock``), since exclusive access requires an open file descriptor; or
+ - a UUCP-style lock file (e.g., ``/var/lock/LCK..ttyUSB0``) names a live
+   process.
+
+Note that file descriptors of processes owned by other users are only
+visible to privileged users.
+
+.. versionadded:: 0.11
+'''
+import errno
+import os
+
+from .cache import TTLCache
+
+
+#: Directories to search for UUCP-style lock files.
+LOCK_DIRS = ('/var/lock', '/run/lock', '/var/lock/lockdev', '/var/spool/locks')
+
+#: Cache of open device paths; the ``/proc`` scan is shared by all ports
+#: checked within :attr:`TTLCache.ttl_s` seconds.
+USAGE_CACHE = TTLCache(ttl_s=.5)
+
+
+def supported():
+    '''
+    Returns
+    -------
+    bool
+        ``True`` if open file descriptors of processes can be inspected on this
+        system (i.e., ``/proc/self/fd`` exists).
+    '''
+    return os.path.isdir('/proc/self/fd')
+
+
+def _open_device_paths():
+    '''
+    Returns
+    -------
+    frozenset
+        Paths of devices (i.e., in ``/dev``) opened by any visible process.
+    '''
+    paths = set()
+    for entry_i in os.scandir('/proc'):
+        if not entry_i.name.isdigit():
+            continue
+        fd_dir = os.path.join(entry_i.path, 'fd')
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            # Process exited, or file descriptors are not visible.
+            continue
+        for fd_j in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd_j))
+            except OSError:
+                continue
+            if target.startswith('/dev/'):
+                paths.add(target)
+    return frozenset(paths)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as exception:
+        # `EPERM` means the process exists, but is owned by another user.
+        return exception.errno == errno.EPERM
+    return True
+
+
+def _locked(name):
+    '''
+    Parameters
+    ----------
+    name : str
+        Device name, e.g., ``'ttyUSB0'``.
+
+    Returns
+    -------
+    bool
+        ``True`` if a lock file for the device names a live process.
+    '''
+    for dir_i in LOCK_DIRS:
+        try:
+            with open(os.path.join(dir_i, 'LCK..' + name), 'rb') as input_:
+                data = input_.read(64)
+        except (IOError, OSError):
+            continue
+        try:
+            # ASCII process ID (HDB UUCP style).
+            pid = int(data.strip())
+        except ValueError:
+            if len(data) < 4:
+                continue
+            # Binary process ID (older UUCP style).
+            pid = int.from_bytes(data[:4], 'little')
+        if pid > 0 and _pid_alive(pid):
+            return True
+    return False
+
+
+def port_available(port, use_cache=True):
+    '''
+    Check whether a serial port is free, without opening it.
+
+    Parameters
+    ----------
+    port : str
+        Name of serial port, e.g., ``'/dev/ttyUSB0'``.
+    use_cache : bool, optional
+        If ``True``, reuse recent scan of open file descriptors from
+        :data:`USAGE_CACHE`.
+
+    Returns
+    -------
+    bool or None
+        ``True`` if the port exists, may be opened by the current user, and
+        is not in use, ``False`` if the port does not exist, may not be
+        opened (e.g., user is not in the ``dialout`` group), or is in use, or
+        ``None`` if usage cannot be determined
+        on this system (e.g., on Windows).
+    '''
+    return ports_available([port], use_cache=use_cache)[0]
+
+
+def ports_available(ports, use_cache=True):
+    '''
+    Check whether each serial port is free, without opening any of them.
+
+    Parameters
+    ----------
+    ports : list
+        Names of serial ports.
+    use_cache : bool, optional
+        If ``True``, reuse recent scan of open file descriptors from
+        :data:`USAGE_CACHE`.
+
+    Returns
+    -------
+    list
+        Result of :func:`port_available` for each port.
+    '''
+    ports = list(ports)
+    if not supported():
+        return [None] * len(ports)
+    if use_cache:
+        open_paths = USAGE_CACHE.get('open_device_paths', _open_device_paths)
+    else:
+        open_paths = _open_device_paths()
+
+    available = []
+    for port_i in ports:
+        path_i = os.path.realpath(port_i)
+        if not os.path.exists(path_i):
+            available.append(False)
+        elif not os.access(path_i, os.R_OK | os.W_OK):
+            # Opening the port would fail with a permission error.
+            available.append(False)
+        else:
+            available.append(path_i not in open_paths and
+                             not _locked(os.path.basename(path_i)))
+    return available
@@ -0,0 +1,238 @@
+'''
+Low-latency waits for responses on a :class:`queue.Queue`.
+
+A blocking :meth:`queue.Queue.get` sleeps on a condition variable, so each
+response incurs the latency of waking the waiting thread.  A busy loop
+avoids the wake-up, but burns a whole processor core for as long as it waits.
+
+:class:`HybridWaiter` spins for a short window (which is calibrated from the
+measured wake-up latency of a blocking wait), then falls back to a blocking
+wait for the rest of the timeout.
+
+.. versionadded:: 0.11
+'''
+import queue
+import threading
+import time
+
+#: Default maximum spin window (in seconds).
+MAX_SPIN_S = 1e-3
+#: Spin window, as a multiple of the median wake-up latency of a blocking
+#: wait.
+SPIN_FACTOR = 2.
+#: Number of wake-ups to measure when calibrating spin window.
+CALIBRATION_SAMPLES = 20
+
+
+def measure_wakeup_ns(samples=CALIBRATION_SAMPLES):
+    '''
+    Measure latency of waking a thread blocked on :meth:`queue.Queue.get`.
+
+    Parameters
+    ----------
+    samples : int, optional
+        Number of wake-ups to measure.
+
+    Returns
+    -------
+    list(int)
+        Latency (in nanoseconds) between putting an item on a queue and a
+        blocked thread receiving it, for each sample (sorted).
+    '''
+    items = queue.Queue()
+    ready = threading.Event()
+
+    def _put():
+        for i in range(samples):
+            ready.wait()
+            ready.clear()
+            # Give waiting thread time to block.
+            time.sleep(1e-4)
+            items.put(time.perf_counter_ns())
+
+    thread = threading.Thread(target=_put)
+    thread.daemon = True
+    thread.start()
+    latencies = []
+    for i in range(samples):
+        ready.set()
+        put_ns = items.get()
+        latencies.append(time.perf_counter_ns() - put_ns)
+    thread.join()
+    return sorted(latencies)
+
+
+class HybridWaiter(object):
+    '''
+    Wait for an item on a queue: spin, then block.
+
+    Parameters
+    ----------
+    spin_s : float, optional
+        Spin window (in seconds).  Use ``0`` to always block.
+
+        By default, the spin window is calibrated in a background thread on
+        first use (see :meth:`calibrate`).  Until calibration finishes, calls
+        to :meth:`get` block without spinning.
+    max_spin_s : float, optional
+        Maximum calibrated spin window (in seconds).
+    '''
+    def __init__(self, spin_s=None, max_spin_s=MAX_SPIN_S):
+        self.spin_s = spin_s
+        self.max_spin_s = max_spin_s
+        self.wakeup_ns = None
+        self._lock = threading.Lock()
+        self._calibration_thread = None
+        self.reset_stats()
+
+    def calibrate(self, samples=CALIBRATION_SAMPLES, background=False):
+        '''
+        Set spin window to :data:`SPIN_FACTOR` times the median wake-up
+        latency of a blocking wait (see :func:`measure_wakeup_ns`), up to
+        :attr:`max_spin_s`.
+
+        Spinning for longer than a blocking wait takes to wake up does little
+        to reduce latency.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of wake-ups to measure.
+        background : bool, optional
+            If ``True``, calibrate in a background thread (at most once), and
+            return immediately.
+
+        Returns
+        -------
+        float or None
+            Spin window (in seconds), or ``None`` if calibrating in the
+            background.
+        '''
+        if background:
+            with self._lock:
+                if self._calibration_thread is None:
+                    self._calibration_thread = \
+                        threading.Thread(target=self.calibrate,
+                                         args=(samples, ))
+                    self._calibration_thread.daemon = True
+                    self._calibration_thread.start()
+            return None
+        latencies = measure_wakeup_ns(samples)
+        self.wakeup_ns = latencies[len(latencies) // 2]
+        self.spin_s = min(self.max_spin_s, SPIN_FACTOR * self.wakeup_ns * 1e-9)
+        return self.spin_s
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'calls': 0, 'spin_hits': 0, 'block_hits': 0,
+                           'timeouts': 0, 'total_latency_ns': 0,
+                           'max_latency_ns': 0}
+
+    def stats(self):
+        '''
+        Returns
+        -------
+        dict
+            Number of calls, number of items received while spinning and while
+            blocked, number of timeouts, total and maximum wait (in
+            nanoseconds), current spin window (in seconds), and measured
+            wake-up latency (in nanoseconds, if calibrated).
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+        stats['spin_s'] = self.spin_s
+        stats['wakeup_ns'] = self.wakeup_ns
+        return stats
+
+    def _record(self, outcome, start_ns):
+        latency_ns = time.perf_counter_ns() - start_ns
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats[outcome] += 1
+            self._stats['total_latency_ns'] += latency_ns
+            self._stats['max_latency_ns'] = max(latency_ns,
+                                                self._stats['max_latency_ns'])
+        return latency_ns
+
+    def get(self, queue_, timeout_s=None):
+        '''
+        Parameters
+        ----------
+        queue_ : queue.Queue
+            Queue to get item from.
+        timeout_s : float, optional
+            Maximum time to wait (in seconds).
+
+            By default, block until an item is available.
+
+        Returns
+        -------
+        object
+            Next item from :data:`queue_`.
+
+        Raises
+        ------
+        queue.Empty
+            If no item is available within :data:`timeout_s`.
+        '''
+        return self.get_with_latency(queue_, timeout_s)[0]
+
+    def get_with_latency(self, queue_, timeout_s=None):
+        '''
+        Parameters
+        ----------
+        queue_ : queue.Queue
+            Queue to get item from.
+        timeout_s : float, optional
+            Maximum time to wait (in seconds).
+
+            By default, block until an item is available.
+
+        Returns
+        -------
+        tuple
+            Next item from :data:`queue_`, and time (in nanoseconds) spent
+            waiting for it.
+
+        Raises
+        ------
+        queue.Empty
+            If no item is available within :data:`timeout_s`.
+        '''
+        start_ns = time.perf_counter_ns()
+        spin_s = self.spin_s
+        if spin_s is None:
+            # Do not delay this call; block until calibration finishes.
+            self.calibrate(background=True)
+            spin_s = 0
+        spin_ns = int(spin_s * 1e9)
+        if timeout_s is not None:
+            spin_ns = min(spin_ns, int(timeout_s * 1e9))
+        spin_end_ns = start_ns + spin_ns
+
+        while True:
+            try:
+                item = queue_.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                return item, self._record('spin_hits', start_ns)
+            if time.perf_counter_ns() >= spin_end_ns:
+                break
+            # Release the GIL, so the thread putting the response can run.
+            # Otherwise, it would wait for the interpreter switch interval.
+            time.sleep(0)
+
+        if timeout_s is not None:
+            timeout_s = max(0, timeout_s - (time.perf_counter_ns() -
+                                            start_ns) * 1e-9)
+        try:
+            item = queue_.get(timeout=timeout_s)
+        except queue.Empty:
+            self._record('timeouts', start_ns)
+            raise queue.Empty('No response received.')
+        return item, self._record('block_hits', start_ns)
+
+
+#: Waiter shared by :func:`serial_device.threaded.request` calls that poll.
+DEFAULT_WAITER = HybridWaiter()
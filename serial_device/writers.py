@@ -0,0 +1,670 @@
+'''
+Writers that batch writes to a serial port, write from a background
+thread, or hold writes while a port is disconnected.
+
+.. versionadded:: 0.11
+'''
+import collections
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+
+#: Default time (in seconds) to hold small writes before flushing.
+COALESCE_WINDOW_S = 1e-3
+#: Default number of buffered bytes at which writes are flushed immediately.
+COALESCE_MAX_BYTES = 4096
+
+
+class CoalescingWriter(object):
+    '''
+    Coalesce small writes into one buffer, and write the buffer with a single
+    call to :data:`write_func`.
+
+    The buffer is written once the first buffered write is
+    :data:`window_s` seconds old, once it holds at least :data:`max_bytes`
+    bytes, or on an explicit :meth:`flush`, whichever comes first.
+
+    If :data:`write_func` raises an exception while flushing in the
+    background, the flushed data is discarded, and the exception is raised
+    by the next call to :meth:`write`, :meth:`flush` or :meth:`close`.
+
+    Parameters
+    ----------
+    write_func : callable
+        Function to write data, e.g., ``serial.threaded.ReaderThread.write``.
+    window_s : float, optional
+        Maximum time (in seconds) to hold buffered data.
+    max_bytes : int, optional
+        Number of buffered bytes at which to flush immediately.
+
+    Attributes
+    ----------
+    writes : int
+        Number of calls to :meth:`write`.
+    flushes : int
+        Number of calls to :data:`write_func`.
+    bytes_written : int
+        Number of bytes passed to :data:`write_func`.
+    errors : int
+        Number of calls to :data:`write_func` that raised an exception while
+        flushing in the background.
+    '''
+    def __init__(self, write_func, window_s=COALESCE_WINDOW_S,
+                 max_bytes=COALESCE_MAX_BYTES):
+        self.write_func = write_func
+        self.window_s = window_s
+        self.max_bytes = max_bytes
+        self.writes = 0
+        self.flushes = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self._buffer = bytearray()
+        # Time (see `time.monotonic()`) by which buffer must be flushed.
+        self._deadline = None
+        self._condition = threading.Condition()
+        # Lock to serialize calls to `write_func`, so buffers are written in
+        # order.
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        # Exception raised by `write_func` while flushing in the background,
+        # not yet raised to a caller.
+        self._error = None
+
+    @property
+    def syscalls_saved(self):
+        '''
+        Number of writes that did not need their own call to
+        :data:`write_func`.
+        '''
+        return max(0, self.writes - self.flushes)
+
+    def stats(self):
+        '''
+        Returns
+        -------
+        dict
+            Counters, i.e., ``writes``, ``flushes``, ``bytes_written``,
+            ``errors`` and ``syscalls_saved``.
+        '''
+        return {'writes': self.writes, 'flushes': self.flushes,
+                'bytes_written': self.bytes_written, 'errors': self.errors,
+                'syscalls_saved': self.syscalls_saved}
+
+    def write(self, data, flush=False):
+        '''
+        Parameters
+        ----------
+        data : bytes
+            Data to write.
+        flush : bool, optional
+            If ``True``, write buffered data (including :data:`data`)
+            immediately.
+
+        Raises
+        ------
+        Exception
+            If a background flush failed since the last call (:data:`data` is
+            not written).
+        '''
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Writer is closed.')
+            self._raise_error()
+            self._buffer += data
+            self.writes += 1
+            flush = flush or len(self._buffer) >= self.max_bytes
+            if not flush and self._deadline is None:
+                self._deadline = time.monotonic() + self.window_s
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run)
+                    self._thread.daemon = True
+                    self._thread.start()
+                self._condition.notify()
+        if flush:
+            self.flush()
+
+    def _raise_error(self):
+        # Must be called with `self._condition` held.
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        '''
+        Write buffered data immediately.
+
+        Raises
+        ------
+        Exception
+            If a background flush failed since the last call (buffered data is
+            still written), or if :data:`write_func` fails.
+        '''
+        with self._write_lock:
+            with self._condition:
+                error, self._error = self._error, None
+                data = bytes(self._buffer)
+                del self._buffer[:]
+                self._deadline = None
+            if data:
+                self.write_func(data)
+                self.flushes += 1
+                self.bytes_written += len(data)
+        if error is not None:
+            raise error
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._condition.release()
+                try:
+                    self._flush_background()
+                finally:
+                    self._condition.acquire()
+
+    def _flush_background(self):
+        with self._write_lock:
+            with self._condition:
+                data = bytes(self._buffer)
+                del self._buffer[:]
+                self._deadline = None
+            if not data:
+                return
+            try:
+                self.write_func(data)
+            except Exception as exception:
+                self.errors += 1
+                logger.debug('Error flushing coalesced writes.',
+                             exc_info=True)
+                with self._condition:
+                    # Raise from next call to `write()`, `flush()` or
+                    # `close()`.
+                    self._error = exception
+            else:
+                self.flushes += 1
+                self.bytes_written += len(data)
+
+    def close(self):
+        '''
+        Flush buffered data and stop background thread.
+        '''
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify()
+            if self._thread is not None:
+                self._thread.join()
+
+
+#: Overflow policies of :class:`QueuedWriter`.
+OVERFLOW_POLICIES = ('block', 'drop', 'raise')
+#: Default maximum number of writes queued by :class:`QueuedWriter`.
+WRITE_QUEUE_SIZE = 1024
+#: Maximum number of bytes :class:`QueuedWriter` writes with one call.
+MAX_BATCH_BYTES = 4096
+# Interval (in seconds) between checks for close request while waiting for
+# the port to be ready.
+READY_CHECK_INTERVAL_S = .1
+
+
+class QueuedWriter(object):
+    '''
+    Write from a dedicated thread, so callers never block on the port.
+
+    Each call to :meth:`write` queues data and returns a future, which
+    completes once the data has been passed to :data:`write_func` (i.e., has
+    reached the operating system).  Writes already queued when the thread
+    wakes are written together, up to :data:`MAX_BATCH_BYTES` at a time.
+
+    Parameters
+    ----------
+    write_func : callable
+        Function to write data, e.g., ``serial.threaded.ReaderThread.write``.
+    maxsize : int, optional
+        Maximum number of queued writes.
+    overflow : str, optional
+        What :meth:`write` does when the queue is full:
+
+         - ``'block'``: wait for space in the queue.
+         - ``'drop'``: discard data; the returned future raises
+           :class:`queue.Full`.
+         - ``'raise'``: raise :class:`queue.Full`.
+    ready : threading.Event, optional
+        Event that is set while :data:`write_func` may be called (e.g., while
+        the port is connected).  Writes wait for the event to be set.
+
+    Attributes
+    ----------
+    written : int
+        Number of writes completed.
+    dropped : int
+        Number of writes discarded because the queue was full.
+    failed : int
+        Number of writes for which :data:`write_func` raised an exception.
+    '''
+    def __init__(self, write_func, maxsize=WRITE_QUEUE_SIZE, overflow='block',
+                 ready=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('Overflow policy must be one of: %s' %
+                             ', '.join(OVERFLOW_POLICIES))
+        self.write_func = write_func
+        self.overflow = overflow
+        self.ready = ready
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize)
+        self._closed = threading.Event()
+        # Held while enqueuing, so no data is queued after close sentinel.
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stats(self):
+        '''
+        Returns
+        -------
+        dict
+            Counters, i.e., ``queued`` (current queue length), ``written``,
+            ``dropped`` and ``failed``.
+        '''
+        return {'queued': self._queue.qsize(), 'written': self.written,
+                'dropped': self.dropped, 'failed': self.failed}
+
+    def write(self, data, timeout_s=None):
+        '''
+        Parameters
+        ----------
+        data : bytes
+            Data to write.
+        timeout_s : float, optional
+            Maximum time (in seconds) to wait for space in the queue (only
+            applies to ``'block'`` overflow policy).
+
+            By default, wait indefinitely.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future resolved with number of bytes written.
+
+        Raises
+        ------
+        queue.Full
+            If the queue is full and the overflow policy is ``'raise'`` (or
+            ``'block'`` and :data:`timeout_s` elapsed).
+        RuntimeError
+            If the writer is closed.
+        '''
+        future = concurrent.futures.Future()
+        if timeout_s is None or self.overflow != 'block':
+            self._lock.acquire()
+        else:
+            # Other writers may hold lock while waiting for space in queue.
+            start = time.monotonic()
+            if not self._lock.acquire(timeout=timeout_s):
+                raise queue.Full('Write queue is full.')
+            timeout_s = max(0, timeout_s - (time.monotonic() - start))
+        try:
+            if self._closed.is_set():
+                raise RuntimeError('Writer is closed.')
+            if self.overflow == 'block':
+                self._queue.put((data, future), timeout=timeout_s)
+            else:
+                self._queue.put_nowait((data, future))
+        except queue.Full:
+            if self.overflow != 'drop':
+                raise
+            self.dropped += 1
+            future.set_exception(queue.Full('Write queue is full.'))
+        finally:
+            self._lock.release()
+        return future
+
+    def _wait_ready(self):
+        '''
+        Returns
+        -------
+        bool
+            ``True`` if ready to write, or ``False`` if close was requested.
+        '''
+        if self.ready is None:
+            return True
+        while not self.ready.wait(READY_CHECK_INTERVAL_S):
+            if self._closed.is_set():
+                return False
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            # Write any other queued data together with this item.
+            batch = [item]
+            size = len(item[0])
+            while size < MAX_BATCH_BYTES:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Close requested.  Put sentinel back for outer loop.
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+            # Skip cancelled writes.
+            batch = [(data_i, future_i) for data_i, future_i in batch
+                     if future_i.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            if not self._wait_ready():
+                for _, future_i in batch:
+                    future_i.set_exception(RuntimeError('Writer closed before '
+                                                        'data was written.'))
+                continue
+            try:
+                self.write_func(b''.join(data_i for data_i, _ in batch))
+            except Exception as exception:
+                self.failed += len(batch)
+                for _, future_i in batch:
+                    future_i.set_exception(exception)
+            else:
+                self.written += len(batch)
+                for data_i, future_i in batch:
+                    future_i.set_result(len(data_i))
+
+    def close(self, timeout_s=None):
+        '''
+        Stop accepting writes, write queued data (if ready), and stop thread.
+
+        Parameters
+        ----------
+        timeout_s : float, optional
+            Maximum time (in seconds) to wait for queued data to be written.
+        '''
+        if self._closed.is_set():
+            return
+        # Set before taking lock, so thread fails (rather than waits to
+        # write) queued data while port is not ready, making room for any
+        # write holding the lock.
+        self._closed.set()
+        with self._lock:
+            # Sentinel to stop thread.  Blocks if queue is full.
+            self._queue.put(None)
+        self._thread.join(timeout_s)
+
+
+#: Default maximum number of bytes held by :class:`ReplayBuffer`.
+REPLAY_MAX_BYTES = 65536
+
+
+class ReplayBuffer(object):
+    '''
+    Hold writes while a port is disconnected, and write them (in order) once
+    the port is connected again.
+
+    While connected, each call to :meth:`write` is passed straight to
+    :data:`write_func`.  If the port is disconnected, or :data:`write_func`
+    raises :class:`serial.SerialException` (or :class:`OSError`), data is
+    buffered instead.  Calling :meth:`connected` writes buffered data before
+    any new writes.
+
+    If :data:`write_func` returns the number of bytes written (e.g.,
+    :meth:`serial.Serial.write`), only bytes not yet written are buffered, so
+    no byte is written twice.  Data still buffered while connected (e.g.,
+    after a failed write) is written before the next write, or by the next
+    call to :meth:`connected`.
+
+    The buffer is bounded: once it holds more than :data:`max_bytes` bytes,
+    the **oldest** writes are dropped (whole writes only, except the rest of
+    a partially written write, which is never dropped).  When replaying,
+    writes older than :data:`max_age_s` seconds, and writes rejected by
+    :data:`filter_func` (e.g., stale commands superseded by later writes),
+    are dropped.
+
+    Parameters
+    ----------
+    write_func : callable
+        Function to write data, e.g., ``serial.threaded.ReaderThread.write``.
+    max_bytes : int, optional
+        Maximum number of buffered bytes.
+    max_age_s : float, optional
+        Maximum age (in seconds) of a write to replay.
+
+        By default, replay writes of any age.
+    filter_func : callable, optional
+        Function called as ``filter_func(data, age_s)`` for each buffered
+        write before it is replayed; the write is dropped unless it returns
+        ``True``.
+
+    Attributes
+    ----------
+    replayed_bytes : int
+        Number of buffered bytes written later (e.g., after reconnecting).
+    dropped_overflow : int
+        Number of bytes dropped because the buffer was full.
+    dropped_stale : int
+        Number of bytes dropped because they were older than
+        :data:`max_age_s`.
+    dropped_filtered : int
+        Number of bytes dropped by :data:`filter_func`.
+    '''
+    def __init__(self, write_func, max_bytes=REPLAY_MAX_BYTES, max_age_s=None,
+                 filter_func=None):
+        self.write_func = write_func
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.filter_func = filter_func
+        self.replayed_bytes = 0
+        self.dropped_overflow = 0
+        self.dropped_stale = 0
+        self.dropped_filtered = 0
+        # Buffered `(time, data)` writes, oldest first (see
+        # `time.monotonic()`).
+        self._buffer = collections.deque()
+        # `True` if start of oldest buffered write was already written.
+        self._partial = False
+        self._size = 0
+        self._connected = False
+        # Lock held while writing, so replayed data is written before any new
+        # writes.
+        self._lock = threading.Lock()
+
+    @property
+    def buffered_bytes(self):
+        '''
+        Number of bytes currently buffered.
+        '''
+        return self._size
+
+    @property
+    def dropped_bytes(self):
+        '''
+        Total number of buffered bytes that were dropped.
+        '''
+        return (self.dropped_overflow + self.dropped_stale +
+                self.dropped_filtered)
+
+    def stats(self):
+        '''
+        Returns
+        -------
+        dict
+            Counters, i.e., ``buffered_bytes``, ``replayed_bytes``,
+            ``dropped_bytes``, ``dropped_overflow``, ``dropped_stale`` and
+            ``dropped_filtered``.
+        '''
+        with self._lock:
+            return {'buffered_bytes': self._size,
+                    'replayed_bytes': self.replayed_bytes,
+                    'dropped_bytes': self.dropped_bytes,
+                    'dropped_overflow': self.dropped_overflow,
+                    'dropped_stale': self.dropped_stale,
+                    'dropped_filtered': self.dropped_filtered}
+
+    def write(self, data):
+        '''
+        Write data, or buffer it if the port is disconnected.
+
+        Parameters
+        ----------
+        data : bytes
+            Data to write.
+        '''
+        with self._lock:
+            if self._connected and self._buffer:
+                # Write data still buffered first, to keep writes in order.
+                self._replay()
+            if not self._connected or self._buffer:
+                self._append(data)
+                return
+            try:
+                remaining = self._write(data)
+            except (serial.SerialException, OSError):
+                remaining = data
+            if remaining:
+                # Buffer is empty, so remaining data becomes oldest write.
+                self._partial = len(remaining) < len(data)
+                self._append(remaining)
+
+    def _write(self, data):
+        '''
+        Returns
+        -------
+        bytes
+            Data not written (empty if all data was written).
+
+        Raises
+        ------
+        serial.SerialException, OSError
+            If :data:`write_func` failed.
+        '''
+        try:
+            size = self.write_func(data)
+        except (serial.SerialException, OSError) as exception:
+            logger.debug('Write failed (%s).  Buffering until written.',
+                         exception)
+            raise
+        if size is None or size >= len(data):
+            return b''
+        return data[size:]
+
+    def _append(self, data):
+        self._buffer.append((time.monotonic(), bytes(data)))
+        self._size += len(data)
+        # Drop whole writes, oldest first.  The rest of a partially written
+        # write is kept, since the device already received its start.
+        first = 1 if self._partial else 0
+        while self._size > self.max_bytes and len(self._buffer) > first:
+            data_i = self._buffer[first][1]
+            del self._buffer[first]
+            self._size -= len(data_i)
+            self.dropped_overflow += len(data_i)
+
+    def _replay(self):
+        '''
+        Write buffered data (lock must be held).
+
+        Returns
+        -------
+        bool
+            ``True`` if all buffered writes were written.
+        '''
+        now = time.monotonic()
+        while self._buffer:
+            time_i, data_i = self._buffer[0]
+            age_s = now - time_i
+            # The rest of a partially written write is never dropped.
+            if self._partial:
+                pass
+            elif self.max_age_s is not None and age_s > self.max_age_s:
+                self._buffer.popleft()
+                self._size -= len(data_i)
+                self.dropped_stale += len(data_i)
+                continue
+            elif (self.filter_func is not None and
+                  not self.filter_func(data_i, age_s)):
+                self._buffer.popleft()
+                self._size -= len(data_i)
+                self.dropped_filtered += len(data_i)
+                continue
+            try:
+                remaining = self._write(data_i)
+            except (serial.SerialException, OSError) as exception:
+                logger.warning('Replay failed (%s).  %d bytes still '
+                               'buffered.', exception, self._size)
+                return False
+            size = len(data_i) - len(remaining)
+            self.replayed_bytes += size
+            self._size -= size
+            if remaining:
+                if not size:
+                    # No progress (e.g., output buffer full).
+                    logger.warning('Replay stalled.  %d bytes still '
+                                   'buffered.', self._size)
+                    return False
+                self._buffer[0] = time_i, remaining
+                self._partial = True
+                continue
+            self._buffer.popleft()
+            self._partial = False
+        return True
+
+    def connected(self):
+        '''
+        Replay buffered writes, and pass subsequent writes straight to
+        :data:`write_func`.
+
+        Returns
+        -------
+        bool
+            ``True`` if all buffered writes were replayed, or ``False`` if
+            :data:`write_func` failed.  Remaining writes stay buffered (and
+            a warning is logged) until written before the next write, or by
+            the next call to :meth:`connected`.
+        '''
+        with self._lock:
+            self._connected = True
+            return self._replay()
+
+    def disconnected(self):
+        '''
+        Buffer subsequent writes.
+        '''
+        with self._lock:
+            self._connected = False
+
+    def clear(self):
+        '''
+        Discard buffered writes.
+
+        Returns
+        -------
+        int
+            Number of bytes discarded.
+        '''
+        with self._lock:
+            size = self._size
+            self._buffer.clear()
+            self._partial = False
+            self._size = 0
+            return size
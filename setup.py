@@ -15,7 +15,7 @@ setup(name='serial_device',
       'devices through a serial-port.',
       author='Ryan Fobel, Christian Fobel',
       author_email='ryan@fobel.net, christian@fobel.net',
-      install_requires=['pandas>=0.18', 'pyserial', 'path-helpers',
+      install_requires=['numpy', 'pandas>=0.18', 'pyserial', 'path-helpers',
                         'paho-mqtt-helpers'],
       url='https://github.com/wheeler-microfluidics/serial_device.git',
       license='GPLv2',